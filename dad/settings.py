@@ -106,6 +106,26 @@ if DATABASE_URL:
 
     DATABASES["default"] = dj_database_url.config(default=DATABASE_URL, conn_max_age=600)
 
+# Cache. Version stamps for the SOP matcher, store calendars and the nav
+# context live here, so every server process must share it: a file cache on
+# this host by default, Redis (REDIS_URL) when processes span hosts. The test
+# cases override it with an in-process cache.
+REDIS_URL = os.environ.get("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ.get("DJANGO_CACHE_DIR", str(BASE_DIR / ".cache")),
+            "OPTIONS": {"MAX_ENTRIES": 20000},
+        }
+    }
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -152,6 +172,19 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Design runway warning threshold (days)
 DESIGN_RUNWAY_THRESHOLD = int(os.environ.get("DESIGN_RUNWAY_THRESHOLD", "5"))
 
+# Emergency recycle skips designs posted within this many days when it can
+DESIGN_RECYCLE_COOLDOWN_DAYS = int(os.environ.get("DESIGN_RECYCLE_COOLDOWN_DAYS", "30"))
+
+# Week-ahead pre-render (manage.py prerender_upcoming)
+PRERENDER_DAYS = int(os.environ.get("PRERENDER_DAYS", "7"))
+PRERENDER_OFF_PEAK_HOURS = os.environ.get("PRERENDER_OFF_PEAK_HOURS", "1-6")
+
+# Daily rollover (manage.py daily_rollover); dad/wsgi.py schedules it in each
+# server process unless disabled, e.g. when cron runs the command instead.
+DAILY_ROLLOVER_SCHEDULER = (
+    os.environ.get("DAILY_ROLLOVER_SCHEDULER", "true").lower() == "true"
+)
+
 # Google Drive configuration
 GOOGLE_DRIVE_ROOT_FOLDER_ID = os.environ.get("GOOGLE_DRIVE_ROOT_FOLDER_ID", "")
 GOOGLE_DRIVE_CREDENTIALS_FILE = BASE_DIR / os.environ.get(
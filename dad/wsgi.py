@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dad.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.DAILY_ROLLOVER_SCHEDULER:
+    # Every server process (gunicorn worker, waitress, runserver) gets a
+    # scheduler; the rollover's DB claim makes only one of them do the work.
+    from handoff.rollover import start_rollover_scheduler
+
+    start_rollover_scheduler()
@@ -9,8 +9,8 @@ from django.shortcuts import render, redirect
 from django.utils import timezone
 import calendar
 import datetime
+import json
 from django.http import JsonResponse
-from django.core.management import call_command
 import subprocess
 from types import MethodType
 from django.db.models import Count, Q
@@ -23,11 +23,12 @@ from .forms import (
     TaskAdminForm,
     TemplateAttachmentForm,
 )
-from .context_processors import _compute_runway_status
 from .design_workflow import ensure_emergency_design
+from .intake import IntakeBusy, get_intake_job, start_intake_job
 from .mockup_generator import generate_mockup_bytes_for_template
 from .drive import upload_mockup_bytes_to_bucket
-from .schedule_sync import backfill_scheduled_designs
+from .runway import forecast_runway
+from .schedule_ops import apply_schedule_operations
 from .models import (
     AdminNote,
     AdminNoteFolder,
@@ -83,35 +84,134 @@ def _admin_index_with_notes(self, request, extra_context=None):
 admin.site.index = MethodType(_admin_index_with_notes, admin.site)
 
 
+def _schedule_item(sd: ScheduledDesign) -> dict:
+    label = sd.recurring_task.title if sd.recurring_task else "All tasks"
+    if sd.store:
+        label = f"{label} · {sd.store.name}"
+    return {
+        "id": sd.id,
+        "design_id": sd.drive_design_file_id,
+        "task_id": sd.recurring_task_id or "",
+        "store_id": sd.store_id or "",
+        "thumb": f"https://drive.google.com/thumbnail?id={sd.drive_design_file_id}&sz=w120",
+        "label": label,
+    }
+
+
+def _schedule_month(current: datetime.date, selected_task=None, selected_store=None) -> dict:
+    """Calendar grid for one month with the schedules it shows.
+
+    Only rows within the month ±7 days are read (a range scan on the due_date
+    or (store, due_date) index), so the cost doesn't grow with history.
+    """
+    prev_month = (current - datetime.timedelta(days=1)).replace(day=1)
+    next_month = (current.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    scheduled_qs = ScheduledDesign.objects.filter(
+        due_date__gte=current - datetime.timedelta(days=7),
+        due_date__lt=next_month + datetime.timedelta(days=7),
+    ).select_related("recurring_task", "store").order_by("due_date", "id")
+    if selected_task:
+        scheduled_qs = scheduled_qs.filter(recurring_task=selected_task)
+    if selected_store:
+        scheduled_qs = scheduled_qs.filter(store=selected_store)
+    scheduled_map = {}
+    for sd in scheduled_qs:
+        scheduled_map.setdefault(sd.due_date, []).append(_schedule_item(sd))
+
+    weeks = [
+        [
+            {
+                "date": day,
+                "in_month": day.month == current.month,
+                "scheduled_items": scheduled_map.get(day, []),
+            }
+            for day in week
+        ]
+        for week in calendar.Calendar(firstweekday=0).monthdatescalendar(current.year, current.month)
+    ]
+    return {
+        "month_label": current.strftime("%B %Y"),
+        "month_value": f"{current.year}-{current.month:02d}",
+        "prev_month": f"{prev_month.year}-{prev_month.month:02d}",
+        "next_month": f"{next_month.year}-{next_month.month:02d}",
+        "weeks": weeks,
+    }
+
+
+def _parse_month(value: str | None, today: datetime.date) -> datetime.date:
+    try:
+        year, month = [int(x) for x in (value or "").split("-")]
+        return datetime.date(year, month, 1)
+    except ValueError:
+        return datetime.date(today.year, today.month, 1)
+
+
+def _lookup_pk(model, value):
+    if not value:
+        return None
+    try:
+        return model.objects.get(pk=int(value))
+    except (model.DoesNotExist, ValueError):
+        return None
+
+
+def handoff_schedule_month_view(request):
+    """JSON for one calendar month so the schedule page can page without reloading."""
+    current = _parse_month(request.GET.get("month"), timezone.localdate())
+    month = _schedule_month(
+        current,
+        _lookup_pk(RecurringTask, request.GET.get("task")),
+        _lookup_pk(Store, request.GET.get("store")),
+    )
+    month["weeks"] = [
+        [dict(day, date=day["date"].isoformat()) for day in week] for week in month["weeks"]
+    ]
+    return JsonResponse(month)
+
+
+def handoff_schedule_batch_view(request):
+    """Apply a JSON batch of schedule operations; see schedule_ops for the format.
+
+    Returns the items of every changed date, limited to the page's task/store
+    filter, so the calendar can redraw just those cells.
+    """
+    if request.method != "POST":
+        return JsonResponse({"ok": False, "error": "POST required."}, status=405)
+    try:
+        payload = json.loads(request.body.decode("utf-8") or "{}")
+        result = apply_schedule_operations(payload.get("operations"))
+    except (ValueError, AttributeError) as exc:
+        return JsonResponse({"ok": False, "error": str(exc) or "Invalid JSON."}, status=400)
+
+    cells = {day.isoformat(): [] for day in result.changed_dates}
+    if result.changed_dates:
+        scheduled_qs = ScheduledDesign.objects.filter(due_date__in=result.changed_dates)
+        task = _lookup_pk(RecurringTask, payload.get("task"))
+        store = _lookup_pk(Store, payload.get("store"))
+        if task:
+            scheduled_qs = scheduled_qs.filter(recurring_task=task)
+        if store:
+            scheduled_qs = scheduled_qs.filter(store=store)
+        for sd in scheduled_qs.select_related("recurring_task", "store").order_by("due_date", "id"):
+            cells[sd.due_date.isoformat()].append(_schedule_item(sd))
+    return JsonResponse(
+        {
+            "ok": True,
+            "created": result.created,
+            "updated": result.updated,
+            "deleted": result.deleted,
+            "designs_redated": result.designs_redated,
+            "cells": cells,
+        }
+    )
+
+
 def handoff_schedule_view(request):
     today = timezone.localdate()
-    month_str = request.GET.get("month")
     date_str = request.GET.get("date")
-    task_filter = request.GET.get("task")
-    store_filter = request.GET.get("store")
-    selected_task = None
-    selected_store = None
-    if task_filter:
-        try:
-            selected_task = RecurringTask.objects.get(pk=int(task_filter))
-        except (RecurringTask.DoesNotExist, ValueError):
-            selected_task = None
-    if store_filter:
-        try:
-            selected_store = Store.objects.get(pk=int(store_filter))
-        except (Store.DoesNotExist, ValueError):
-            selected_store = None
-
-    if month_str:
-        year, month = [int(x) for x in month_str.split("-")]
-        current = datetime.date(year, month, 1)
-    else:
-        current = datetime.date(today.year, today.month, 1)
-    next_month = (current.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
-    month_after_next = (next_month.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
-    sync_from = current - datetime.timedelta(days=7)
-    sync_to = month_after_next + datetime.timedelta(days=7)
-    backfill_scheduled_designs(store=selected_store, date_from=sync_from, date_to=sync_to)
+    selected_task = _lookup_pk(RecurringTask, request.GET.get("task"))
+    selected_store = _lookup_pk(Store, request.GET.get("store"))
+    current = _parse_month(request.GET.get("month"), today)
 
     selected_date = None
     if date_str:
@@ -198,42 +298,7 @@ def handoff_schedule_view(request):
         redirect_store = f"&store={store_obj.id}" if store_obj else ""
         return redirect(f"/admin/handoff/schedule/?date={due_date}{redirect_task}{redirect_store}")
 
-    cal = calendar.Calendar(firstweekday=0)
-    weeks = []
-    scheduled_qs = ScheduledDesign.objects.select_related("recurring_task", "store")
-    if selected_task:
-        scheduled_qs = scheduled_qs.filter(recurring_task=selected_task)
-    if selected_store:
-        scheduled_qs = scheduled_qs.filter(store=selected_store)
-    scheduled_map = {}
-    for sd in scheduled_qs:
-        label = sd.recurring_task.title if sd.recurring_task else "All tasks"
-        if sd.store:
-            label = f"{label} · {sd.store.name}"
-        scheduled_map.setdefault(sd.due_date, []).append(
-            {
-                "id": sd.id,
-                "design_id": sd.drive_design_file_id,
-                "task": sd.recurring_task,
-                "task_id": sd.recurring_task.id if sd.recurring_task else "",
-                "store_id": sd.store.id if sd.store else "",
-                "thumb": f"https://drive.google.com/thumbnail?id={sd.drive_design_file_id}&sz=w120",
-                "label": label,
-            }
-        )
-    for week in cal.monthdatescalendar(current.year, current.month):
-        week_cells = []
-        for day in week:
-            week_cells.append(
-                {
-                    "date": day,
-                    "in_month": day.month == current.month,
-                    "scheduled_items": scheduled_map.get(day, []),
-                }
-            )
-        weeks.append(week_cells)
-
-    prev_month = (current.replace(day=1) - datetime.timedelta(days=1)).replace(day=1)
+    month = _schedule_month(current, selected_task, selected_store)
 
     selected_design = None
     if selected_date:
@@ -250,22 +315,20 @@ def handoff_schedule_view(request):
 
     context = dict(
         admin.site.each_context(request),
-        month_label=current.strftime("%B %Y"),
-        month_value=f"{current.year}-{current.month:02d}",
-        prev_month=f"{prev_month.year}-{prev_month.month:02d}",
-        next_month=f"{next_month.year}-{next_month.month:02d}",
-        weeks=weeks,
+        **month,
         selected_date=selected_date or today,
-        scheduled_map=scheduled_map,
         selected_design_id=selected_design or "",
         recurring_tasks=RecurringTask.objects.order_by("title"),
-        stores=Store.objects.order_by("order", "name"),
+        stores=list(Store.objects.order_by("order", "name")),
         selected_task=selected_task,
         selected_store=selected_store,
         task_query=f"&task={selected_task.id}" if selected_task else "",
         store_query=f"&store={selected_store.id}" if selected_store else "",
     )
-    context["runway"] = _compute_runway_status(selected_store)
+    stores = context["stores"]
+    forecasts = forecast_runway(stores=stores, today=today)
+    context["runway"] = forecasts[selected_store.id if selected_store else None].as_dict()
+    context["store_runways"] = [(store, forecasts[store.id]) for store in stores]
     return render(request, "admin/handoff_schedule.html", context)
 
 
@@ -273,30 +336,48 @@ _orig_get_urls = admin.site.get_urls
 
 
 def intake_designs_view(request):
+    """Start a background intake for the posted store, or for every store."""
     if request.method != "POST":
         return redirect("/admin/handoff/schedule/")
-    store_id = request.POST.get("store_id")
-    store = None
-    if store_id:
-        try:
-            store = Store.objects.get(pk=int(store_id))
-        except (Store.DoesNotExist, ValueError):
-            store = None
+    store = _lookup_pk(Store, request.POST.get("store_id"))
     try:
-        if store:
-            call_command("intake_designs", store=str(store.id))
-            messages.success(
-                request,
-                f"Intake complete for {store.name}. Check Design Files for results.",
-            )
-        else:
-            call_command("intake_designs")
-            messages.success(request, "Intake complete. Check Design Files for results.")
+        job_id = start_intake_job([store.id] if store else None)
+    except IntakeBusy as exc:
+        if request.headers.get("X-Requested-With") == "XMLHttpRequest":
+            return JsonResponse({"ok": False, "error": str(exc), "job_id": exc.job.job_id}, status=409)
+        messages.warning(request, f"{exc} Try again when it has finished.")
+        return redirect("/admin/handoff/schedule/")
     except Exception as exc:
+        if request.headers.get("X-Requested-With") == "XMLHttpRequest":
+            return JsonResponse({"ok": False, "error": str(exc)}, status=400)
         messages.error(request, f"Intake failed: {exc}")
+        return redirect("/admin/handoff/schedule/")
+    if request.headers.get("X-Requested-With") == "XMLHttpRequest":
+        return JsonResponse({"ok": True, "job_id": job_id})
+    label = store.name if store else "all stores"
+    messages.success(request, f"Intake started for {label}. Check Design Files for results.")
     return redirect("/admin/handoff/schedule/")
 
 
+def intake_status_view(request):
+    job = get_intake_job(request.GET.get("job", ""))
+    if not job:
+        return JsonResponse({"ok": False, "error": "Job not found."}, status=404)
+    return JsonResponse(
+        {
+            "ok": True,
+            "job_id": job.job_id,
+            "status": job.status,
+            "stores": job.store_labels,
+            "stores_total": job.stores_total,
+            "stores_done": job.stores_done,
+            "files_done": job.files_done,
+            "error": job.error,
+            "summary": job.summary,
+        }
+    )
+
+
 def open_dump_folder_view(request):
     store_id = request.GET.get("store")
     store = None
@@ -584,11 +665,14 @@ def _get_urls():
     urls = _orig_get_urls()
     custom = [
         path("handoff/schedule/", admin.site.admin_view(handoff_schedule_view), name="handoff_schedule"),
+        path("handoff/schedule/month/", admin.site.admin_view(handoff_schedule_month_view), name="handoff_schedule_month"),
+        path("handoff/schedule/batch/", admin.site.admin_view(handoff_schedule_batch_view), name="handoff_schedule_batch"),
         path("handoff/notes/", admin.site.admin_view(admin_notes_view), name="handoff_notes"),
         path("handoff/deploy/", admin.site.admin_view(deploy_latest_view), name="handoff_deploy_latest"),
         path("handoff/template-attachment/upload/", admin.site.admin_view(upload_template_attachment_view), name="handoff_template_attachment_upload"),
         path("handoff/open-dump/", admin.site.admin_view(open_dump_folder_view), name="handoff_open_dump_folder"),
         path("handoff/intake/", admin.site.admin_view(intake_designs_view), name="handoff_intake_designs"),
+        path("handoff/intake/status/", admin.site.admin_view(intake_status_view), name="handoff_intake_status"),
         path("handoff/emergency/", admin.site.admin_view(emergency_recycle_view), name="handoff_emergency_recycle"),
         path("handoff/mockup-studio/", admin.site.admin_view(mockup_studio_view), name="handoff_mockup_studio"),
     ]
@@ -757,6 +841,7 @@ class TaskAdmin(admin.ModelAdmin):
         task = form.instance
         if not task.steps.exists():
             task.seed_steps_from_template()
+        task.refresh_status()
 
 
 @admin.register(TaskTemplate)
@@ -1087,6 +1172,22 @@ class TaskStepAdmin(admin.ModelAdmin):
     list_filter = ("done",)
     search_fields = ("text",)
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        obj.task.refresh_status()
+
+    def delete_model(self, request, obj):
+        task = obj.task
+        super().delete_model(request, obj)
+        task.refresh_status()
+
+    def delete_queryset(self, request, queryset):
+        # "Delete selected" bypasses delete_model; refresh each task once.
+        tasks = list(Task.objects.filter(pk__in=queryset.values("task_id")))
+        super().delete_queryset(request, queryset)
+        for task in tasks:
+            task.refresh_status()
+
 
 @admin.register(Attachment)
 class AttachmentAdmin(admin.ModelAdmin):
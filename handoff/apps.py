@@ -3,3 +3,28 @@ from django.apps import AppConfig
 
 class HandoffConfig(AppConfig):
     name = 'handoff'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from .calendar_cache import scheduled_design_calendar_changed
+        from .context_processors import bump_context_cache, bump_sop_version
+        from .models import DesignFile, RecurringTask, ScheduledDesign, SOPGuide, Store, StoreMembership
+        from .rollover import recurring_task_saved, scheduled_design_synced
+        from .runway import design_file_changed, scheduled_design_changed
+        from .schedule_sync import design_file_saved
+
+        for model in (Store, StoreMembership, SOPGuide, DesignFile, ScheduledDesign):
+            post_save.connect(bump_context_cache, sender=model, dispatch_uid=f"handoff-context-{model.__name__}-save")
+            post_delete.connect(bump_context_cache, sender=model, dispatch_uid=f"handoff-context-{model.__name__}-delete")
+        post_save.connect(bump_sop_version, sender=SOPGuide, dispatch_uid="handoff-sop-version-save")
+        post_delete.connect(bump_sop_version, sender=SOPGuide, dispatch_uid="handoff-sop-version-delete")
+        for model, handler in ((DesignFile, design_file_changed), (ScheduledDesign, scheduled_design_changed)):
+            post_save.connect(handler, sender=model, dispatch_uid=f"handoff-coverage-{model.__name__}-save")
+            post_delete.connect(handler, sender=model, dispatch_uid=f"handoff-coverage-{model.__name__}-delete")
+        post_save.connect(design_file_saved, sender=DesignFile, dispatch_uid="handoff-schedule-sync-save")
+        post_save.connect(scheduled_design_calendar_changed, sender=ScheduledDesign, dispatch_uid="handoff-calendar-save")
+        post_delete.connect(scheduled_design_calendar_changed, sender=ScheduledDesign, dispatch_uid="handoff-calendar-delete")
+        post_save.connect(recurring_task_saved, sender=RecurringTask, dispatch_uid="handoff-rollover-recurring-save")
+        post_save.connect(scheduled_design_synced, sender=ScheduledDesign, dispatch_uid="handoff-rollover-design-save")
+        post_delete.connect(scheduled_design_synced, sender=ScheduledDesign, dispatch_uid="handoff-rollover-design-delete")
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import calendar
+import datetime as dt
+import time
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.urls import reverse
+
+from .models import ScheduledDesign
+
+
+# Rendered store calendar grids are cached per (store, month) under a version
+# stamp; ScheduledDesign writes bump the stamp of every month whose grid shows
+# the row. The TTL only bounds staleness from label changes (task titles).
+STORE_CALENDAR_TTL = 3600
+
+def month_value(date: dt.date) -> str:
+    return f"{date.year}-{date.month:02d}"
+
+
+def grid_days(current: dt.date) -> list[list[dt.date]]:
+    return calendar.Calendar(firstweekday=0).monthdatescalendar(current.year, current.month)
+
+
+def months_showing(date: dt.date) -> set[str]:
+    """Months whose six-week grid can include ``date`` (spill-over days included)."""
+    return {month_value(date + dt.timedelta(days=offset)) for offset in (-7, 0, 7)}
+
+
+def _version_key(store_id: int | None, month: str) -> str:
+    return f"handoff:store-calendar-version:{store_id or 'none'}:{month}"
+
+
+def calendar_versions(store_ids, month: str) -> dict[int | None, str]:
+    """Current version stamp per store for ``month``; missing stamps are started now.
+
+    Stamps are times, so a cache flush can't bring back an old stamp.
+    """
+    keys = {store_id: _version_key(store_id, month) for store_id in store_ids}
+    found = cache.get_many(keys.values())
+    missing = {key: f"{time.time():.6f}" for key in keys.values() if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return {store_id: found[key] for store_id, key in keys.items()}
+
+
+def bump_calendar_versions(keys) -> None:
+    stamp = f"{time.time():.6f}"
+    entries = {}
+    for store_id, date in keys:
+        if date is None:
+            continue
+        for month in months_showing(date):
+            entries[_version_key(store_id, month)] = stamp
+    if entries:
+        cache.set_many(entries, None)
+
+
+def scheduled_design_calendar_changed(sender, instance: ScheduledDesign, **kwargs) -> None:
+    keys = {(instance.store_id, instance.due_date)}
+    if not kwargs.get("created") and instance.pk and (
+        instance.has_changed("store_id") or instance.has_changed("due_date")
+    ):
+        keys.add((instance.previous_value("store_id"), instance.previous_value("due_date")))
+    bump_calendar_versions(keys)
+
+
+def _build_weeks(current: dt.date, days: list[list[dt.date]], day_map: dict) -> list[list[dict]]:
+    return [
+        [
+            {
+                "date": day,
+                "in_month": day.month == current.month,
+                "scheduled_items": day_map.get(day, []),
+            }
+            for day in week
+        ]
+        for week in days
+    ]
+
+
+def store_calendar_weeks(store_ids, current: dt.date, versions: dict[int | None, str] | None = None) -> dict:
+    """Week grids for ``current`` keyed by store id (``None`` = no store).
+
+    Cached grids are reused; the rest come from one range query over the
+    visible days.
+    """
+    store_ids = list(store_ids)
+    month = month_value(current)
+    versions = versions or calendar_versions(store_ids, month)
+    keys = {
+        store_id: f"handoff:store-calendar:{store_id or 'none'}:{month}:{versions[store_id]}"
+        for store_id in store_ids
+    }
+    found = cache.get_many(keys.values())
+    weeks = {store_id: found[key] for store_id, key in keys.items() if key in found}
+    missing = [store_id for store_id in store_ids if store_id not in weeks]
+    if not missing:
+        return weeks
+
+    days = grid_days(current)
+    queryset = ScheduledDesign.objects.filter(
+        due_date__gte=days[0][0], due_date__lte=days[-1][-1]
+    ).select_related("recurring_task").order_by("due_date", "id")
+    store_filter = [store_id for store_id in missing if store_id is not None]
+    if None in missing:
+        queryset = queryset.filter(Q(store__isnull=True) | Q(store_id__in=store_filter))
+    else:
+        queryset = queryset.filter(store_id__in=store_filter)
+
+    day_maps: dict[int | None, dict[dt.date, list[dict]]] = {store_id: {} for store_id in missing}
+    for sd in queryset:
+        day_maps[sd.store_id].setdefault(sd.due_date, []).append(
+            {
+                "id": sd.id,
+                "design_id": sd.drive_design_file_id,
+                "label": sd.recurring_task.title if sd.recurring_task else "Design",
+                "thumb": f"https://drive.google.com/thumbnail?id={sd.drive_design_file_id}&sz=w120",
+                "preview_url": reverse("handoff:scheduled_design_preview", args=[sd.id]),
+            }
+        )
+    fresh = {store_id: _build_weeks(current, days, day_maps[store_id]) for store_id in missing}
+    cache.set_many({keys[store_id]: value for store_id, value in fresh.items()}, STORE_CALENDAR_TTL)
+    weeks.update(fresh)
+    return weeks
+
+
+def has_scheduled_items(weeks: list[list[dict]]) -> bool:
+    return any(day["scheduled_items"] for week in weeks for day in week)
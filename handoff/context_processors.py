@@ -1,55 +1,92 @@
 from __future__ import annotations
 
-from django.conf import settings
+from uuid import uuid4
+
+from django.core.cache import cache
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject, cached_property
 
-from .models import DesignFile, ScheduledDesign, SOPGuide, Store
+from .models import SOPGuide, Store
+from .runway import forecast_store_runway
 
 
-def _compute_runway_status(store: Store | None = None) -> dict:
-    today = timezone.localdate()
-    threshold = int(getattr(settings, "DESIGN_RUNWAY_THRESHOLD", 5))
-
-    dates = list(
-        DesignFile.objects.filter(
-            date_assigned__gte=today,
-            status__in=[DesignFile.STATUS_SCHEDULED, DesignFile.STATUS_ACTIVE],
-            **({"store": store} if store else {}),
-        )
-        .values_list("date_assigned", flat=True)
-        .distinct()
-    )
-
-    if not dates:
-        dates = list(
-            ScheduledDesign.objects.filter(
-                due_date__gte=today, recurring_task__isnull=True, **({"store": store} if store else {})
-            )
-            .values_list("due_date", flat=True)
-            .distinct()
-        )
+# Cross-request cache for the shared nav context. Entries are keyed by a
+# generation number that bump_context_cache() advances whenever stores,
+# memberships, SOPs or schedules change; the TTL bounds staleness from bulk
+# writes that skip model signals.
+CONTEXT_CACHE_TTL = 60
+_GENERATION_KEY = "handoff:context-generation"
 
-    days_remaining = len(dates)
-    exhaustion_date = max(dates) if dates else None
-    return {
-        "days_remaining": days_remaining,
-        "exhaustion_date": exhaustion_date,
-        "threshold": threshold,
-        "below_threshold": days_remaining < threshold,
-    }
+
+def _compute_runway_status(store: Store | None = None) -> dict:
+    return forecast_store_runway(store).as_dict()
+
+
+class SOPMatcher:
+    """Route matcher compiled from the active SOP guides.
+
+    A guide matches when its route occurs anywhere in the path
+    (case-insensitive); guides earlier in (name, id) order win. All routes
+    share one character trie that is walked from every offset of the path,
+    so a lookup never touches the database and costs
+    O(len(path) * longest route).
+    """
+
+    _END = None  # terminal marker; never collides with a path character
+
+    def __init__(self, sops: list[SOPGuide]):
+        self.sops = sops
+        self._root: dict = {}
+        for priority, sop in enumerate(sops):
+            route = (sop.context_route or "").strip().lower()
+            if not route:
+                continue
+            node = self._root
+            for char in route:
+                node = node.setdefault(char, {})
+            node.setdefault(self._END, priority)
+
+    def match(self, path: str) -> SOPGuide | None:
+        path = (path or "").lower()
+        best = None
+        for start in range(len(path)):
+            node = self._root
+            for char in path[start:]:
+                node = node.get(char)
+                if node is None:
+                    break
+                priority = node.get(self._END)
+                if priority is not None and (best is None or priority < best):
+                    best = priority
+                    if best == 0:
+                        return self.sops[0]
+        return self.sops[best] if best is not None else None
+
+
+# A random token rather than a counter, so a cleared or evicted cache can
+# never hand back a version an old process-local matcher was built for.
+_SOP_VERSION_KEY = "handoff:sop-version"
+_sop_matcher: tuple[str, SOPMatcher] | None = None
+
+
+def bump_sop_version(*args, **kwargs) -> None:
+    cache.set(_SOP_VERSION_KEY, uuid4().hex, None)
+
+
+def get_sop_matcher() -> SOPMatcher:
+    """Process-local compiled matcher, rebuilt when the SOP version changes."""
+    global _sop_matcher
+    version = cache.get_or_set(_SOP_VERSION_KEY, lambda: uuid4().hex, None)
+    current = _sop_matcher
+    if current is None or current[0] != version:
+        sops = list(SOPGuide.objects.filter(active=True).order_by("name", "id"))
+        current = (version, SOPMatcher(sops))
+        _sop_matcher = current
+    return current[1]
 
 
 def _match_active_sop(path: str):
-    path_lower = (path or "").lower()
-    for sop in SOPGuide.objects.filter(active=True).order_by("name", "id"):
-        route = (sop.context_route or "").strip()
-        if not route:
-            continue
-        if route.startswith("/") and path.startswith(route):
-            return sop
-        if route.lower() in path_lower:
-            return sop
-    return None
+    return get_sop_matcher().match(path)
 
 
 def _build_sop_embed_url(value: str) -> str:
@@ -61,51 +98,102 @@ def _build_sop_embed_url(value: str) -> str:
     return f"https://scribehow.com/embed/{value}?as=scroll"
 
 
-def handoff_context(request):
-    context = {}
-    try:
-        if request.user.is_authenticated:
-            if request.user.is_staff or request.user.is_superuser:
-                stores = list(Store.objects.filter(active=True).order_by("order", "name"))
-            else:
-                stores = list(
-                    Store.objects.filter(
-                        active=True,
-                        memberships__user=request.user,
-                        memberships__active=True,
-                    )
-                    .distinct()
-                    .order_by("order", "name")
-                )
-        else:
-            stores = []
-        context["store_options"] = stores
-        store_id = request.GET.get("store")
-        current_store = None
-        if store_id:
-            try:
-                store_id_int = int(store_id)
-                current_store = next((s for s in stores if s.id == store_id_int), None)
-            except ValueError:
-                current_store = None
-        context["current_store"] = current_store
-    except Exception:
-        context["store_options"] = []
-        context["current_store"] = None
+def _generation() -> int:
+    return cache.get_or_set(_GENERATION_KEY, 0, None)
 
-    try:
-        context["runway"] = _compute_runway_status(context.get("current_store"))
-    except Exception:
-        context["runway"] = None
 
+def bump_context_cache(*args, **kwargs) -> None:
     try:
-        active = _match_active_sop(request.path)
-        if active:
-            context["active_sop"] = active
-            context["active_sop_embed_url"] = _build_sop_embed_url(
-                active.scribe_id_or_url
+        cache.incr(_GENERATION_KEY)
+    except ValueError:
+        cache.set(_GENERATION_KEY, 1, None)
+
+
+def _cached(key: str, compute):
+    key = f"handoff:context:{_generation()}:{key}"
+    value = cache.get(key)
+    if value is None:
+        value = {"value": compute()}
+        cache.set(key, value, CONTEXT_CACHE_TTL)
+    return value["value"]
+
+
+class _HandoffContext:
+    """Per-request memo; every attribute is computed on first use only."""
+
+    def __init__(self, request):
+        self.request = request
+
+    @cached_property
+    def store_options(self) -> list[Store]:
+        user = self.request.user
+        if not user.is_authenticated:
+            return []
+        if user.is_staff or user.is_superuser:
+            return _cached(
+                "stores:staff",
+                lambda: list(Store.objects.filter(active=True).order_by("order", "name")),
             )
-    except Exception:
-        pass
+        return _cached(
+            f"stores:user:{user.pk}",
+            lambda: list(
+                Store.objects.filter(
+                    active=True,
+                    memberships__user=user,
+                    memberships__active=True,
+                )
+                .distinct()
+                .order_by("order", "name")
+            ),
+        )
+
+    @cached_property
+    def current_store(self) -> Store | None:
+        try:
+            store_id = int(self.request.GET.get("store") or 0)
+        except ValueError:
+            return None
+        if not store_id:
+            return None
+        return next((s for s in self.store_options if s.id == store_id), None)
+
+    @cached_property
+    def runway(self) -> dict | None:
+        store = self.current_store
+        key = f"runway:{store.id if store else 'all'}:{timezone.localdate().isoformat()}"
+        return _cached(key, lambda: _compute_runway_status(store))
+
+    @cached_property
+    def active_sop(self):
+        return _match_active_sop(self.request.path)
+
+    @cached_property
+    def active_sop_embed_url(self) -> str:
+        sop = self.active_sop
+        return _build_sop_embed_url(sop.scribe_id_or_url) if sop else ""
+
 
-    return context
+def _lazy(memo: _HandoffContext, name: str, default):
+    def _resolve():
+        try:
+            return getattr(memo, name)
+        except Exception:
+            return default
+
+    return SimpleLazyObject(_resolve)
+
+
+def handoff_context(request):
+    # HTMX fragments never render the nav, runway banner or SOP sidebar.
+    if request.headers.get("HX-Request") == "true":
+        return {}
+    memo = getattr(request, "_handoff_context", None)
+    if memo is None:
+        memo = request._handoff_context = _HandoffContext(request)
+    return {
+        "store_options": _lazy(memo, "store_options", []),
+        "current_store": _lazy(memo, "current_store", None),
+        "runway": _lazy(memo, "runway", None),
+        "active_sop": _lazy(memo, "active_sop", None),
+        "active_sop_embed_url": _lazy(memo, "active_sop_embed_url", ""),
+    }
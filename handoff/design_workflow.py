@@ -2,11 +2,14 @@ from __future__ import annotations
 
 import os
 import random
+from datetime import timedelta
 
+from django.conf import settings
+from django.db.models import Exists, F, Max, Min, OuterRef, Subquery
 from django.utils import timezone
 
 from .drive import copy_file_to_folder, ensure_bucket, get_drive_service, get_file_metadata
-from .models import DesignFile, ScheduledDesign
+from .models import DesignFile, DesignHistory, ScheduledDesign
 
 
 def _ext_from_design(design: DesignFile, fallback_name: str | None = None) -> str:
@@ -18,11 +21,69 @@ def _ext_from_design(design: DesignFile, fallback_name: str | None = None) -> st
     return ext
 
 
-def _scheduled_ids_excluding(date_value) -> set[str]:
-    return set(
-        ScheduledDesign.objects.exclude(due_date=date_value).values_list(
-            "drive_design_file_id", flat=True
-        )
+# Random probes per pick, and pool rows checked against the exclusions per probe.
+RECYCLE_PROBES = 3
+RECYCLE_PROBE_WINDOW = 20
+
+
+def _recycle_pool(store=None):
+    """Original POSTED designs: a plain (status, store, id) index range."""
+    pool = DesignFile.objects.filter(status=DesignFile.STATUS_POSTED, recycled_from__isnull=True)
+    if store:
+        pool = pool.filter(store=store)
+    return pool
+
+
+def recycle_candidates(date_value, store=None):
+    """POSTED designs that may be recycled onto ``date_value``.
+
+    Designs scheduled on another day are excluded with an anti-join rather
+    than a materialized id list. Recycled copies are never a source.
+    """
+    scheduled_elsewhere = ScheduledDesign.objects.filter(
+        drive_design_file_id=OuterRef("drive_file_id")
+    ).exclude(due_date=date_value)
+    return _recycle_pool(store).filter(~Exists(scheduled_elsewhere))
+
+
+def _sample(pool, eligible) -> DesignFile | None:
+    """Random ``eligible`` row without running its anti-joins over the pool.
+
+    Picks a random pk inside ``pool``'s bounds (index only), takes the next
+    few pool ids there, and checks only those against ``eligible``. After
+    RECYCLE_PROBES misses it falls back to the first eligible row by pk.
+    """
+    bounds = pool.aggregate(low=Min("pk"), high=Max("pk"))
+    if bounds["low"] is None:
+        return None
+    for _ in range(RECYCLE_PROBES):
+        probe = random.randint(bounds["low"], bounds["high"])
+        ids = pool.values_list("pk", flat=True)
+        window = list(ids.filter(pk__gte=probe).order_by("pk")[:RECYCLE_PROBE_WINDOW])
+        if len(window) < RECYCLE_PROBE_WINDOW:
+            window += ids.filter(pk__lt=probe).order_by("-pk")[: RECYCLE_PROBE_WINDOW - len(window)]
+        picked = eligible.filter(pk__in=window).order_by("pk").first()
+        if picked:
+            return picked
+    return eligible.order_by("pk").first()
+
+
+def pick_recycle_candidate(date_value, store=None) -> DesignFile | None:
+    """Random candidate not posted within the cooldown; else the least recently posted."""
+    candidates = recycle_candidates(date_value, store=store)
+    cooldown = int(getattr(settings, "DESIGN_RECYCLE_COOLDOWN_DAYS", 30))
+    posted = DesignHistory.objects.filter(original_drive_file_id=OuterRef("drive_file_id"))
+    recent = posted.filter(
+        posted_date__gt=date_value - timedelta(days=cooldown), posted_date__lte=date_value
+    )
+    picked = _sample(_recycle_pool(store), candidates.filter(~Exists(recent)))
+    if picked:
+        return picked
+    last_posted = posted.order_by("-posted_date").values("posted_date")[:1]
+    return (
+        candidates.annotate(last_posted=Subquery(last_posted))
+        .order_by(F("last_posted").asc(nulls_first=True), "pk")
+        .first()
     )
 
 
@@ -35,18 +96,10 @@ def ensure_emergency_design(date_value=None, store=None) -> dict | None:
         if ScheduledDesign.objects.filter(due_date=date_value).exists():
             return None
 
-    scheduled_ids = _scheduled_ids_excluding(date_value)
-    candidates = (
-        DesignFile.objects.filter(status=DesignFile.STATUS_POSTED)
-        .exclude(drive_file_id__in=scheduled_ids)
-    )
-    if store:
-        candidates = candidates.filter(store=store)
-    candidates = list(candidates)
-    if not candidates:
+    picked = pick_recycle_candidate(date_value, store=store)
+    if not picked:
         return None
 
-    picked = random.choice(candidates)
     service = get_drive_service()
     meta = get_file_metadata(picked.drive_file_id, fields="id,name")
     ext = _ext_from_design(picked, fallback_name=meta.get("name", ""))
@@ -54,7 +107,6 @@ def ensure_emergency_design(date_value=None, store=None) -> dict | None:
 
     root_id = None
     try:
-        from django.conf import settings
         from .models import AppSettings
 
         settings_row = AppSettings.objects.first()
@@ -87,6 +139,7 @@ def ensure_emergency_design(date_value=None, store=None) -> dict | None:
         ext=ext.lstrip("."),
         store=store,
         source_folder="Scheduled",
+        recycled_from=picked,
     )
     ScheduledDesign.objects.update_or_create(
         due_date=date_value,
@@ -94,4 +147,5 @@ def ensure_emergency_design(date_value=None, store=None) -> dict | None:
         store=store,
         defaults={"drive_design_file_id": new_file_id},
     )
+    # History is written when the copy's task is marked done (Task.record_design_posted).
     return {"design": new_design, "source": picked}
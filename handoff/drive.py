@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import hashlib
 import io
 import os
 import json
@@ -13,6 +14,7 @@ from google.oauth2.credentials import Credentials
 from google.oauth2.service_account import Credentials as SACredentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload, MediaIoBaseUpload
 
 SCOPES = ["https://www.googleapis.com/auth/drive"]
@@ -106,17 +108,84 @@ def _escape_query(value: str) -> str:
     return value.replace("'", "\\'")
 
 
-def _delete_existing_named_files(service, parent_id: str, filename: str) -> None:
+def _find_named_files(service, parent_id: str, filename: str) -> list[dict]:
     safe_name = _escape_query(filename)
     query = (
         f"name='{safe_name}' and '{parent_id}' in parents and trashed=false"
     )
-    response = service.files().list(q=query, fields="files(id)").execute()
-    files = response.get("files", [])
-    for file in files:
-        file_id = file.get("id")
-        if file_id:
-            service.files().delete(fileId=file_id).execute()
+    response = (
+        service.files()
+        .list(q=query, fields="files(id,md5Checksum)", orderBy="createdTime")
+        .execute()
+    )
+    return response.get("files", [])
+
+
+def _md5_bytes(data: bytes) -> str:
+    return hashlib.md5(data).hexdigest()
+
+
+def _md5_file(file_path: str | Path) -> str:
+    digest = hashlib.md5()
+    with open(file_path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def mockup_drive_name(task_id: int, order: int, filename: str) -> str:
+    """Drive name for a task's mockup; tasks due on one date share a folder."""
+    return f"task-{task_id}-{order}-{filename}"
+
+
+def _owned_file(service, file_id: str, parent_id: str, filename: str) -> dict | None:
+    try:
+        current = (
+            service.files()
+            .get(fileId=file_id, fields="id,name,parents,md5Checksum,trashed")
+            .execute()
+        )
+    except HttpError:
+        return None
+    if current.get("trashed") or current.get("name") != filename:
+        return None
+    if parent_id not in current.get("parents", []):
+        return None
+    return current
+
+
+def _upsert_named_file(
+    service, parent_id: str, filename: str, md5_hex: str, make_media, file_id: str = ""
+) -> str:
+    """Reuse the caller's file, else a same-named one: skip identical bytes, else update in place.
+
+    ``file_id`` is only reused while it still has ``filename`` in ``parent_id``,
+    so a stale or shared id never overwrites someone else's file.
+    """
+    current = _owned_file(service, file_id, parent_id, filename) if file_id else None
+    if current:
+        if current.get("md5Checksum") != md5_hex:
+            service.files().update(
+                fileId=file_id, media_body=make_media(), fields="id"
+            ).execute()
+        return file_id
+    existing = _find_named_files(service, parent_id, filename)
+    if not existing:
+        metadata = {"name": filename, "parents": [parent_id]}
+        created = (
+            service.files()
+            .create(body=metadata, media_body=make_media(), fields="id")
+            .execute()
+        )
+        return created["id"]
+    keep, duplicates = existing[0], existing[1:]
+    for file in duplicates:
+        service.files().delete(fileId=file["id"]).execute()
+    if keep.get("md5Checksum") != md5_hex:
+        service.files().update(
+            fileId=keep["id"], media_body=make_media(), fields="id"
+        ).execute()
+    return keep["id"]
 
 
 def _safe_folder_name(value: str) -> str:
@@ -169,6 +238,31 @@ def get_file_metadata(file_id: str, fields: str = "id,name,parents,mimeType") ->
     return service.files().get(fileId=file_id, fields=fields).execute()
 
 
+def get_file_checksums(file_ids, service=None) -> dict[str, str]:
+    ids = [file_id for file_id in dict.fromkeys(file_ids) if file_id]
+    if not ids:
+        return {}
+    service = service or get_drive_service()
+    checksums: dict[str, str] = {}
+
+    def _collect(request_id, response, exception):
+        if exception is not None or not response:
+            return
+        # Google-native files have no md5Checksum; modifiedTime still changes on edit.
+        checksums[request_id] = response.get("md5Checksum") or response.get("modifiedTime", "")
+
+    # Drive batch requests are capped at 100 calls each.
+    for start in range(0, len(ids), 100):
+        batch = service.new_batch_http_request(callback=_collect)
+        for file_id in ids[start:start + 100]:
+            batch.add(
+                service.files().get(fileId=file_id, fields="id,md5Checksum,modifiedTime"),
+                request_id=file_id,
+            )
+        batch.execute()
+    return checksums
+
+
 def file_name_exists(service, parent_id: str, filename: str) -> bool:
     safe_name = _escape_query(filename)
     query = (
@@ -291,7 +385,9 @@ def upload_design_file(file_path: str | Path, filename: str, due_date=None) -> s
     return upload_file(file_path, filename, folder_id, service=service)
 
 
-def upload_mockup_file(file_path: str | Path, filename: str, due_date=None) -> str:
+def upload_mockup_file(
+    file_path: str | Path, filename: str, due_date=None, file_id: str = ""
+) -> str:
     root_id = _get_setting("drive_root_folder_id", "") or _get_setting(
         "GOOGLE_DRIVE_ROOT_FOLDER_ID", ""
     )
@@ -299,8 +395,14 @@ def upload_mockup_file(file_path: str | Path, filename: str, due_date=None) -> s
         raise RuntimeError("GOOGLE_DRIVE_ROOT_FOLDER_ID is not set.")
     service = get_drive_service()
     folder_id = ensure_date_folder(service, root_id, "Mockups", due_date)
-    _delete_existing_named_files(service, folder_id, filename)
-    return upload_file(file_path, filename, folder_id, service=service)
+    return _upsert_named_file(
+        service,
+        folder_id,
+        filename,
+        _md5_file(file_path),
+        lambda: MediaFileUpload(str(file_path), resumable=True),
+        file_id=file_id,
+    )
 
 
 def get_mockups_folder_id(due_date=None) -> str:
@@ -314,7 +416,7 @@ def get_mockups_folder_id(due_date=None) -> str:
 
 
 def upload_mockup_bytes(
-    data: bytes, filename: str, due_date=None, mime_type: str = "image/png"
+    data: bytes, filename: str, due_date=None, mime_type: str = "image/png", file_id: str = ""
 ) -> str:
     root_id = _get_setting("drive_root_folder_id", "") or _get_setting(
         "GOOGLE_DRIVE_ROOT_FOLDER_ID", ""
@@ -323,9 +425,13 @@ def upload_mockup_bytes(
         raise RuntimeError("GOOGLE_DRIVE_ROOT_FOLDER_ID is not set.")
     service = get_drive_service()
     folder_id = ensure_date_folder(service, root_id, "Mockups", due_date)
-    _delete_existing_named_files(service, folder_id, filename)
-    return upload_file_bytes(
-        data, filename, folder_id, mime_type=mime_type, service=service
+    return _upsert_named_file(
+        service,
+        folder_id,
+        filename,
+        _md5_bytes(data),
+        lambda: MediaIoBaseUpload(io.BytesIO(data), mimetype=mime_type, resumable=True),
+        file_id=file_id,
     )
 
 
@@ -343,9 +449,12 @@ def upload_mockup_bytes_to_bucket(
         raise RuntimeError("GOOGLE_DRIVE_ROOT_FOLDER_ID is not set.")
     service = get_drive_service()
     folder_id = ensure_date_bucket(service, root_id, "Mockups", due_date, store=store)
-    _delete_existing_named_files(service, folder_id, filename)
-    return upload_file_bytes(
-        data, filename, folder_id, mime_type=mime_type, service=service
+    return _upsert_named_file(
+        service,
+        folder_id,
+        filename,
+        _md5_bytes(data),
+        lambda: MediaIoBaseUpload(io.BytesIO(data), mimetype=mime_type, resumable=True),
     )
 
 
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from threading import Lock, Thread
+
+from django.core.cache import cache
+from django.db import close_old_connections
+
+from .drive import list_folder_images
+
+
+# Serve cached listings as-is for this long, then refresh in the background
+# while still serving the stale copy for up to FOLDER_IMAGES_KEEP seconds.
+FOLDER_IMAGES_TTL = 120
+FOLDER_IMAGES_KEEP = 24 * 3600
+
+_refreshing: set[str] = set()
+_refreshing_lock = Lock()
+
+
+@dataclass
+class FolderImages:
+    images: list[dict] = field(default_factory=list)
+    error: str = ""
+    pending: bool = False
+
+
+def _cache_key(folder_id: str) -> str:
+    return f"handoff:folder-images:{folder_id}"
+
+
+def refresh_folder_images(folder_id: str) -> FolderImages:
+    try:
+        entry = {"images": list_folder_images(folder_id), "error": ""}
+    except Exception as exc:
+        previous = cache.get(_cache_key(folder_id)) or {}
+        entry = {"images": previous.get("images", []), "error": f"Folder load failed: {exc}"}
+    entry["fetched_at"] = time.time()
+    cache.set(_cache_key(folder_id), entry, FOLDER_IMAGES_KEEP)
+    return FolderImages(images=entry["images"], error=entry["error"])
+
+
+def _refresh_in_background(folder_id: str) -> None:
+    with _refreshing_lock:
+        if folder_id in _refreshing:
+            return
+        _refreshing.add(folder_id)
+
+    def worker() -> None:
+        close_old_connections()
+        try:
+            refresh_folder_images(folder_id)
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(folder_id)
+            close_old_connections()
+
+    Thread(target=worker, daemon=True).start()
+
+
+def cached_folder_images(folder_id: str) -> FolderImages:
+    """Return the cached listing immediately; refresh it off-request when stale.
+
+    ``pending`` is set when there was nothing cached yet, so the caller can
+    poll for the fresh panel.
+    """
+    entry = cache.get(_cache_key(folder_id))
+    if entry is None:
+        _refresh_in_background(folder_id)
+        return FolderImages(pending=True)
+    if time.time() - entry.get("fetched_at", 0) > FOLDER_IMAGES_TTL:
+        _refresh_in_background(folder_id)
+    return FolderImages(images=entry.get("images", []), error=entry.get("error", ""))
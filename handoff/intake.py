@@ -0,0 +1,538 @@
+from __future__ import annotations
+
+import datetime as dt
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from decimal import ROUND_HALF_UP, Decimal
+from threading import Thread
+from typing import Callable, Optional
+from uuid import uuid4
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .calendar_cache import bump_calendar_versions
+from .context_processors import bump_context_cache
+from .drive import FOLDER_MIME, ensure_bucket, ensure_folder, get_drive_service
+from .models import AppSettings, DesignFile, IntakeRun, ScheduledDesign, Store
+from .rollover import sync_today_designs
+from .runway import refresh_coverage
+
+
+VALID_MIME = {"image/png", "image/jpeg", "image/jpg"}
+MAX_BYTES = 20 * 1024 * 1024
+DATE_RE = re.compile(r"(20\d{2}-\d{2}-\d{2})")
+INTAKE_BUCKETS = ("Dump_Zone", "Scheduled", "Error")
+# Stores listed/moved at once; each worker gets its own Drive client.
+INTAKE_WORKERS = 4
+# Drive batch requests are capped at 100 calls each.
+DRIVE_BATCH_SIZE = 100
+
+ProgressCallback = Callable[[int, int, int], None]
+
+
+@dataclass
+class IntakeMove:
+    file_id: str
+    name: str
+    new_parent: str
+    new_name: str | None
+    status: str
+    date_assigned: dt.date | None
+    size_mb: Decimal
+    ext: str
+    source_folder: str
+    reason: str = ""
+
+
+@dataclass
+class StoreIntakeResult:
+    store_id: int | None
+    label: str
+    scheduled: int = 0
+    rejected: int = 0
+    skipped: int = 0
+    first_date: dt.date | None = None
+    last_date: dt.date | None = None
+    errors: list[str] = field(default_factory=list)
+    lines: list[str] = field(default_factory=list)
+
+
+@dataclass
+class IntakeSummary:
+    dry_run: bool = False
+    stores: list[StoreIntakeResult] = field(default_factory=list)
+
+    @property
+    def scheduled(self) -> int:
+        return sum(result.scheduled for result in self.stores)
+
+    @property
+    def rejected(self) -> int:
+        return sum(result.rejected for result in self.stores)
+
+    @property
+    def errors(self) -> list[str]:
+        return [f"{result.label}: {error}" for result in self.stores for error in result.errors]
+
+    def as_dict(self) -> dict:
+        stores = []
+        for result in self.stores:
+            row = asdict(result)
+            row.pop("lines")
+            row["first_date"] = result.first_date.isoformat() if result.first_date else None
+            row["last_date"] = result.last_date.isoformat() if result.last_date else None
+            stores.append(row)
+        return {
+            "dry_run": self.dry_run,
+            "scheduled": self.scheduled,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "stores": stores,
+        }
+
+
+def get_root_id() -> str:
+    settings_row = AppSettings.objects.first()
+    if settings_row and settings_row.drive_root_folder_id:
+        return settings_row.drive_root_folder_id
+    return (
+        getattr(settings, "GOOGLE_DRIVE_ROOT_FOLDER_ID", "")
+        or os.environ.get("GOOGLE_DRIVE_ROOT_FOLDER_ID", "")
+    )
+
+
+def _list_files(service, folder_id: str, order_by: str | None = None) -> list[dict]:
+    files = []
+    page_token = None
+    while True:
+        response = (
+            service.files()
+            .list(
+                q=f"'{folder_id}' in parents and trashed=false",
+                fields="nextPageToken, files(id,name,mimeType,size,parents,createdTime)",
+                orderBy=order_by or "name",
+                pageSize=1000,
+                pageToken=page_token,
+            )
+            .execute()
+        )
+        files.extend(response.get("files", []))
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            break
+    return files
+
+
+def _parse_date_from_name(name: str) -> dt.date | None:
+    match = DATE_RE.search(name or "")
+    if not match:
+        return None
+    try:
+        return dt.datetime.strptime(match.group(1), "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def _is_valid_image(mime_type: str, filename: str) -> bool:
+    if mime_type in VALID_MIME:
+        return True
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext in {".png", ".jpg", ".jpeg"}
+
+
+def _file_ext(mime_type: str, filename: str) -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext in {".png", ".jpg", ".jpeg"}:
+        return ext
+    if mime_type in ("image/jpeg", "image/jpg"):
+        return ".jpg"
+    if mime_type == "image/png":
+        return ".png"
+    return ""
+
+
+def _size_mb(size_bytes: int) -> Decimal:
+    mb = Decimal(size_bytes) / Decimal(1024 * 1024)
+    return mb.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def _plan_moves(result: StoreIntakeResult, dump_files, folders: dict[str, str], next_date: dt.date) -> list[IntakeMove]:
+    moves = []
+    for item in dump_files:
+        name = item.get("name", "")
+        mime_type = item.get("mimeType", "")
+        size_bytes = int(item.get("size") or 0)
+        if mime_type == FOLDER_MIME:
+            result.skipped += 1
+            result.lines.append(f"Skipping folder: {name}")
+            continue
+        ext = _file_ext(mime_type, name)
+        reason = ""
+        if not _is_valid_image(mime_type, name):
+            reason = "Invalid file type"
+        elif size_bytes > MAX_BYTES:
+            reason = f"File too large ({size_bytes} bytes)"
+        if reason:
+            result.lines.append(f"{reason} for {name}. Moving to /Error.")
+            moves.append(
+                IntakeMove(
+                    file_id=item.get("id"),
+                    name=name,
+                    new_parent=folders["Error"],
+                    new_name=None,
+                    status=DesignFile.STATUS_ERROR,
+                    date_assigned=None,
+                    size_mb=_size_mb(size_bytes),
+                    ext=ext.lstrip("."),
+                    source_folder="Error",
+                    reason=reason,
+                )
+            )
+            continue
+        new_name = f"{next_date.isoformat()}{ext}"
+        result.lines.append(f"Scheduling {name} -> {new_name}")
+        moves.append(
+            IntakeMove(
+                file_id=item.get("id"),
+                name=name,
+                new_parent=folders["Scheduled"],
+                new_name=new_name,
+                status=DesignFile.STATUS_SCHEDULED,
+                date_assigned=next_date,
+                size_mb=_size_mb(size_bytes),
+                ext=ext.lstrip("."),
+                source_folder="Scheduled",
+            )
+        )
+        next_date += dt.timedelta(days=1)
+    return moves
+
+
+def _batch_move(service, moves: list[IntakeMove], old_parent: str) -> dict[str, str]:
+    """Move files with Drive batch requests; returns {file_id: error} for failures.
+
+    A batch that fails as a whole only fails the calls it didn't report on;
+    earlier and later batches still count, so their moves get saved.
+    """
+    failures: dict[str, str] = {}
+    reported: set[str] = set()
+
+    def _collect(request_id, response, exception):
+        reported.add(request_id)
+        if exception is not None:
+            failures[request_id] = str(exception)
+
+    for start in range(0, len(moves), DRIVE_BATCH_SIZE):
+        chunk = moves[start:start + DRIVE_BATCH_SIZE]
+        batch = service.new_batch_http_request(callback=_collect)
+        for move in chunk:
+            body = {"name": move.new_name} if move.new_name else {}
+            batch.add(
+                service.files().update(
+                    fileId=move.file_id,
+                    addParents=move.new_parent,
+                    removeParents=old_parent,
+                    body=body,
+                    fields="id",
+                ),
+                request_id=move.file_id,
+            )
+        try:
+            batch.execute()
+        except Exception as exc:
+            for move in chunk:
+                if move.file_id not in reported:
+                    failures[move.file_id] = str(exc)
+    return failures
+
+
+def _store_result(store: Store | None) -> StoreIntakeResult:
+    return StoreIntakeResult(store_id=store.id if store else None, label=store.name if store else "Shared")
+
+
+def _intake_drive(store: Store | None, root_id: str, dry_run: bool, today: dt.date):
+    """Drive half of one store's intake: list, plan and move. Runs in a worker thread."""
+    close_old_connections()
+    try:
+        return _intake_drive_store(store, root_id, dry_run, today)
+    finally:
+        close_old_connections()
+
+
+def _intake_drive_store(store: Store | None, root_id: str, dry_run: bool, today: dt.date):
+    result = _store_result(store)
+    service = get_drive_service()
+    folders = {bucket: ensure_bucket(service, root_id, bucket, store=store) for bucket in INTAKE_BUCKETS}
+
+    latest_date = None
+    for item in _list_files(service, folders["Scheduled"], order_by="name"):
+        found = _parse_date_from_name(item.get("name", ""))
+        if found and (latest_date is None or found > latest_date):
+            latest_date = found
+    next_date = latest_date + dt.timedelta(days=1) if latest_date else today
+
+    dump_files = _list_files(service, folders["Dump_Zone"], order_by="createdTime")
+    if not dump_files:
+        result.lines.append("No new files in Dump_Zone.")
+        return result, []
+    moves = _plan_moves(result, dump_files, folders, next_date)
+    if dry_run:
+        return result, moves
+    failures = _batch_move(service, moves, folders["Dump_Zone"])
+    for move in moves:
+        if move.file_id in failures:
+            result.errors.append(f"Move failed for {move.name}: {failures[move.file_id]}")
+    return result, [move for move in moves if move.file_id not in failures]
+
+
+def _generic_filter(keys) -> Q:
+    condition = Q()
+    for day, store_id in keys:
+        store_filter = Q(store_id=store_id) if store_id is not None else Q(store__isnull=True)
+        condition |= store_filter & Q(due_date=day)
+    return condition & Q(recurring_task__isnull=True)
+
+
+@transaction.atomic
+def _save_moves(store: Store | None, moves: list[IntakeMove]) -> set[tuple[int | None, dt.date]]:
+    """Upsert DesignFile and generic ScheduledDesign rows for moved files in bulk.
+
+    Returns the (store_id, date) keys whose coverage/calendars changed.
+    """
+    store_id = store.id if store else None
+    by_id = {move.file_id: move for move in moves}
+    keys = set()
+    now = timezone.now()
+
+    existing = list(DesignFile.objects.filter(drive_file_id__in=by_id))
+    for design in existing:
+        move = by_id[design.drive_file_id]
+        keys.add((design.store_id, design.date_assigned))
+        design.filename = move.new_name or move.name
+        design.status = move.status
+        if move.date_assigned:
+            design.date_assigned = move.date_assigned
+        design.size_mb = move.size_mb
+        design.ext = move.ext
+        design.store = store
+        design.source_folder = move.source_folder
+        design.updated_at = now
+    if existing:
+        DesignFile.objects.bulk_update(
+            existing,
+            ["filename", "status", "date_assigned", "size_mb", "ext", "store", "source_folder", "updated_at"],
+        )
+    known = {design.drive_file_id for design in existing}
+    DesignFile.objects.bulk_create(
+        [
+            DesignFile(
+                filename=move.new_name or move.name,
+                date_assigned=move.date_assigned,
+                status=move.status,
+                drive_file_id=move.file_id,
+                size_mb=move.size_mb,
+                ext=move.ext,
+                store=store,
+                source_folder=move.source_folder,
+            )
+            for move in moves
+            if move.file_id not in known
+        ]
+    )
+
+    wanted = {
+        (move.date_assigned, store_id): move.file_id
+        for move in moves
+        if move.status == DesignFile.STATUS_SCHEDULED
+    }
+    # Rows left behind by files that used to be scheduled somewhere else.
+    stale = [
+        row
+        for row in ScheduledDesign.objects.filter(recurring_task__isnull=True, drive_design_file_id__in=by_id)
+        if (row.due_date, row.store_id) not in wanted
+    ]
+    if stale:
+        keys.update((row.store_id, row.due_date) for row in stale)
+        ScheduledDesign.objects.filter(pk__in=[row.pk for row in stale]).delete()
+    if wanted:
+        rows = {
+            (row.due_date, row.store_id): row
+            for row in ScheduledDesign.objects.filter(_generic_filter(wanted))
+        }
+        updated = []
+        for key, file_id in wanted.items():
+            row = rows.get(key)
+            if row and row.drive_design_file_id != file_id:
+                row.drive_design_file_id = file_id
+                row.updated_at = now
+                updated.append(row)
+        ScheduledDesign.objects.bulk_update(updated, ["drive_design_file_id", "updated_at"])
+        ScheduledDesign.objects.bulk_create(
+            [
+                ScheduledDesign(due_date=day, store_id=key_store, drive_design_file_id=file_id)
+                for (day, key_store), file_id in wanted.items()
+                if (day, key_store) not in rows
+            ]
+        )
+        keys.update((key_store, day) for day, key_store in wanted)
+    return {key for key in keys if key[1] is not None}
+
+
+def run_intake(
+    stores: list[Store | None],
+    dry_run: bool = False,
+    progress_cb: ProgressCallback | None = None,
+    workers: int = INTAKE_WORKERS,
+) -> IntakeSummary:
+    """Intake the dump zones of ``stores`` (``None`` = the shared dump zone).
+
+    Drive listing and batched moves run concurrently per store; the DB
+    writes happen here, one bulk transaction per store, as each store's
+    moves finish. Bulk writes skip model signals, so coverage and the
+    calendar/nav caches are refreshed once at the end.
+    """
+    root_id = get_root_id()
+    if not root_id:
+        raise RuntimeError("GOOGLE_DRIVE_ROOT_FOLDER_ID is not set.")
+    # Create the shared bucket folders once so workers can't race to make duplicates.
+    service = get_drive_service()
+    for bucket in INTAKE_BUCKETS:
+        ensure_folder(service, bucket, root_id)
+
+    summary = IntakeSummary(dry_run=dry_run)
+    today = timezone.localdate()
+    changed_keys = set()
+    files_done = 0
+    pool = ThreadPoolExecutor(max_workers=max(1, min(workers, len(stores))))
+    try:
+        futures = {pool.submit(_intake_drive, store, root_id, dry_run, today): store for store in stores}
+        for future in as_completed(futures):
+            store = futures[future]
+            try:
+                result, moves = future.result()
+            except Exception as exc:
+                result, moves = _store_result(store), []
+                result.errors.append(str(exc))
+            scheduled = [move.date_assigned for move in moves if move.date_assigned]
+            result.scheduled = len(scheduled)
+            result.rejected = len(moves) - len(scheduled)
+            if scheduled:
+                result.first_date, result.last_date = min(scheduled), max(scheduled)
+            if moves and not dry_run:
+                try:
+                    changed_keys |= _save_moves(store, moves)
+                except Exception as exc:
+                    # The files already moved on Drive; reconcile_schedule can repair the rows.
+                    result.errors.append(f"Saving design rows failed: {exc}")
+            summary.stores.append(result)
+            files_done += len(moves)
+            if progress_cb:
+                progress_cb(len(summary.stores), len(stores), files_done)
+    finally:
+        pool.shutdown(wait=True)
+
+    if changed_keys:
+        refresh_coverage(changed_keys)
+        bump_calendar_versions(changed_keys)
+        bump_context_cache()
+        sync_today_designs({key[1] for key in changed_keys})
+    order = {store.id if store else None: index for index, store in enumerate(stores)}
+    summary.stores.sort(key=lambda result: order.get(result.store_id, 0))
+    return summary
+
+
+def intake_stores(store_ids=None) -> list[Store | None]:
+    """Stores for an intake run: the given ids, or the shared zone plus every active store."""
+    if store_ids:
+        stores = list(Store.objects.filter(pk__in=store_ids).order_by("order", "name"))
+        if len(stores) != len(set(store_ids)):
+            raise ValueError("Unknown store.")
+        return stores
+    return [None, *Store.objects.filter(active=True).order_by("order", "name")]
+
+
+# A running intake heart-beats on every finished store; one silent for this
+# long is treated as dead (its process restarted) and loses the claim.
+INTAKE_CLAIM_TIMEOUT = 30 * 60
+
+
+def _update_job(job_id: str, **updates) -> None:
+    IntakeRun.objects.filter(job_id=job_id).update(updated_at=timezone.now(), **updates)
+
+
+def get_intake_job(job_id: str) -> Optional[IntakeRun]:
+    if not job_id:
+        return None
+    return IntakeRun.objects.filter(job_id=job_id).first()
+
+
+class IntakeBusy(Exception):
+    """Another intake is running; ``job`` is its IntakeRun row."""
+
+    def __init__(self, job: IntakeRun):
+        self.job = job
+        super().__init__(f"An intake is already running for {', '.join(job.store_labels)}.")
+
+
+def claim_intake(stores) -> IntakeRun:
+    """Insert the active IntakeRun row; raises IntakeBusy while another holds it.
+
+    ``IntakeRun.active`` is unique, so of two racing server processes only one
+    insert succeeds, the same way DailyRollover claims a day.
+    """
+    IntakeRun.objects.filter(
+        active=True, updated_at__lt=timezone.now() - dt.timedelta(seconds=INTAKE_CLAIM_TIMEOUT)
+    ).update(active=None, status=IntakeRun.STATUS_ERROR, error="Intake stopped responding.")
+    while True:
+        try:
+            with transaction.atomic():
+                return IntakeRun.objects.create(
+                    job_id=uuid4().hex,
+                    store_ids=[store.id for store in stores if store],
+                    store_labels=[_store_result(store).label for store in stores],
+                    stores_total=len(stores),
+                )
+        except IntegrityError:
+            running = IntakeRun.objects.filter(active=True).first()
+            if running:
+                raise IntakeBusy(running)
+            # The other run finished between the insert and the lookup.
+
+
+def finish_intake(job_id: str, summary: IntakeSummary | None = None, error: str = "") -> None:
+    """Record the outcome and release the claim taken by claim_intake."""
+    if error:
+        _update_job(job_id, active=None, status=IntakeRun.STATUS_ERROR, error=error)
+    else:
+        _update_job(job_id, active=None, status=IntakeRun.STATUS_DONE, summary=summary.as_dict())
+
+
+def start_intake_job(store_ids=None) -> str:
+    """Run an intake in a background thread and return its job id.
+
+    Only one intake runs at a time across all server processes (two would
+    hand out the same dates); raises IntakeBusy while another is running.
+    Progress lives on the IntakeRun row so any process can report it.
+    """
+    stores = intake_stores(store_ids)
+    job_id = claim_intake(stores).job_id
+
+    def worker() -> None:
+        close_old_connections()
+        try:
+            def progress_cb(stores_done: int, stores_total: int, files_done: int) -> None:
+                _update_job(job_id, stores_done=stores_done, stores_total=stores_total, files_done=files_done)
+
+            finish_intake(job_id, summary=run_intake(stores, progress_cb=progress_cb))
+        except Exception as exc:
+            finish_intake(job_id, error=str(exc))
+        finally:
+            close_old_connections()
+
+    Thread(target=worker, daemon=True).start()
+    return job_id
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import contextlib
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from unittest import mock
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from .synthetic import LocalDriveService
+
+
+@dataclass
+class UrlStats:
+    url: str
+    latencies_ms: list[float] = field(default_factory=list)
+    queries: list[int] = field(default_factory=list)
+    errors: int = 0
+
+    def percentile(self, pct: float) -> float:
+        if not self.latencies_ms:
+            return 0.0
+        ordered = sorted(self.latencies_ms)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    @property
+    def avg_queries(self) -> float:
+        return statistics.mean(self.queries) if self.queries else 0.0
+
+
+@dataclass
+class LoadTestResult:
+    stats: dict[str, UrlStats]
+    requests: int
+    elapsed: float
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+
+@contextlib.contextmanager
+def local_drive():
+    """Route every Drive client through LocalDriveService."""
+    service = LocalDriveService()
+    with mock.patch("handoff.drive.get_drive_service", return_value=service), mock.patch(
+        "handoff.design_workflow.get_drive_service", return_value=service
+    ):
+        yield service
+
+
+def run_load_test(user, urls: list[str], requests: int = 200, concurrency: int = 8) -> LoadTestResult:
+    stats = {url: UrlStats(url=url) for url in urls}
+    lock = threading.Lock()
+    local = threading.local()
+
+    def client() -> Client:
+        if not hasattr(local, "client"):
+            local.client = Client(SERVER_NAME="localhost")
+            local.client.force_login(user)
+        return local.client
+
+    def hit(index: int) -> None:
+        url = urls[index % len(urls)]
+        try:
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                response = client().get(url)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+            with lock:
+                entry = stats[url]
+                entry.latencies_ms.append(elapsed_ms)
+                entry.queries.append(len(ctx.captured_queries))
+                if response.status_code >= 400:
+                    entry.errors += 1
+        except Exception:
+            with lock:
+                stats[url].errors += 1
+
+    started = time.perf_counter()
+    with local_drive(), ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(hit, range(requests)))
+    return LoadTestResult(stats=stats, requests=requests, elapsed=time.perf_counter() - started)
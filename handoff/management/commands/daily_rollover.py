@@ -0,0 +1,48 @@
+import datetime as dt
+
+from django.core.management.base import BaseCommand, CommandError
+
+from handoff.rollover import run_daily_rollover, run_rollover_forever
+
+
+class Command(BaseCommand):
+    help = "Sync scheduled designs, create today's tasks and recycle designs if needed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Date to roll over (YYYY-MM-DD). Defaults to today.")
+        parser.add_argument("--force", action="store_true", help="Run even if already done for the date.")
+        parser.add_argument(
+            "--watch",
+            action="store_true",
+            help="Keep running and roll over again after each local midnight.",
+        )
+
+    def handle(self, *args, **options):
+        if options["watch"]:
+            self.stdout.write("Running daily rollover now and after each local midnight.")
+            run_rollover_forever()
+            return
+
+        date_value = None
+        if options.get("date"):
+            try:
+                date_value = dt.date.fromisoformat(options["date"])
+            except ValueError:
+                raise CommandError(f"Invalid date: {options['date']}")
+
+        summary = run_daily_rollover(date_value, force=options["force"])
+        if summary is None:
+            self.stdout.write(
+                "Rollover already done or in progress for this date; use --force to rerun a finished one."
+            )
+            return
+        for error in summary.errors:
+            self.stderr.write(error)
+        recycled = ", ".join(summary.recycled) or "none"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rolled over {summary.date}: {summary.scheduled_backfilled} schedule row(s) synced, "
+                f"{summary.tasks_created} task(s) created, {summary.designs_applied} design(s) applied, "
+                f"recycled: {recycled}."
+            )
+        )
@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from handoff.loadtest import run_load_test
+from handoff.models import Task
+
+
+class Command(BaseCommand):
+    help = "Drive the main pages concurrently (Drive stubbed locally) and report latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--user", help="Username to log in as (default: first superuser).")
+        parser.add_argument("--url", action="append", help="Extra URL to include (repeatable).")
+
+    def handle(self, *args, **options):
+        user_model = get_user_model()
+        if options.get("user"):
+            user = user_model.objects.filter(username=options["user"]).first()
+        else:
+            user = user_model.objects.filter(is_superuser=True).order_by("id").first()
+        if not user:
+            raise CommandError("No user to log in as; create a superuser or pass --user.")
+
+        urls = ["/today/", "/summary/", "/stores/", "/runway/"]
+        task_ids = list(
+            Task.objects.filter(due_date=timezone.localdate())
+            .order_by("id")
+            .values_list("id", flat=True)[:3]
+        )
+        for task_id in task_ids:
+            urls += [
+                f"/task/{task_id}/",
+                f"/task/{task_id}/steps/",
+                f"/task/{task_id}/mockups/",
+                f"/task/{task_id}/etsy/",
+            ]
+        urls += options.get("url") or []
+
+        result = run_load_test(
+            user, urls, requests=max(1, options["requests"]), concurrency=max(1, options["concurrency"])
+        )
+        self.stdout.write(
+            f"{'URL':40} {'n':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'errors':>6}"
+        )
+        for stats in result.stats.values():
+            self.stdout.write(
+                f"{stats.url:40} {len(stats.latencies_ms):>5} {stats.percentile(50):>8.1f} "
+                f"{stats.percentile(95):>8.1f} {stats.percentile(99):>8.1f} "
+                f"{stats.avg_queries:>8.1f} {stats.errors:>6}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result.requests} request(s) in {result.elapsed:.2f}s "
+                f"({result.throughput:.1f} req/s, concurrency {options['concurrency']})."
+            )
+        )
@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from handoff.models import Store
+from handoff.prerender import in_hour_window, parse_hour_window, prerender_upcoming
+
+
+class Command(BaseCommand):
+    help = "Create upcoming tasks and pre-render their mockups and Etsy tags."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=int(getattr(settings, "PRERENDER_DAYS", 7)),
+            help="How many days ahead to prepare, starting today.",
+        )
+        parser.add_argument("--store", action="append", help="Store name or ID (repeatable).")
+        parser.add_argument(
+            "--throttle",
+            type=float,
+            default=2.0,
+            help="Seconds to pause between tasks to spread Drive/API load.",
+        )
+        parser.add_argument(
+            "--off-peak",
+            default=getattr(settings, "PRERENDER_OFF_PEAK_HOURS", ""),
+            help="Local hour window to run in, e.g. 1-6. Work stops when it closes.",
+        )
+        parser.add_argument("--anytime", action="store_true", help="Ignore the off-peak window.")
+        parser.add_argument("--skip-mockups", action="store_true")
+        parser.add_argument("--skip-tags", action="store_true")
+
+    def handle(self, *args, **options):
+        stores = None
+        if options.get("store"):
+            stores = []
+            for value in options["store"]:
+                try:
+                    store = Store.objects.get(pk=int(value))
+                except (ValueError, Store.DoesNotExist):
+                    store = Store.objects.filter(name__iexact=str(value).strip()).first()
+                if not store:
+                    raise CommandError(f"Store not found: {value}")
+                stores.append(store)
+
+        try:
+            window = None if options["anytime"] else parse_hour_window(options["off_peak"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if not in_hour_window(window):
+            self.stdout.write(f"Outside off-peak window {options['off_peak']}; nothing to do.")
+            return
+
+        summary = prerender_upcoming(
+            days=options["days"],
+            stores=stores,
+            throttle_seconds=max(0.0, options["throttle"]),
+            hour_window=window,
+            with_mockups=not options["skip_mockups"],
+            with_tags=not options["skip_tags"],
+            log=lambda message: self.stdout.write(message),
+        )
+        for error in summary.errors:
+            self.stderr.write(error)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Prepared {summary.tasks_seen} task(s) over {summary.dates} day(s): "
+                f"{summary.tasks_created} created, {summary.designs_applied} design(s) applied, "
+                f"{summary.mockups_rendered} mockup(s) rendered, {summary.mockups_skipped} up to date, "
+                f"{summary.tags_generated} tag set(s) generated."
+            )
+        )
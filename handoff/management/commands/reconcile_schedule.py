@@ -0,0 +1,43 @@
+import datetime as dt
+
+from django.core.management.base import BaseCommand, CommandError
+
+from handoff.models import Store
+from handoff.runway import rebuild_coverage
+from handoff.schedule_sync import backfill_scheduled_designs
+
+
+class Command(BaseCommand):
+    help = "Create missing ScheduledDesign rows from scheduled DesignFiles and rebuild runway coverage."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--store", help="Limit to one store (name or ID).")
+        parser.add_argument("--from", dest="date_from", help="First date (YYYY-MM-DD).")
+        parser.add_argument("--to", dest="date_to", help="Last date (YYYY-MM-DD).")
+
+    def _date(self, value):
+        if not value:
+            return None
+        try:
+            return dt.date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f"Invalid date: {value}")
+
+    def handle(self, *args, **options):
+        store = None
+        if options.get("store"):
+            value = options["store"]
+            try:
+                store = Store.objects.get(pk=int(value))
+            except (ValueError, Store.DoesNotExist):
+                store = Store.objects.filter(name__iexact=str(value).strip()).first()
+            if not store:
+                raise CommandError(f"Store not found: {value}")
+
+        created = backfill_scheduled_designs(
+            store=store,
+            date_from=self._date(options.get("date_from")),
+            date_to=self._date(options.get("date_to")),
+        )
+        rebuild_coverage()
+        self.stdout.write(self.style.SUCCESS(f"Created {created} schedule row(s); coverage rebuilt."))
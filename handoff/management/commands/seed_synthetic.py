@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from handoff.synthetic import clear_synthetic, seed_synthetic
+
+
+class Command(BaseCommand):
+    help = "Bulk-create synthetic tasks, schedules and design history for load testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stores", type=int, default=3)
+        parser.add_argument("--days", type=int, default=365, help="Days of history up to today.")
+        parser.add_argument("--ahead", type=int, default=30, help="Days scheduled after today.")
+        parser.add_argument("--assignees", type=int, default=5)
+        parser.add_argument("--tasks-per-day", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=0, help="Random seed for repeatable data.")
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete previously seeded synthetic data first.",
+        )
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            deleted = clear_synthetic()
+            self.stdout.write(f"Deleted {deleted} synthetic row(s).")
+        summary = seed_synthetic(
+            stores=options["stores"],
+            days=options["days"],
+            ahead=options["ahead"],
+            assignees=options["assignees"],
+            tasks_per_day=options["tasks_per_day"],
+            seed=options["seed"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {summary.stores} store(s), {summary.tasks} task(s), {summary.steps} step(s), "
+                f"{summary.publications} publication(s), {summary.scheduled} scheduled design(s), "
+                f"{summary.design_files} design file(s), {summary.history} history row(s)."
+            )
+        )
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-19 08:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('handoff', '0027_ideadump'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mockupslot',
+            name='render_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='mockupslot',
+            name='render_fingerprint',
+            field=models.CharField(blank=True, help_text='Hash of the design, template config and asset checksums last rendered.', max_length=64),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.2 on 2026-10-19 08:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('handoff', '0028_mockupslot_render_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollover',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('summary', models.JSONField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+    ]
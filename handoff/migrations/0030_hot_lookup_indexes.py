@@ -0,0 +1,41 @@
+# Generated by Django 6.0.2 on 2026-10-19 08:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('handoff', '0029_dailyrollover'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attachment',
+            index=models.Index(fields=['task', 'kind', 'created_at'], name='handoff_attach_task_kind_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='designfile',
+            index=models.Index(fields=['status', 'date_assigned', 'store'], name='handoff_design_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='designfile',
+            index=models.Index(fields=['drive_file_id'], name='handoff_design_drive_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='designhistory',
+            index=models.Index(fields=['posted_date', 'original_drive_file_id'], name='handoff_history_posted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mockupslot',
+            index=models.Index(fields=['task', 'order'], name='handoff_slot_task_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scheduleddesign',
+            index=models.Index(fields=['store', 'due_date'], name='handoff_sched_store_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['due_date', 'assigned_to'], name='handoff_task_due_assignee_idx'),
+        ),
+    ]
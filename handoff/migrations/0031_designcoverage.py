@@ -0,0 +1,44 @@
+# Generated by Django 6.0.2 on 2026-10-19 08:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_coverage(apps, schema_editor):
+    DesignCoverage = apps.get_model("handoff", "DesignCoverage")
+    DesignFile = apps.get_model("handoff", "DesignFile")
+    ScheduledDesign = apps.get_model("handoff", "ScheduledDesign")
+    keys = set(
+        DesignFile.objects.filter(
+            status__in=["SCHEDULED", "ACTIVE"], date_assigned__isnull=False
+        ).values_list("store_id", "date_assigned")
+    )
+    keys |= set(
+        ScheduledDesign.objects.filter(recurring_task__isnull=True).values_list("store_id", "due_date")
+    )
+    DesignCoverage.objects.bulk_create(
+        [DesignCoverage(store_id=store_id, date=date) for store_id, date in keys], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('handoff', '0030_hot_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DesignCoverage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('store', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='design_coverage', to='handoff.store')),
+            ],
+            options={
+                'ordering': ['store', 'date'],
+                'constraints': [models.UniqueConstraint(fields=('store', 'date'), name='unique_design_coverage_store_date')],
+            },
+        ),
+        migrations.RunPython(populate_coverage, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-19 08:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('handoff', '0032_scheduleddesign_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='designfile',
+            index=models.Index(fields=['status', 'store', 'id'], name='handoff_design_recycle_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='designhistory',
+            index=models.Index(fields=['original_drive_file_id', 'posted_date'], name='handoff_history_drive_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scheduleddesign',
+            index=models.Index(fields=['drive_design_file_id'], name='handoff_sched_drive_id_idx'),
+        ),
+    ]
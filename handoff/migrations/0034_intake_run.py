@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-19 09:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('handoff', '0033_recycle_candidate_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IntakeRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.CharField(max_length=32, unique=True)),
+                ('active', models.BooleanField(default=True, null=True, unique=True)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('done', 'Done'), ('error', 'Error')], default='running', max_length=20)),
+                ('store_ids', models.JSONField(blank=True, default=list)),
+                ('store_labels', models.JSONField(blank=True, default=list)),
+                ('stores_total', models.PositiveIntegerField(default=0)),
+                ('stores_done', models.PositiveIntegerField(default=0)),
+                ('files_done', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('summary', models.JSONField(blank=True, default=dict)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-19 09:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('handoff', '0034_intake_run'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='designfile',
+            name='recycled_from',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recycles', to='handoff.designfile'),
+        ),
+    ]
@@ -1,4 +1,6 @@
+import hashlib
 import io
+import json
 
 
 def _get_image_module():
@@ -10,7 +12,7 @@ def _get_image_module():
         ) from exc
     return Image
 
-from .drive import download_file_bytes, upload_mockup_bytes
+from .drive import download_file_bytes, mockup_drive_name, upload_mockup_bytes
 
 
 def _open_rgba(data: bytes):
@@ -99,13 +101,59 @@ def render_mockup(
     return output.getvalue()
 
 
+def download_design_bytes(file_id: str) -> tuple[str, str, bytes]:
+    name, mime_type, data = download_file_bytes(file_id)
+    converted_name, data = convert_svg_bytes(name, mime_type, data)
+    if converted_name != name or mime_type == "image/svg+xml":
+        mime_type = "image/png"
+    return converted_name, mime_type, data
+
+
+def template_asset_ids(template) -> list[str]:
+    return [
+        file_id
+        for file_id in (
+            template.background_drive_file_id,
+            template.overlay_drive_file_id,
+            template.mask_drive_file_id,
+        )
+        if file_id
+    ]
+
+
+def mockup_fingerprint(design_file_id: str, template, checksums: dict[str, str]) -> str:
+    asset_ids = [design_file_id] + template_asset_ids(template)
+    payload = {
+        "design": design_file_id,
+        "label": template.label or f"mockup-{template.order}",
+        "background": template.background_drive_file_id,
+        "overlay": template.overlay_drive_file_id,
+        "mask": template.mask_drive_file_id,
+        "overlay_position": template.overlay_position,
+        "design_box": [
+            template.design_x,
+            template.design_y,
+            template.design_width,
+            template.design_height,
+        ],
+        "design_boxes": [
+            [box.x, box.y, box.width, box.height, box.rotation]
+            for box in template.design_boxes.all()
+        ],
+        "checksums": [checksums.get(file_id, "") for file_id in asset_ids],
+    }
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
 def generate_mockup_for_template(task, template):
-    design_name, design_mime, design_bytes = download_file_bytes(task.drive_design_file_id)
-    _, design_bytes = convert_svg_bytes(design_name, design_mime, design_bytes)
+    design_name, design_mime, design_bytes = download_design_bytes(task.drive_design_file_id)
     png_bytes, filename = generate_mockup_bytes_for_template(
         template, design_name, design_mime, design_bytes
     )
-    file_id = upload_mockup_bytes(png_bytes, filename, due_date=task.due_date)
+    file_id = upload_mockup_bytes(
+        png_bytes, mockup_drive_name(task.id, template.order, filename), due_date=task.due_date
+    )
     return file_id, filename
 
 
@@ -8,7 +8,13 @@ from uuid import uuid4
 
 from django.db import close_old_connections
 
-from .mockup_generator import generate_mockup_for_template
+from .drive import get_file_checksums, mockup_drive_name, upload_mockup_bytes
+from .mockup_generator import (
+    download_design_bytes,
+    generate_mockup_bytes_for_template,
+    mockup_fingerprint,
+    template_asset_ids,
+)
 from .models import AppSettings, Attachment, MockupSlot, Task
 
 
@@ -23,9 +29,30 @@ class MockupJob:
     done: int = 0
     status: str = "running"
     error: str = ""
+    slot_errors: dict[int, str] = field(default_factory=dict)
     updated_at: float = field(default_factory=time.time)
 
 
+@dataclass
+class MockupGenerationResult:
+    total: int = 0
+    generated: int = 0
+    skipped: int = 0
+    errors: dict[int, str] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def error_summary(self) -> str:
+        if not self.errors:
+            return ""
+        details = "; ".join(
+            f"slot {order}: {message}" for order, message in sorted(self.errors.items())
+        )
+        return f"{len(self.errors)} of {self.total} mockup(s) failed ({details})"
+
+
 _mockup_jobs: dict[str, MockupJob] = {}
 _mockup_jobs_lock = Lock()
 
@@ -61,6 +88,7 @@ def get_mockup_job(job_id: str) -> Optional[MockupJob]:
             done=job.done,
             status=job.status,
             error=job.error,
+            slot_errors=dict(job.slot_errors),
             updated_at=job.updated_at,
         )
 
@@ -78,8 +106,16 @@ def start_mockup_generation_job(task_id: int) -> str:
             def progress_cb(done: int, total: int) -> None:
                 _update_job(job_id, done=done, total=total, status="running")
 
-            run_mockup_generation(task, progress_cb=progress_cb)
-            _update_job(job_id, status="done")
+            result = run_mockup_generation(task, progress_cb=progress_cb)
+            if result.ok:
+                _update_job(job_id, status="done")
+            else:
+                _update_job(
+                    job_id,
+                    status="error",
+                    error=result.error_summary(),
+                    slot_errors=result.errors,
+                )
         except Exception as exc:
             _update_job(job_id, status="error", error=str(exc))
         finally:
@@ -89,42 +125,92 @@ def start_mockup_generation_job(task_id: int) -> str:
     return job_id
 
 
-def run_mockup_generation(task: Task, progress_cb: ProgressCallback | None = None) -> int:
+def run_mockup_generation(
+    task: Task,
+    progress_cb: ProgressCallback | None = None,
+    force: bool = False,
+) -> MockupGenerationResult:
+    result = MockupGenerationResult()
     if not task.template or not task.template.mockup_templates.exists():
-        return 0
+        return result
     if not task.drive_design_file_id:
-        return 0
+        return result
 
-    templates = task.template.mockup_templates.all().order_by("order")
-    total = templates.count()
-    slot_count = max(6, templates.count())
-    task.ensure_mockup_slots(slot_count)
+    templates = list(
+        task.template.mockup_templates.prefetch_related("design_boxes").order_by("order")
+    )
+    result.total = len(templates)
+    task.ensure_mockup_slots(max(6, result.total))
+    slots_by_order = {slot.order: slot for slot in task.mockup_slots.all()}
 
-    generated = 0
+    asset_ids = [task.drive_design_file_id]
     for tmpl in templates:
-        file_id, filename = generate_mockup_for_template(task, tmpl)
-        slot, _ = MockupSlot.objects.get_or_create(
-            task=task, order=tmpl.order, defaults={"label": tmpl.label}
-        )
-        slot.drive_file_id = file_id
-        slot.filename = filename
-        if tmpl.label and not slot.label:
-            slot.label = tmpl.label
-        slot.save(update_fields=["drive_file_id", "filename", "label", "updated_at"])
-        Attachment.objects.create(
-            task=task,
-            kind=Attachment.KIND_MOCKUP,
-            drive_file_id=file_id,
-            filename=filename,
-        )
-        generated += 1
+        asset_ids.extend(template_asset_ids(tmpl))
+    try:
+        checksums = get_file_checksums(asset_ids)
+    except Exception:
+        # Without checksums every slot looks stale; render rather than fail.
+        checksums = {}
+
+    design = None
+    for position, tmpl in enumerate(templates, start=1):
+        slot = slots_by_order.get(tmpl.order)
+        if slot is None:
+            slot = MockupSlot.objects.create(task=task, order=tmpl.order, label=tmpl.label)
+            slots_by_order[tmpl.order] = slot
+        fingerprint = mockup_fingerprint(task.drive_design_file_id, tmpl, checksums)
+        if not force and slot.drive_file_id and slot.render_fingerprint == fingerprint:
+            result.skipped += 1
+        else:
+            try:
+                if design is None:
+                    design = download_design_bytes(task.drive_design_file_id)
+                png_bytes, filename = generate_mockup_bytes_for_template(tmpl, *design)
+                file_id = upload_mockup_bytes(
+                    png_bytes,
+                    mockup_drive_name(task.id, slot.order, filename),
+                    due_date=task.due_date,
+                    file_id=slot.drive_file_id,
+                )
+            except Exception as exc:
+                result.errors[tmpl.order] = str(exc)
+                slot.render_error = str(exc)
+                slot.save(update_fields=["render_error", "updated_at"])
+            else:
+                previous_file_id = slot.drive_file_id
+                slot.drive_file_id = file_id
+                slot.filename = filename
+                slot.render_fingerprint = fingerprint
+                slot.render_error = ""
+                if tmpl.label and not slot.label:
+                    slot.label = tmpl.label
+                slot.save(
+                    update_fields=[
+                        "drive_file_id",
+                        "filename",
+                        "label",
+                        "render_fingerprint",
+                        "render_error",
+                        "updated_at",
+                    ]
+                )
+                if file_id != previous_file_id:
+                    # Uploads update same-named files in place, so only new ids need a record.
+                    Attachment.objects.create(
+                        task=task,
+                        kind=Attachment.KIND_MOCKUP,
+                        drive_file_id=file_id,
+                        filename=filename,
+                    )
+                result.generated += 1
         if progress_cb:
-            progress_cb(generated, total)
+            progress_cb(position, result.total)
 
-    task.mockups_generated_design_id = task.drive_design_file_id
-    task.save(update_fields=["mockups_generated_design_id", "updated_at"])
+    if result.ok and task.mockups_generated_design_id != task.drive_design_file_id:
+        task.mockups_generated_design_id = task.drive_design_file_id
+        task.save(update_fields=["mockups_generated_design_id", "updated_at"])
     task.refresh_status()
-    return generated
+    return result
 
 
 def maybe_autogenerate_mockups(task: Task) -> tuple[int, Optional[str]]:
@@ -138,7 +224,7 @@ def maybe_autogenerate_mockups(task: Task) -> tuple[int, Optional[str]]:
     if task.mockups_generated_design_id == task.drive_design_file_id:
         return 0, None
     try:
-        generated = run_mockup_generation(task)
-        return generated, None
+        result = run_mockup_generation(task)
     except Exception as exc:
         return 0, str(exc)
+    return result.generated, result.error_summary() or None
@@ -1,4 +1,7 @@
+from datetime import timedelta
+
 from django.db import models
+from django.db.models import Exists, OuterRef
 import re
 from django.conf import settings
 
@@ -56,7 +59,60 @@ def extract_drive_id(value: str) -> str:
     return value
 
 
-class Task(models.Model):
+class TrackedFieldsMixin:
+    """Snapshot ``tracked_fields`` as loaded/saved so save hooks can detect
+    transitions without re-reading the row."""
+
+    tracked_fields: tuple[str, ...] = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked()
+        return instance
+
+    def _snapshot_tracked(self, fields=None) -> None:
+        snapshot = self.__dict__.setdefault("_tracked_snapshot", {})
+        for name in self.tracked_fields:
+            if fields is not None and name not in fields:
+                continue
+            if name in self.__dict__:
+                snapshot[name] = self.__dict__[name]
+
+    def previous_value(self, name: str):
+        """Value of ``name`` when last loaded or saved; None for unsaved rows."""
+        if self._state.adding:
+            return None
+        snapshot = self.__dict__.get("_tracked_snapshot", {})
+        if name in snapshot:
+            return snapshot[name]
+        # Field was deferred at load time; fall back to the database.
+        return type(self)._base_manager.filter(pk=self.pk).values_list(name, flat=True).first()
+
+    def has_changed(self, name: str) -> bool:
+        return self._state.adding or self.previous_value(name) != getattr(self, name)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._snapshot_tracked(kwargs.get("update_fields"))
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._snapshot_tracked()
+
+
+class TaskQuerySet(models.QuerySet):
+    def with_progress(self):
+        """Annotate step counts so progress reads don't query per task."""
+        return self.annotate(
+            step_total=models.Count("steps", distinct=True),
+            step_done=models.Count(
+                "steps", filter=models.Q(steps__done=True), distinct=True
+            ),
+        )
+
+
+class Task(TrackedFieldsMixin, models.Model):
     STATUS_NEW = "NEW"
     STATUS_IN_PROGRESS = "IN_PROGRESS"
     STATUS_DONE = "DONE"
@@ -96,16 +152,36 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TaskQuerySet.as_manager()
+
+    tracked_fields = ("status",)
+
     def __str__(self) -> str:
         return f"{self.title} ({self.due_date})"
 
+    def _step_counts(self) -> tuple[int, int]:
+        if "step_total" in self.__dict__:
+            return self.step_total, self.step_done
+        prefetched = getattr(self, "_prefetched_objects_cache", {}).get("steps")
+        if prefetched is not None:
+            return len(prefetched), sum(1 for step in prefetched if step.done)
+        return self._load_step_counts()
+
+    def _load_step_counts(self) -> tuple[int, int]:
+        counts = self.steps.aggregate(
+            total=models.Count("id"),
+            done=models.Count("id", filter=models.Q(done=True)),
+        )
+        self.step_total, self.step_done = counts["total"], counts["done"]
+        return self.step_total, self.step_done
+
     @property
     def total_steps(self) -> int:
-        return self.steps.count()
+        return self._step_counts()[0]
 
     @property
     def done_steps(self) -> int:
-        return self.steps.filter(done=True).count()
+        return self._step_counts()[1]
 
     @property
     def progress_text(self) -> str:
@@ -113,21 +189,27 @@ class Task(models.Model):
 
     @property
     def all_steps_done(self) -> bool:
-        total = self.total_steps
-        return total > 0 and self.done_steps == total
+        total, done = self._step_counts()
+        return total > 0 and done == total
 
-    def refresh_status(self) -> None:
+    def refresh_status(self) -> bool:
+        """Recompute status from steps/manual_done; only writes when it changes."""
         if self.manual_done:
-            self.status = Task.STATUS_DONE
-            self.save(update_fields=["status", "updated_at"])
-            return
-        if self.all_steps_done:
-            self.status = Task.STATUS_DONE
-        elif self.done_steps > 0:
-            self.status = Task.STATUS_IN_PROGRESS
+            status = Task.STATUS_DONE
         else:
-            self.status = Task.STATUS_NEW
+            # Steps may have just changed; recount instead of trusting cached counts.
+            total, done = self._load_step_counts()
+            if total > 0 and done == total:
+                status = Task.STATUS_DONE
+            elif done > 0:
+                status = Task.STATUS_IN_PROGRESS
+            else:
+                status = Task.STATUS_NEW
+        if status == self.status:
+            return False
+        self.status = status
         self.save(update_fields=["status", "updated_at"])
+        return True
 
     def seed_steps_from_template(self) -> int:
         if not self.template or not self.template.default_steps:
@@ -151,11 +233,7 @@ class Task(models.Model):
         return len(created)
 
     def save(self, *args, **kwargs):
-        previous_status = None
-        if self.pk:
-            previous_status = (
-                Task.objects.filter(pk=self.pk).values_list("status", flat=True).first()
-            )
+        previous_status = self.previous_value("status")
         if self.drive_design_file_id:
             self.drive_design_file_id = extract_drive_id(self.drive_design_file_id)
         if self.drive_mockup_folder_id:
@@ -170,7 +248,7 @@ class Task(models.Model):
         drive_id = (self.drive_design_file_id or "").strip()
         if not drive_id:
             return
-        design = DesignFile.objects.filter(drive_file_id=drive_id).first()
+        design = DesignFile.objects.filter(drive_file_id=drive_id).select_related("recycled_from").first()
         store = design.store if design else None
         if not store:
             listed = (
@@ -207,16 +285,20 @@ class Task(models.Model):
                 updates.append("store")
             if updates:
                 design.save(update_fields=updates + ["updated_at"])
+        # A recycled copy's post is logged under the original design, which
+        # is what the recycle cooldown looks up.
+        source = design.recycled_from if design and design.recycled_from_id else None
+        history_drive_id = source.drive_file_id if source else drive_id
         exists = DesignHistory.objects.filter(
-            posted_date=self.due_date, original_drive_file_id=drive_id
+            posted_date=self.due_date, original_drive_file_id=history_drive_id
         ).exists()
         if not exists:
             DesignHistory.objects.create(
-                design_file=design,
+                design_file=source or design,
                 posted_date=self.due_date,
-                original_drive_file_id=drive_id,
+                original_drive_file_id=history_drive_id,
                 store=store,
-                notes=f"Task {self.id} marked done.",
+                notes=f"Task {self.id} marked done." + (f" Posted as recycled copy {drive_id}." if source else ""),
             )
         try:
             from .drive import archive_design_file
@@ -290,6 +372,9 @@ class Task(models.Model):
                 name="unique_recurring_task_per_day",
             )
         ]
+        indexes = [
+            models.Index(fields=["due_date", "assigned_to"], name="handoff_task_due_assignee_idx"),
+        ]
 
 
 class TaskStep(models.Model):
@@ -328,6 +413,13 @@ class Attachment(models.Model):
     filename = models.CharField(max_length=255, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["task", "kind", "created_at"], name="handoff_attach_task_kind_idx"
+            ),
+        ]
+
     def __str__(self) -> str:
         return f"{self.kind} - {self.filename or self.drive_file_id}"
 
@@ -389,7 +481,7 @@ class StoreMembership(models.Model):
         return f"{self.user} -> {self.store}"
 
 
-class TaskPublication(models.Model):
+class TaskPublication(TrackedFieldsMixin, models.Model):
     STATUS_QUEUED = "QUEUED"
     STATUS_LISTED = "LISTED"
 
@@ -410,6 +502,8 @@ class TaskPublication(models.Model):
     listed_at = models.DateTimeField(null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    tracked_fields = ("status",)
+
     class Meta:
         ordering = ["store__order", "store__name", "id"]
         constraints = [
@@ -422,7 +516,9 @@ class TaskPublication(models.Model):
     def __str__(self) -> str:
         return f"{self.task} -> {self.store} ({self.status})"
 
-    def mark_listed_if_needed(self, was_listed: bool) -> None:
+    def mark_listed_if_needed(self, was_listed: bool | None = None) -> None:
+        if was_listed is None:
+            was_listed = self.previous_value("status") == self.STATUS_LISTED
         if self.status == self.STATUS_LISTED and not was_listed:
             self.listed_at = timezone.now()
 
@@ -433,10 +529,19 @@ class MockupSlot(models.Model):
     label = models.CharField(max_length=200, blank=True)
     drive_file_id = models.CharField(max_length=200, blank=True)
     filename = models.CharField(max_length=255, blank=True)
+    render_fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="Hash of the design, template config and asset checksums last rendered.",
+    )
+    render_error = models.TextField(blank=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["order", "id"]
+        indexes = [
+            models.Index(fields=["task", "order"], name="handoff_slot_task_order_idx"),
+        ]
 
     def save(self, *args, **kwargs):
         if self.drive_file_id:
@@ -505,7 +610,7 @@ class MockupDesignBox(models.Model):
         return f"Box {self.order}"
 
 
-class ScheduledDesign(models.Model):
+class ScheduledDesign(TrackedFieldsMixin, models.Model):
     due_date = models.DateField()
     recurring_task = models.ForeignKey(
         "RecurringTask", on_delete=models.CASCADE, null=True, blank=True
@@ -515,6 +620,9 @@ class ScheduledDesign(models.Model):
         "Store", on_delete=models.SET_NULL, null=True, blank=True, related_name="scheduled_designs"
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    tracked_fields = ("due_date", "store_id", "recurring_task_id")
 
     def save(self, *args, **kwargs):
         if self.drive_design_file_id:
@@ -533,9 +641,15 @@ class ScheduledDesign(models.Model):
                 name="unique_scheduled_design_per_day_task_store",
             )
         ]
+        # (due_date, recurring_task, store) lookups use the unique constraint's
+        # index; this one serves per-store date ranges (calendars, runway).
+        indexes = [
+            models.Index(fields=["store", "due_date"], name="handoff_sched_store_due_idx"),
+            models.Index(fields=["drive_design_file_id"], name="handoff_sched_drive_id_idx"),
+        ]
 
 
-class DesignFile(models.Model):
+class DesignFile(TrackedFieldsMixin, models.Model):
     STATUS_DUMPED = "DUMPED"
     STATUS_SCHEDULED = "SCHEDULED"
     STATUS_ACTIVE = "ACTIVE"
@@ -562,13 +676,52 @@ class DesignFile(models.Model):
     size_mb = models.DecimalField(max_digits=6, decimal_places=2, default=0)
     ext = models.CharField(max_length=10, blank=True)
     source_folder = models.CharField(max_length=50, blank=True)
+    # Set on emergency copies; their posts count against the original's history.
+    recycled_from = models.ForeignKey(
+        "self", on_delete=models.SET_NULL, null=True, blank=True, related_name="recycles"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    tracked_fields = ("status", "date_assigned", "store_id", "drive_file_id")
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "date_assigned", "store"],
+                name="handoff_design_status_date_idx",
+            ),
+            models.Index(fields=["drive_file_id"], name="handoff_design_drive_id_idx"),
+            # Random probes over recycle candidates (status, store, pk >= n).
+            models.Index(fields=["status", "store", "id"], name="handoff_design_recycle_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"{self.filename} ({self.status})"
 
 
+class DesignCoverage(models.Model):
+    """One row per (store, date) that has a design lined up.
+
+    Maintained from DesignFile/ScheduledDesign changes by handoff.runway; a
+    null store means a design not tied to any store.
+    """
+
+    store = models.ForeignKey(
+        "Store", on_delete=models.CASCADE, null=True, blank=True, related_name="design_coverage"
+    )
+    date = models.DateField()
+
+    class Meta:
+        ordering = ["store", "date"]
+        constraints = [
+            models.UniqueConstraint(fields=["store", "date"], name="unique_design_coverage_store_date"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.store or 'Any store'} - {self.date}"
+
+
 class DesignHistory(models.Model):
     design_file = models.ForeignKey(
         DesignFile, on_delete=models.SET_NULL, null=True, blank=True, related_name="history"
@@ -581,6 +734,18 @@ class DesignHistory(models.Model):
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["posted_date", "original_drive_file_id"],
+                name="handoff_history_posted_idx",
+            ),
+            models.Index(
+                fields=["original_drive_file_id", "posted_date"],
+                name="handoff_history_drive_id_idx",
+            ),
+        ]
+
     def __str__(self) -> str:
         return f"{self.design_file or 'Design'} - {self.posted_date}"
 
@@ -714,6 +879,51 @@ class AdminNoteImage(models.Model):
         return self.filename or self.drive_file_id
 
 
+class DailyRollover(models.Model):
+    date = models.DateField(unique=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    summary = models.JSONField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["-date"]
+
+    def __str__(self) -> str:
+        return f"Rollover {self.date}"
+
+
+class IntakeRun(models.Model):
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_ERROR = "error"
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_ERROR, "Error"),
+    ]
+
+    job_id = models.CharField(max_length=32, unique=True)
+    # True while the run holds the intake claim, NULL after; unique, so a
+    # second run can't be inserted while one is active on any server process.
+    active = models.BooleanField(null=True, unique=True, default=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    store_ids = models.JSONField(default=list, blank=True)
+    store_labels = models.JSONField(default=list, blank=True)
+    stores_total = models.PositiveIntegerField(default=0)
+    stores_done = models.PositiveIntegerField(default=0)
+    files_done = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    summary = models.JSONField(default=dict, blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+
+    def __str__(self) -> str:
+        return f"Intake {self.started_at:%Y-%m-%d %H:%M} ({self.status})"
+
+
 class RecurringTask(models.Model):
     title = models.CharField(max_length=200)
     assigned_to = models.CharField(max_length=100, default="Dad")
@@ -780,12 +990,81 @@ class RecurringTask(models.Model):
 
     @classmethod
     def generate_for_date(cls, due_date, assignee: str | None = None) -> int:
-        queryset = cls.objects.filter(active=True, start_date__lte=due_date)
+        return cls.generate_for_dates([due_date], assignee=assignee)
+
+    @classmethod
+    def generate_for_horizon(cls, start_date, days: int, assignee: str | None = None) -> int:
+        return cls.generate_for_dates(
+            [start_date + timedelta(days=offset) for offset in range(max(0, days))],
+            assignee=assignee,
+        )
+
+    @classmethod
+    def generate_for_dates(cls, dates, assignee: str | None = None) -> int:
+        """Create missing recurring tasks for ``dates`` in a fixed number of queries.
+
+        Same result as create_task_for_date per (recurring task, date), but
+        with one existence query and bulk inserts for tasks, steps and
+        publications. The per-day unique constraint keeps a concurrent run
+        from inserting the same task twice, and steps are only seeded for
+        tasks that have none yet.
+        """
+        dates = sorted(set(dates))
+        if not dates:
+            return 0
+        queryset = cls.objects.filter(active=True, start_date__lte=dates[-1]).select_related("template")
         if assignee:
             queryset = queryset.filter(assigned_to=assignee)
-        created_count = 0
-        for recurring in queryset:
-            _, created = recurring.create_task_for_date(due_date)
-            if created:
-                created_count += 1
-        return created_count
+        recurring_tasks = list(queryset)
+        if not recurring_tasks:
+            return 0
+
+        existing_filter = {"recurring_task__in": recurring_tasks, "due_date__in": dates}
+        existing = set(
+            Task.objects.filter(**existing_filter).values_list("recurring_task_id", "due_date")
+        )
+        to_create = [
+            Task(
+                recurring_task=recurring,
+                due_date=due_date,
+                title=recurring.title,
+                assigned_to=recurring.assigned_to,
+                notes=recurring.notes,
+                drive_design_file_id=recurring.drive_design_file_id,
+                video_url=recurring.video_url,
+                template=recurring.template,
+            )
+            for recurring in recurring_tasks
+            for due_date in dates
+            if due_date >= recurring.start_date and (recurring.id, due_date) not in existing
+        ]
+        if not to_create:
+            return 0
+        Task.objects.bulk_create(to_create, batch_size=500, ignore_conflicts=True)
+
+        # ignore_conflicts leaves pks unset; read back the wanted tasks. A
+        # concurrent run may have inserted (and seeded) some of them already.
+        wanted = {(task.recurring_task_id, task.due_date) for task in to_create}
+        created = [
+            task
+            for task in Task.objects.filter(**existing_filter)
+            .exclude(Exists(TaskStep.objects.filter(task=OuterRef("pk"))))
+            .only("id", "recurring_task_id", "due_date")
+            if (task.recurring_task_id, task.due_date) in wanted
+        ]
+        steps_by_recurring = {recurring.id: recurring.step_list() for recurring in recurring_tasks}
+        stores = list(Store.objects.filter(active=True).order_by("order", "name"))
+        TaskStep.objects.bulk_create(
+            [
+                TaskStep(task=task, order=idx + 1, text=text)
+                for task in created
+                for idx, text in enumerate(steps_by_recurring[task.recurring_task_id])
+            ],
+            batch_size=500,
+        )
+        TaskPublication.objects.bulk_create(
+            [TaskPublication(task=task, store=store) for task in created for store in stores],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+        return len(created)
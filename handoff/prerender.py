@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import datetime as dt
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .ai import generate_etsy_tags
+from .etsy import validate_tags
+from .mockup_service import run_mockup_generation
+from .models import RecurringTask, ScheduledDesign, Store, Task
+from .schedule_sync import ScheduledDesignLookup, apply_scheduled_design
+
+
+LogCallback = Callable[[str], None]
+
+
+@dataclass
+class PrerenderSummary:
+    dates: int = 0
+    tasks_created: int = 0
+    tasks_seen: int = 0
+    designs_applied: int = 0
+    mockups_rendered: int = 0
+    mockups_skipped: int = 0
+    tags_generated: int = 0
+    errors: list[str] = field(default_factory=list)
+    stopped_early: bool = False
+
+
+def parse_hour_window(value: str) -> tuple[int, int] | None:
+    value = (value or "").strip()
+    if not value:
+        return None
+    start, end = [int(part) for part in value.split("-", 1)]
+    if not (0 <= start <= 23 and 0 <= end <= 24):
+        raise ValueError(f"Invalid hour window: {value}")
+    return start, end
+
+
+def in_hour_window(window: tuple[int, int] | None, now: dt.datetime | None = None) -> bool:
+    if window is None:
+        return True
+    hour = (now or timezone.localtime()).hour
+    start, end = window
+    if start <= end:
+        return start <= hour < end
+    # Window wraps midnight, e.g. 22-5.
+    return hour >= start or hour < end
+
+
+def _maybe_generate_tags(task: Task) -> bool:
+    if task.etsy_tags:
+        return False
+    title = (task.etsy_title or task.title).strip()
+    product_hint = task.template.etsy_title_suffix if task.template_id else ""
+    result = generate_etsy_tags(
+        title=title,
+        description=task.etsy_description or "",
+        product_hint=product_hint,
+    )
+    validation = validate_tags(result.tags)
+    if not validation.ok:
+        raise RuntimeError("Generated tags failed validation.")
+    task.etsy_tags = validation.tags
+    task.save(update_fields=["etsy_tags", "updated_at"])
+    return True
+
+
+def prerender_upcoming(
+    days: int = 7,
+    stores: list[Store] | None = None,
+    start_date: dt.date | None = None,
+    throttle_seconds: float = 0,
+    hour_window: tuple[int, int] | None = None,
+    with_mockups: bool = True,
+    with_tags: bool = True,
+    log: LogCallback | None = None,
+) -> PrerenderSummary:
+    summary = PrerenderSummary()
+    log = log or (lambda message: None)
+    start_date = start_date or timezone.localdate()
+    end_date = start_date + dt.timedelta(days=max(0, days - 1))
+    if stores is None:
+        stores = list(Store.objects.filter(active=True).order_by("order", "name"))
+
+    scheduled_qs = ScheduledDesign.objects.filter(
+        due_date__gte=start_date, due_date__lte=end_date
+    )
+    if stores:
+        scheduled_qs = scheduled_qs.filter(Q(store__in=stores) | Q(store__isnull=True))
+    dates = sorted(set(scheduled_qs.values_list("due_date", flat=True)))
+    summary.dates = len(dates)
+
+    lookup = ScheduledDesignLookup.load(dates, stores)
+    tags_available = with_tags
+    summary.tasks_created = RecurringTask.generate_for_dates(dates)
+    for due_date in dates:
+        tasks = (
+            Task.objects.filter(due_date=due_date)
+            .select_related("template")
+            .order_by("title", "id")
+        )
+        for task in tasks:
+            if not in_hour_window(hour_window):
+                summary.stopped_early = True
+                log("Off-peak window closed; stopping.")
+                return summary
+            summary.tasks_seen += 1
+            scheduled = lookup.resolve(task, due_date, stores)
+            if apply_scheduled_design(task, scheduled):
+                summary.designs_applied += 1
+            if with_mockups and task.drive_design_file_id:
+                try:
+                    result = run_mockup_generation(task)
+                    summary.mockups_rendered += result.generated
+                    summary.mockups_skipped += result.skipped
+                    if result.errors:
+                        summary.errors.append(f"{task}: {result.error_summary()}")
+                except Exception as exc:
+                    summary.errors.append(f"{task}: mockups failed: {exc}")
+            if tags_available:
+                try:
+                    if _maybe_generate_tags(task):
+                        summary.tags_generated += 1
+                except RuntimeError as exc:
+                    if "OPENAI_API_KEY" in str(exc):
+                        tags_available = False
+                        log("OPENAI_API_KEY is not set; skipping tag generation.")
+                    else:
+                        summary.errors.append(f"{task}: tags failed: {exc}")
+                except Exception as exc:
+                    summary.errors.append(f"{task}: tags failed: {exc}")
+            log(f"Prepared {task}")
+            if throttle_seconds:
+                time.sleep(throttle_seconds)
+    return summary
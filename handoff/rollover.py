@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import datetime as dt
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .design_workflow import ensure_emergency_design
+from .models import DailyRollover, RecurringTask, ScheduledDesign, Store, Task
+from .runway import rebuild_coverage
+from .schedule_sync import (
+    ScheduledDesignLookup,
+    apply_scheduled_design,
+    backfill_scheduled_designs,
+)
+
+
+logger = logging.getLogger(__name__)
+
+SYNC_HORIZON_DAYS = 30
+# A claimed rollover that hasn't completed after this long is assumed dead
+# (crashed process) and may be claimed again.
+ROLLOVER_CLAIM_TIMEOUT = 15 * 60
+# The scheduler retries this often until the day's rollover has completed.
+ROLLOVER_RETRY_SECONDS = 5 * 60
+
+_scheduler_lock = threading.Lock()
+_scheduler_thread: threading.Thread | None = None
+
+
+@dataclass
+class RolloverSummary:
+    date: str = ""
+    scheduled_backfilled: int = 0
+    tasks_created: int = 0
+    recycled: list[str] = field(default_factory=list)
+    designs_applied: int = 0
+    errors: list[str] = field(default_factory=list)
+
+
+def run_daily_rollover(date_value: dt.date | None = None, force: bool = False) -> RolloverSummary | None:
+    """Do the once-a-day sync work for ``date_value``.
+
+    Returns ``None`` when the rollover already completed for that date, or
+    when another run has claimed it and is still in progress.
+    """
+    date_value = date_value or timezone.localdate()
+    marker = _claim_rollover(date_value, force)
+    if marker is None:
+        return None
+    try:
+        summary = _run_rollover(date_value)
+    except Exception:
+        # Release the claim so the next request or scheduler tick retries.
+        DailyRollover.objects.filter(pk=marker.pk, completed_at__isnull=True).update(
+            started_at=marker.started_at - dt.timedelta(seconds=ROLLOVER_CLAIM_TIMEOUT)
+        )
+        raise
+    marker.completed_at = timezone.now()
+    marker.summary = asdict(summary)
+    marker.save(update_fields=["completed_at", "summary"])
+    return summary
+
+
+def _claim_rollover(date_value: dt.date, force: bool) -> DailyRollover | None:
+    """Atomically claim the day's marker; ``None`` if it's done or held by another run.
+
+    A new marker row is claimed by creating it (the date is unique). An
+    existing one is taken over with a conditional UPDATE on ``started_at``,
+    so of two racing runs only one sees its update succeed.
+    """
+    marker, created = DailyRollover.objects.get_or_create(date=date_value)
+    if created:
+        return marker
+    if marker.completed_at and not force:
+        return None
+    now = timezone.now()
+    if not marker.completed_at and now - marker.started_at < dt.timedelta(seconds=ROLLOVER_CLAIM_TIMEOUT):
+        return None
+    claimed = DailyRollover.objects.filter(pk=marker.pk, started_at=marker.started_at).update(
+        started_at=now, completed_at=None
+    )
+    if not claimed:
+        return None
+    marker.started_at, marker.completed_at = now, None
+    return marker
+
+
+def _run_rollover(date_value: dt.date) -> RolloverSummary:
+    summary = RolloverSummary(date=date_value.isoformat())
+    stores = list(Store.objects.filter(active=True).order_by("order", "name"))
+
+    summary.scheduled_backfilled = backfill_scheduled_designs(
+        date_from=date_value,
+        date_to=date_value + dt.timedelta(days=SYNC_HORIZON_DAYS),
+    )
+    summary.tasks_created = RecurringTask.generate_for_date(date_value)
+
+    for store in stores or [None]:
+        label = store.name if store else "default"
+        try:
+            if ensure_emergency_design(date_value, store=store):
+                summary.recycled.append(label)
+        except Exception as exc:
+            summary.errors.append(f"Emergency recycle failed ({label}): {exc}")
+
+    # Coverage is kept current by signals; the nightly rebuild catches
+    # writes that bypass them (queryset.update, raw SQL).
+    rebuild_coverage(date_from=date_value)
+
+    summary.designs_applied = apply_scheduled_designs(
+        date_value, Task.objects.filter(due_date=date_value), stores
+    )
+    return summary
+
+
+def apply_scheduled_designs(date_value: dt.date, tasks, stores=None) -> int:
+    """Copy each task's scheduled design for ``date_value`` onto the task."""
+    if stores is None:
+        stores = list(Store.objects.filter(active=True).order_by("order", "name"))
+    lookup = ScheduledDesignLookup.load([date_value], stores)
+    applied = 0
+    for task in tasks:
+        if apply_scheduled_design(task, lookup.resolve(task, date_value, stores)):
+            applied += 1
+    return applied
+
+
+def _rolled_over(date_value: dt.date) -> bool:
+    return DailyRollover.objects.filter(date=date_value, completed_at__isnull=False).exists()
+
+
+def sync_today_designs(dates, recurring_task_ids=None) -> int:
+    """Re-apply today's designs after schedule rows for today changed.
+
+    Before the day's rollover has finished there is nothing to do: the
+    rollover applies them itself. Costs no queries unless today is in ``dates``.
+    """
+    today = timezone.localdate()
+    if today not in set(dates) or not _rolled_over(today):
+        return 0
+    tasks = Task.objects.filter(due_date=today)
+    if recurring_task_ids is not None:
+        tasks = tasks.filter(recurring_task_id__in=recurring_task_ids)
+    return apply_scheduled_designs(today, tasks)
+
+
+def scheduled_design_synced(sender, instance: ScheduledDesign, raw: bool = False, **kwargs) -> None:
+    if raw:
+        return
+    dates = {instance.due_date}
+    recurring_task_ids = [instance.recurring_task_id] if instance.recurring_task_id else None
+    if not kwargs.get("created") and instance.pk:
+        if instance.has_changed("due_date"):
+            dates.add(instance.previous_value("due_date"))
+        if instance.has_changed("recurring_task_id"):
+            recurring_task_ids = None
+    sync_today_designs(dates, recurring_task_ids)
+
+
+def recurring_task_saved(sender, instance: RecurringTask, raw: bool = False, **kwargs) -> None:
+    """Create today's task for a recurring task added or re-activated after the rollover."""
+    if raw or not instance.active:
+        return
+    today = timezone.localdate()
+    if instance.start_date > today or not _rolled_over(today):
+        return
+    task, created = instance.create_task_for_date(today)
+    if created:
+        apply_scheduled_designs(today, [task])
+
+
+def completed_rollover(date_value: dt.date | None = None) -> DailyRollover | None:
+    """The day's finished marker, for read-only request paths."""
+    date_value = date_value or timezone.localdate()
+    return DailyRollover.objects.filter(date=date_value, completed_at__isnull=False).first()
+
+
+def ensure_daily_rollover(date_value: dt.date | None = None) -> RolloverSummary | None:
+    """Cheap guard for request paths: one indexed lookup once the day has rolled over."""
+    date_value = date_value or timezone.localdate()
+    if DailyRollover.objects.filter(date=date_value, completed_at__isnull=False).exists():
+        return None
+    return run_daily_rollover(date_value)
+
+
+def seconds_until_next_rollover(now: dt.datetime | None = None) -> float:
+    now = timezone.localtime(now)
+    next_midnight = timezone.make_aware(
+        dt.datetime.combine(now.date() + dt.timedelta(days=1), dt.time(0, 0, 5)),
+        now.tzinfo,
+    )
+    return max(1.0, (next_midnight - now).total_seconds())
+
+
+def run_rollover_forever() -> None:
+    while True:
+        close_old_connections()
+        delay = seconds_until_next_rollover()
+        try:
+            result = run_daily_rollover()
+            if result:
+                logger.info("Daily rollover for %s: %s", result.date, asdict(result))
+            elif not _rolled_over(timezone.localdate()):
+                # Another process holds the claim; make sure it finishes.
+                delay = min(delay, ROLLOVER_RETRY_SECONDS)
+        except Exception:
+            logger.exception("Daily rollover failed")
+            delay = min(delay, ROLLOVER_RETRY_SECONDS)
+        finally:
+            close_old_connections()
+        time.sleep(delay)
+
+
+def start_rollover_scheduler() -> threading.Thread:
+    global _scheduler_thread
+    with _scheduler_lock:
+        if _scheduler_thread is None or not _scheduler_thread.is_alive():
+            _scheduler_thread = threading.Thread(
+                target=run_rollover_forever, name="daily-rollover", daemon=True
+            )
+            _scheduler_thread.start()
+        return _scheduler_thread
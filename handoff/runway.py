@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import datetime as dt
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.signals import post_delete
+from django.utils import timezone
+
+from .models import DesignCoverage, DesignFile, ScheduledDesign, Store
+
+
+COVERING_DESIGN_STATUSES = [DesignFile.STATUS_SCHEDULED, DesignFile.STATUS_ACTIVE]
+
+CoverageKey = tuple[int | None, dt.date]
+
+
+@dataclass
+class RunwayForecast:
+    store_id: int | None
+    days_remaining: int
+    first_gap_date: dt.date
+    exhaustion_date: dt.date | None
+    scheduled_days: int
+    threshold: int
+
+    @property
+    def below_threshold(self) -> bool:
+        return self.days_remaining < self.threshold
+
+    def as_dict(self) -> dict:
+        return {
+            "days_remaining": self.days_remaining,
+            "first_gap_date": self.first_gap_date,
+            "exhaustion_date": self.exhaustion_date,
+            "scheduled_days": self.scheduled_days,
+            "threshold": self.threshold,
+            "below_threshold": self.below_threshold,
+        }
+
+
+def _covered_keys(dates=None, date_from: dt.date | None = None) -> set[CoverageKey]:
+    designs = DesignFile.objects.filter(
+        status__in=COVERING_DESIGN_STATUSES, date_assigned__isnull=False
+    )
+    scheduled = ScheduledDesign.objects.filter(recurring_task__isnull=True)
+    if dates is not None:
+        designs = designs.filter(date_assigned__in=dates)
+        scheduled = scheduled.filter(due_date__in=dates)
+    if date_from is not None:
+        designs = designs.filter(date_assigned__gte=date_from)
+        scheduled = scheduled.filter(due_date__gte=date_from)
+    return set(designs.values_list("store_id", "date_assigned")) | set(
+        scheduled.values_list("store_id", "due_date")
+    )
+
+
+def _sync_rows(wanted: set[CoverageKey], existing: set[CoverageKey]) -> None:
+    to_add = wanted - existing
+    to_remove = existing - wanted
+    if to_add:
+        DesignCoverage.objects.bulk_create(
+            [DesignCoverage(store_id=store_id, date=date) for store_id, date in to_add],
+            ignore_conflicts=True,
+        )
+    if to_remove:
+        condition = Q()
+        for store_id, date in to_remove:
+            store_filter = Q(store_id=store_id) if store_id is not None else Q(store__isnull=True)
+            condition |= store_filter & Q(date=date)
+        DesignCoverage.objects.filter(condition).delete()
+
+
+def refresh_coverage(keys) -> None:
+    """Recompute coverage for the given (store_id, date) keys only."""
+    keys = {(store_id, date) for store_id, date in keys if date is not None}
+    if not keys:
+        return
+    dates = {date for _, date in keys}
+    existing = set(
+        DesignCoverage.objects.filter(date__in=dates).order_by().values_list("store_id", "date")
+    )
+    _sync_rows(_covered_keys(dates=dates) & keys, existing & keys)
+
+
+def rebuild_coverage(date_from: dt.date | None = None) -> None:
+    existing = DesignCoverage.objects.order_by()
+    if date_from is not None:
+        existing = existing.filter(date__gte=date_from)
+    _sync_rows(
+        _covered_keys(date_from=date_from),
+        set(existing.values_list("store_id", "date")),
+    )
+
+
+def _changed_keys(instance, date_field: str, fields, **kwargs) -> set[CoverageKey]:
+    """Keys to refresh after a save/delete; empty when no relevant field moved."""
+    keys = {(instance.store_id, getattr(instance, date_field))}
+    if kwargs.get("signal") is post_delete or kwargs.get("created"):
+        return keys
+    if not any(instance.has_changed(name) for name in fields):
+        return set()
+    keys.add((instance.previous_value("store_id"), instance.previous_value(date_field)))
+    return keys
+
+
+def design_file_changed(sender, instance: DesignFile, **kwargs) -> None:
+    refresh_coverage(
+        _changed_keys(instance, "date_assigned", ("status", "date_assigned", "store_id"), **kwargs)
+    )
+
+
+def scheduled_design_changed(sender, instance: ScheduledDesign, **kwargs) -> None:
+    refresh_coverage(
+        _changed_keys(instance, "due_date", ("due_date", "store_id", "recurring_task_id"), **kwargs)
+    )
+
+
+def _forecast(store_id, dates: list[dt.date], today: dt.date, threshold: int) -> RunwayForecast:
+    covered = set(dates)
+    first_gap = today
+    while first_gap in covered:
+        first_gap += dt.timedelta(days=1)
+    return RunwayForecast(
+        store_id=store_id,
+        days_remaining=(first_gap - today).days,
+        first_gap_date=first_gap,
+        exhaustion_date=max(covered) if covered else None,
+        scheduled_days=len(covered),
+        threshold=threshold,
+    )
+
+
+def forecast_runway(stores=None, today: dt.date | None = None) -> dict[int | None, RunwayForecast]:
+    """Runway for each store plus ``None`` for all stores combined, in one query.
+
+    ``days_remaining`` counts consecutive covered days starting today, so a
+    gap ends the runway even if later dates are scheduled.
+    """
+    today = today or timezone.localdate()
+    threshold = int(getattr(settings, "DESIGN_RUNWAY_THRESHOLD", 5))
+    if stores is None:
+        stores = list(Store.objects.filter(active=True).order_by("order", "name"))
+    store_ids = [store.id for store in stores]
+    dates_by_store: dict[int | None, list[dt.date]] = {store_id: [] for store_id in store_ids}
+    all_dates: list[dt.date] = []
+    for store_id, date in (
+        DesignCoverage.objects.filter(date__gte=today)
+        .order_by("store_id", "date")
+        .values_list("store_id", "date")
+    ):
+        all_dates.append(date)
+        if store_id in dates_by_store:
+            dates_by_store[store_id].append(date)
+    forecasts = {
+        store_id: _forecast(store_id, dates, today, threshold)
+        for store_id, dates in dates_by_store.items()
+    }
+    forecasts[None] = _forecast(None, all_dates, today, threshold)
+    return forecasts
+
+
+def forecast_store_runway(store: Store | None = None, today: dt.date | None = None) -> RunwayForecast:
+    forecasts = forecast_runway(stores=[store] if store else [], today=today)
+    return forecasts[store.id if store else None]
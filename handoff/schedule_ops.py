@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import datetime as dt
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .calendar_cache import bump_calendar_versions
+from .context_processors import bump_context_cache
+from .models import DesignFile, RecurringTask, ScheduledDesign, Store, extract_drive_id
+from .rollover import sync_today_designs
+from .runway import refresh_coverage
+from .schedule_sync import SCHEDULABLE_DESIGN_STATUSES
+
+
+# Upper bounds on operations per batch, the span a shift may cover and how
+# far it may move it.
+MAX_OPERATIONS = 200
+MAX_SHIFT_SPAN_DAYS = 120
+MAX_SHIFT_DAYS = 366
+
+ScheduleKey = tuple[dt.date, int | None, int | None]  # (due_date, recurring_task_id, store_id)
+
+
+@dataclass
+class ScheduleBatchResult:
+    changed_dates: list[dt.date] = field(default_factory=list)
+    created: int = 0
+    updated: int = 0
+    deleted: int = 0
+    designs_redated: int = 0
+
+
+def _date(value, name: str) -> dt.date:
+    try:
+        return dt.date.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f"{name} must be YYYY-MM-DD.")
+
+
+def _optional_id(value, name: str) -> int | None:
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an id.")
+
+
+def _matcher(op: dict):
+    """Row filter for shift/swap: ``task``/``store`` only narrow when present."""
+    task_id = _optional_id(op.get("task"), "task") if "task" in op else ...
+    store_id = _optional_id(op.get("store"), "store") if "store" in op else ...
+
+    def matches(key: ScheduleKey) -> bool:
+        return (task_id is ... or key[1] == task_id) and (store_id is ... or key[2] == store_id)
+
+    return matches
+
+
+def _shift_delta(op: dict) -> dt.timedelta:
+    days = _optional_id(op.get("days"), "days") or 0
+    if abs(days) > MAX_SHIFT_DAYS:
+        raise ValueError(f"shift days must be within ±{MAX_SHIFT_DAYS}.")
+    return dt.timedelta(days=days)
+
+
+def _spans(op: dict) -> list[tuple[dt.date, dt.date]]:
+    kind = op.get("op")
+    if kind in ("assign", "remove"):
+        day = _date(op.get("date"), "date")
+        return [(day, day)]
+    if kind == "shift":
+        start, end = _date(op.get("start"), "start"), _date(op.get("end"), "end")
+        if end < start or (end - start).days > MAX_SHIFT_SPAN_DAYS:
+            raise ValueError(f"shift range must be 0-{MAX_SHIFT_SPAN_DAYS} days.")
+        delta = _shift_delta(op)
+        try:
+            return [(start, end), (start + delta, end + delta)]
+        except OverflowError:
+            raise ValueError("shift moves dates out of range.")
+    if kind == "swap":
+        first, second = _date(op.get("a"), "a"), _date(op.get("b"), "b")
+        return [(first, first), (second, second)]
+    raise ValueError(f"Unknown operation: {kind!r}.")
+
+
+def _apply(state: dict[ScheduleKey, str], op: dict) -> None:
+    kind = op["op"]
+    if kind in ("assign", "remove"):
+        key = (
+            _date(op["date"], "date"),
+            _optional_id(op.get("task"), "task"),
+            _optional_id(op.get("store"), "store"),
+        )
+        if kind == "remove":
+            state.pop(key, None)
+            return
+        design = extract_drive_id(str(op.get("design") or "").strip())
+        if not design:
+            raise ValueError("assign needs a design.")
+        state[key] = design
+        return
+
+    matches = _matcher(op)
+    if kind == "shift":
+        start, end = _date(op["start"], "start"), _date(op["end"], "end")
+        delta = _shift_delta(op)
+        moving = {key: value for key, value in state.items() if start <= key[0] <= end and matches(key)}
+        targets = {(key[0] + delta, key[1], key[2]): value for key, value in moving.items()}
+    else:
+        first, second = _date(op["a"], "a"), _date(op["b"], "b")
+        swap = {first: second, second: first}
+        moving = {key: value for key, value in state.items() if key[0] in swap and matches(key)}
+        targets = {(swap[key[0]], key[1], key[2]): value for key, value in moving.items()}
+
+    for key in moving:
+        del state[key]
+    blocked = sorted(key[0].isoformat() for key in targets if key in state)
+    if blocked:
+        raise ValueError(f"{kind} would overwrite schedules on {', '.join(blocked)}.")
+    state.update(targets)
+
+
+def _redate_designs(
+    before: dict[ScheduleKey, str], after: dict[ScheduleKey, str]
+) -> tuple[list[DesignFile], set[tuple[int | None, dt.date]]]:
+    """Move DesignFile.date_assigned along with the generic rows that show them.
+
+    Returns the changed designs and the (store, date) keys they left or joined.
+    """
+    generic_before = {(key[0], key[2]): value for key, value in before.items() if key[1] is None}
+    generic_after = {(key[0], key[2]): value for key, value in after.items() if key[1] is None}
+    placed: dict[tuple[int | None, str], dt.date] = {}
+    for (day, store_id), file_id in sorted(generic_after.items(), key=lambda item: item[0][0]):
+        placed.setdefault((store_id, file_id), day)
+    file_ids = set(generic_before.values()) | set(generic_after.values())
+    if not file_ids:
+        return [], set()
+
+    changed = []
+    keys = set()
+    now = timezone.now()
+    for design in DesignFile.objects.filter(
+        drive_file_id__in=file_ids, status__in=SCHEDULABLE_DESIGN_STATUSES
+    ):
+        new_date = placed.get((design.store_id, design.drive_file_id))
+        if new_date is None and generic_before.get((design.date_assigned, design.store_id)) != design.drive_file_id:
+            # Not shown by any row this batch touched; leave it alone.
+            continue
+        if new_date != design.date_assigned:
+            keys.update({(design.store_id, design.date_assigned), (design.store_id, new_date)})
+            design.date_assigned = new_date
+            design.updated_at = now
+            changed.append(design)
+    return changed, {key for key in keys if key[1] is not None}
+
+
+def _check_references(keys) -> None:
+    task_ids = {key[1] for key in keys if key[1] is not None}
+    store_ids = {key[2] for key in keys if key[2] is not None}
+    if task_ids - set(RecurringTask.objects.filter(pk__in=task_ids).values_list("pk", flat=True)):
+        raise ValueError("Unknown recurring task.")
+    if store_ids - set(Store.objects.filter(pk__in=store_ids).values_list("pk", flat=True)):
+        raise ValueError("Unknown store.")
+
+
+@transaction.atomic
+def apply_schedule_operations(operations: list[dict]) -> ScheduleBatchResult:
+    """Apply assign/remove/shift/swap operations as one transaction.
+
+    Operations run in order against an in-memory copy of the touched rows;
+    the net difference is then written with one delete, one bulk_create and
+    one bulk_update. Any invalid or conflicting operation raises ValueError
+    and nothing is written. Bulk writes skip model signals, so runway
+    coverage and the calendar/nav caches are refreshed here.
+    """
+    if not isinstance(operations, list) or not operations:
+        raise ValueError("operations must be a non-empty list.")
+    if len(operations) > MAX_OPERATIONS:
+        raise ValueError(f"At most {MAX_OPERATIONS} operations per batch.")
+    spans = []
+    for op in operations:
+        if not isinstance(op, dict):
+            raise ValueError("Each operation must be an object.")
+        spans.extend(_spans(op))
+
+    span_filter = Q()
+    for start, end in spans:
+        span_filter |= Q(due_date__gte=start, due_date__lte=end)
+    rows = {
+        (row.due_date, row.recurring_task_id, row.store_id): row
+        for row in ScheduledDesign.objects.select_for_update().filter(span_filter)
+    }
+    before = {key: row.drive_design_file_id for key, row in rows.items()}
+    after = dict(before)
+    for op in operations:
+        _apply(after, op)
+    _check_references(after.keys() - before.keys())
+
+    to_delete = [rows[key].pk for key in before if key not in after]
+    to_create = [
+        ScheduledDesign(due_date=key[0], recurring_task_id=key[1], store_id=key[2], drive_design_file_id=value)
+        for key, value in after.items()
+        if key not in before
+    ]
+    to_update = []
+    now = timezone.now()
+    for key, value in after.items():
+        if key in before and before[key] != value:
+            row = rows[key]
+            row.drive_design_file_id = value
+            row.updated_at = now
+            to_update.append(row)
+    designs, design_keys = _redate_designs(before, after)
+
+    if to_delete:
+        ScheduledDesign.objects.filter(pk__in=to_delete).delete()
+    if to_create:
+        ScheduledDesign.objects.bulk_create(to_create)
+    if to_update:
+        ScheduledDesign.objects.bulk_update(to_update, ["drive_design_file_id", "updated_at"])
+    if designs:
+        DesignFile.objects.bulk_update(designs, ["date_assigned", "updated_at"])
+
+    changed_keys = {key for key in before.keys() | after.keys() if before.get(key) != after.get(key)}
+    coverage_keys = {(key[2], key[0]) for key in changed_keys} | design_keys
+    if changed_keys or designs:
+        refresh_coverage(coverage_keys)
+        bump_calendar_versions(coverage_keys)
+        bump_context_cache()
+        sync_today_designs({key[0] for key in changed_keys})
+    return ScheduleBatchResult(
+        changed_dates=sorted({key[0] for key in changed_keys}),
+        created=len(to_create),
+        updated=len(to_update),
+        deleted=len(to_delete),
+        designs_redated=len(designs),
+    )
@@ -2,7 +2,12 @@ from __future__ import annotations
 
 import datetime as dt
 
-from .models import DesignFile, ScheduledDesign
+from django.db.models import Q
+
+from .calendar_cache import bump_calendar_versions
+from .context_processors import bump_context_cache
+from .runway import refresh_coverage
+from .models import Attachment, DesignFile, ScheduledDesign, Store, Task
 
 
 def backfill_scheduled_designs(
@@ -68,4 +73,138 @@ def backfill_scheduled_designs(
         return 0
 
     ScheduledDesign.objects.bulk_create(to_create, ignore_conflicts=True)
+    if to_create:
+        # bulk_create skips post_save, so refresh coverage and the caches directly.
+        keys = [(scheduled.store_id, scheduled.due_date) for scheduled in to_create]
+        refresh_coverage(keys)
+        bump_calendar_versions(keys)
+        bump_context_cache()
     return len(to_create)
+
+
+SCHEDULABLE_DESIGN_STATUSES = [DesignFile.STATUS_SCHEDULED, DesignFile.STATUS_ACTIVE]
+
+
+def _is_schedulable(status, date_assigned, drive_file_id) -> bool:
+    return status in SCHEDULABLE_DESIGN_STATUSES and bool(date_assigned) and bool(drive_file_id)
+
+
+def design_file_saved(sender, instance: DesignFile, created: bool = False, raw: bool = False, **kwargs) -> None:
+    """Keep the generic ScheduledDesign row in step with a DesignFile.
+
+    Mirrors backfill_scheduled_designs for a single design: a schedulable
+    design gets a row for its (date, store) unless one already exists. When
+    the design moves to another date or store, the row it left behind is
+    dropped if it still points at this file. Saves that don't touch the
+    schedule fields cost no queries.
+    """
+    if raw:
+        return
+    fields = ("status", "date_assigned", "store_id", "drive_file_id")
+    if not created and not any(instance.has_changed(name) for name in fields):
+        return
+
+    if not created:
+        old_key = (instance.previous_value("date_assigned"), instance.previous_value("store_id"))
+        old_file_id = instance.previous_value("drive_file_id")
+        if (
+            old_key != (instance.date_assigned, instance.store_id)
+            and _is_schedulable(instance.previous_value("status"), old_key[0], old_file_id)
+        ):
+            ScheduledDesign.objects.filter(
+                due_date=old_key[0],
+                recurring_task__isnull=True,
+                store_id=old_key[1],
+                drive_design_file_id=old_file_id,
+            ).delete()
+
+    if _is_schedulable(instance.status, instance.date_assigned, instance.drive_file_id):
+        ScheduledDesign.objects.get_or_create(
+            due_date=instance.date_assigned,
+            recurring_task=None,
+            store_id=instance.store_id,
+            defaults={"drive_design_file_id": instance.drive_file_id},
+        )
+
+
+def get_scheduled_design_for_task(task: Task, date, store: Store | None = None) -> ScheduledDesign | None:
+    scheduled = None
+    store_filter = {"store": store} if store else {"store__isnull": True}
+    if task.recurring_task_id:
+        scheduled = ScheduledDesign.objects.filter(
+            due_date=date, recurring_task=task.recurring_task, **store_filter
+        ).first()
+    if not scheduled:
+        scheduled = ScheduledDesign.objects.filter(
+            due_date=date, recurring_task__isnull=True, **store_filter
+        ).first()
+    return scheduled
+
+
+class ScheduledDesignLookup:
+    """In-memory index of ScheduledDesign rows for a set of dates and stores.
+
+    ``get`` follows the same precedence as ``get_scheduled_design_for_task``:
+    a row for the task's recurring task wins over a generic one.
+    """
+
+    def __init__(self, rows=()):
+        self._rows: dict[tuple[dt.date, int | None, int | None], ScheduledDesign] = {}
+        for row in rows:
+            key = (row.due_date, row.recurring_task_id, row.store_id)
+            self._rows.setdefault(key, row)
+
+    @classmethod
+    def load(cls, dates, stores=None) -> "ScheduledDesignLookup":
+        """One query for ``dates``; ``stores=None`` loads every store."""
+        dates = list(dates)
+        if not dates:
+            return cls()
+        queryset = ScheduledDesign.objects.filter(due_date__in=dates)
+        if stores is not None:
+            queryset = queryset.filter(Q(store__in=list(stores)) | Q(store__isnull=True))
+        return cls(queryset.select_related("store").order_by("id"))
+
+    def get(self, task: Task, date, store: Store | None = None) -> ScheduledDesign | None:
+        store_id = store.id if store else None
+        scheduled = None
+        if task.recurring_task_id:
+            scheduled = self._rows.get((date, task.recurring_task_id, store_id))
+        return scheduled or self._rows.get((date, None, store_id))
+
+    def resolve(self, task: Task, date, stores) -> ScheduledDesign | None:
+        """Store-less schedule first, then each store in order.
+
+        The design persisted on a shared task: the old Today view only saved
+        the store-less one, so store-only schedules never reached the task
+        (and mockups couldn't be pre-rendered). Stores are tried in their
+        display order so every caller picks the same one.
+        """
+        scheduled = self.get(task, date, store=None)
+        if scheduled:
+            return scheduled
+        for store in stores:
+            scheduled = self.get(task, date, store=store)
+            if scheduled:
+                return scheduled
+        return None
+
+
+def apply_scheduled_design(task: Task, scheduled: ScheduledDesign | None) -> bool:
+    if not scheduled or task.drive_design_file_id == scheduled.drive_design_file_id:
+        return False
+    task.drive_design_file_id = scheduled.drive_design_file_id
+    task.save(update_fields=["drive_design_file_id", "updated_at"])
+    latest = (
+        task.attachments.filter(kind=Attachment.KIND_DESIGN)
+        .order_by("-created_at")
+        .first()
+    )
+    if not latest or latest.drive_file_id != scheduled.drive_design_file_id:
+        Attachment.objects.create(
+            task=task,
+            kind=Attachment.KIND_DESIGN,
+            drive_file_id=scheduled.drive_design_file_id,
+            filename="Scheduled design",
+        )
+    return True
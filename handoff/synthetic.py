@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import random
+from dataclasses import dataclass
+from uuid import uuid4
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    DesignFile,
+    DesignHistory,
+    ScheduledDesign,
+    Store,
+    Task,
+    TaskPublication,
+    TaskStep,
+)
+from .calendar_cache import bump_calendar_versions
+from .context_processors import bump_context_cache
+from .runway import rebuild_coverage
+
+
+SYNTHETIC_PREFIX = "synthetic"
+STEP_TEXTS = ["Check design", "Generate mockups", "Write listing", "Add tags", "Publish"]
+BATCH_SIZE = 500
+
+
+@dataclass
+class SeedSummary:
+    stores: int = 0
+    tasks: int = 0
+    steps: int = 0
+    scheduled: int = 0
+    design_files: int = 0
+    history: int = 0
+    publications: int = 0
+
+
+def _drive_id(*parts) -> str:
+    return "-".join([SYNTHETIC_PREFIX, *[str(part) for part in parts]])
+
+
+def _status_for(day: dt.date, today: dt.date, rng: random.Random) -> tuple[str, int]:
+    """Return (status, done step count out of len(STEP_TEXTS))."""
+    total = len(STEP_TEXTS)
+    if day < today:
+        if rng.random() < 0.95:
+            return Task.STATUS_DONE, total
+        return Task.STATUS_IN_PROGRESS, rng.randint(1, total - 1)
+    if day == today:
+        done = rng.randint(0, total)
+        if done == total:
+            return Task.STATUS_DONE, done
+        return (Task.STATUS_IN_PROGRESS if done else Task.STATUS_NEW), done
+    return Task.STATUS_NEW, 0
+
+
+@transaction.atomic
+def seed_synthetic(
+    stores: int = 3,
+    days: int = 365,
+    ahead: int = 30,
+    assignees: int = 5,
+    tasks_per_day: int = 10,
+    seed: int = 0,
+) -> SeedSummary:
+    rng = random.Random(seed)
+    today = timezone.localdate()
+    summary = SeedSummary()
+    start_order = (Store.objects.order_by("-order").values_list("order", flat=True).first() or 0) + 1
+    store_rows = []
+    for idx in range(stores):
+        store, created = Store.objects.get_or_create(
+            name=f"{SYNTHETIC_PREFIX.title()} Store {idx + 1}",
+            defaults={"order": start_order + idx, "active": True},
+        )
+        store_rows.append(store)
+        summary.stores += int(created)
+    assignee_names = ["Dad"] + [f"Assignee {idx + 1}" for idx in range(max(0, assignees - 1))]
+
+    all_days = [today - dt.timedelta(days=offset) for offset in range(days - 1, -1, -1)]
+    all_days += [today + dt.timedelta(days=offset) for offset in range(1, ahead + 1)]
+    for day in all_days:
+        tasks = []
+        step_done = []
+        for idx in range(tasks_per_day):
+            status, done = _status_for(day, today, rng)
+            tasks.append(
+                Task(
+                    title=f"[{SYNTHETIC_PREFIX}] Listing {day.isoformat()} #{idx + 1}",
+                    due_date=day,
+                    status=status,
+                    assigned_to=assignee_names[idx % len(assignee_names)],
+                    drive_design_file_id=_drive_id("design", day.isoformat(), idx),
+                )
+            )
+            step_done.append(done)
+        Task.objects.bulk_create(tasks, batch_size=BATCH_SIZE)
+        summary.tasks += len(tasks)
+
+        steps = []
+        publications = []
+        for task, done in zip(tasks, step_done):
+            for order, text in enumerate(STEP_TEXTS, start=1):
+                steps.append(TaskStep(task=task, order=order, text=text, done=order <= done))
+            for store in store_rows:
+                listed = task.status == Task.STATUS_DONE
+                publications.append(
+                    TaskPublication(
+                        task=task,
+                        store=store,
+                        status=TaskPublication.STATUS_LISTED if listed else TaskPublication.STATUS_QUEUED,
+                        listed_at=timezone.now() if listed else None,
+                    )
+                )
+        TaskStep.objects.bulk_create(steps, batch_size=BATCH_SIZE)
+        TaskPublication.objects.bulk_create(publications, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        summary.steps += len(steps)
+        summary.publications += len(publications)
+
+        scheduled = []
+        designs = []
+        history = []
+        for store in store_rows:
+            file_id = _drive_id("scheduled", store.id, day.isoformat())
+            scheduled.append(
+                ScheduledDesign(due_date=day, store=store, drive_design_file_id=file_id)
+            )
+            posted = day < today
+            designs.append(
+                DesignFile(
+                    filename=f"{day.isoformat()}.png",
+                    date_assigned=day,
+                    status=DesignFile.STATUS_POSTED if posted else DesignFile.STATUS_SCHEDULED,
+                    drive_file_id=file_id,
+                    store=store,
+                    size_mb=round(rng.uniform(0.5, 12), 2),
+                    ext="png",
+                    source_folder="Done" if posted else "Scheduled",
+                )
+            )
+        ScheduledDesign.objects.bulk_create(scheduled, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        DesignFile.objects.bulk_create(designs, batch_size=BATCH_SIZE)
+        for design in designs:
+            if design.status == DesignFile.STATUS_POSTED:
+                history.append(
+                    DesignHistory(
+                        design_file=design,
+                        posted_date=design.date_assigned,
+                        original_drive_file_id=design.drive_file_id,
+                        store=design.store,
+                    )
+                )
+        DesignHistory.objects.bulk_create(history, batch_size=BATCH_SIZE)
+        summary.scheduled += len(scheduled)
+        summary.design_files += len(designs)
+        summary.history += len(history)
+    # bulk_create skips the coverage, calendar and nav-cache signals.
+    rebuild_coverage()
+    bump_calendar_versions({(store.id, day) for store in store_rows for day in all_days})
+    bump_context_cache()
+    return summary
+
+
+@transaction.atomic
+def clear_synthetic() -> int:
+    deleted = 0
+    for queryset in (
+        Task.objects.filter(title__startswith=f"[{SYNTHETIC_PREFIX}]"),
+        DesignHistory.objects.filter(original_drive_file_id__startswith=SYNTHETIC_PREFIX),
+    ):
+        deleted += queryset.delete()[0]
+
+    # Design and schedule rows have per-row coverage/calendar/nav signals, so
+    # a normal delete would fire them once per row. Delete them directly and
+    # refresh the caches once, as seed_synthetic does.
+    designs = DesignFile.objects.filter(drive_file_id__startswith=SYNTHETIC_PREFIX)
+    scheduled = ScheduledDesign.objects.filter(drive_design_file_id__startswith=SYNTHETIC_PREFIX)
+    calendar_keys = set(scheduled.values_list("store_id", "due_date"))
+    DesignHistory.objects.filter(design_file__in=designs).update(design_file=None)
+    DesignFile.objects.filter(recycled_from__in=designs).update(recycled_from=None)
+    for queryset in (designs, scheduled):
+        deleted += queryset._raw_delete(queryset.db)
+
+    deleted += Store.objects.filter(name__startswith=f"{SYNTHETIC_PREFIX.title()} Store ").delete()[0]
+    rebuild_coverage()
+    bump_calendar_versions(calendar_keys)
+    bump_context_cache()
+    return deleted
+
+
+class _Request:
+    def __init__(self, result: dict):
+        self._result = result
+
+    def execute(self, *args, **kwargs) -> dict:
+        return self._result
+
+
+class _LocalFiles:
+    def list(self, **kwargs):
+        return _Request({"files": []})
+
+    def get(self, fileId="", fields="", **kwargs):
+        digest = hashlib.md5(fileId.encode()).hexdigest()
+        return _Request(
+            {
+                "id": fileId,
+                "name": f"{fileId}.png",
+                "mimeType": "image/png",
+                "md5Checksum": digest,
+                "modifiedTime": "2026-01-01T00:00:00Z",
+            }
+        )
+
+    def create(self, body=None, **kwargs):
+        return _Request({"id": _drive_id("local", uuid4().hex[:12]), **(body or {})})
+
+    def copy(self, fileId="", body=None, **kwargs):
+        return self.create(body=body)
+
+    def update(self, fileId="", **kwargs):
+        return _Request({"id": fileId})
+
+    def delete(self, fileId="", **kwargs):
+        return _Request({})
+
+
+class _LocalBatch:
+    def __init__(self, callback=None):
+        self._callback = callback
+        self._requests: list[tuple[_Request, str]] = []
+
+    def add(self, request: _Request, callback=None, request_id=None) -> None:
+        self._requests.append((request, request_id or str(len(self._requests) + 1)))
+
+    def execute(self, *args, **kwargs) -> None:
+        for request, request_id in self._requests:
+            if self._callback:
+                self._callback(request_id, request.execute(), None)
+
+
+class LocalDriveService:
+    """Offline stand-in for the Drive v3 client used by seed/load-test runs.
+
+    Metadata calls answer instantly; listings are empty and writes return
+    fresh ids. Batches run their calls in order. Media downloads are not
+    supported.
+    """
+
+    def files(self):
+        return _LocalFiles()
+
+    def new_batch_http_request(self, callback=None):
+        return _LocalBatch(callback=callback)
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import datetime as dt
+from dataclasses import dataclass, field
+
+from django.db.models import Count, Exists, OuterRef, Q
+
+from .models import ScheduledDesign, Store, Task
+
+
+@dataclass
+class StatusCounts:
+    total: int = 0
+    done: int = 0
+    in_progress: int = 0
+    new: int = 0
+    steps_total: int = 0
+    steps_done: int = 0
+
+    @property
+    def steps_percent(self) -> int:
+        if not self.steps_total:
+            return 0
+        return round(100 * self.steps_done / self.steps_total)
+
+
+@dataclass
+class TaskSummary:
+    date_from: dt.date
+    date_to: dt.date
+    counts: StatusCounts = field(default_factory=StatusCounts)
+    by_store: list[tuple[Store, StatusCounts]] = field(default_factory=list)
+
+
+def scheduled_in_stores(stores) -> Exists:
+    """True for tasks with a ScheduledDesign on their due date in ``stores``.
+
+    Matches ScheduledDesignLookup.get: a row for the task's recurring task or a
+    generic row both count.
+    """
+    return Exists(
+        ScheduledDesign.objects.filter(
+            due_date=OuterRef("due_date"), store__in=list(stores)
+        ).filter(
+            Q(recurring_task=OuterRef("recurring_task")) | Q(recurring_task__isnull=True)
+        )
+    )
+
+
+def _count_aggregates(prefix: str, condition: Q | None = None) -> dict:
+    def _where(extra: Q | None = None) -> Q | None:
+        if condition is None:
+            return extra
+        return condition & extra if extra is not None else condition
+
+    return {
+        f"{prefix}total": Count("id", filter=_where(), distinct=True),
+        f"{prefix}done": Count("id", filter=_where(Q(status=Task.STATUS_DONE)), distinct=True),
+        f"{prefix}in_progress": Count(
+            "id", filter=_where(Q(status=Task.STATUS_IN_PROGRESS)), distinct=True
+        ),
+        f"{prefix}new": Count("id", filter=_where(Q(status=Task.STATUS_NEW)), distinct=True),
+        f"{prefix}steps_total": Count("steps", filter=_where(), distinct=True),
+        f"{prefix}steps_done": Count(
+            "steps", filter=_where(Q(steps__done=True)), distinct=True
+        ),
+    }
+
+
+def _counts_from(row: dict, prefix: str) -> StatusCounts:
+    return StatusCounts(
+        **{name: row[f"{prefix}{name}"] or 0 for name in StatusCounts.__dataclass_fields__}
+    )
+
+
+def summary_tasks(
+    date_from: dt.date,
+    date_to: dt.date | None = None,
+    stores=None,
+    assignee: str | None = None,
+):
+    """Tasks in the date range; limited to ``stores`` when given."""
+    queryset = Task.objects.filter(due_date__gte=date_from, due_date__lte=date_to or date_from)
+    if assignee:
+        queryset = queryset.filter(assigned_to=assignee)
+    if stores is not None:
+        queryset = queryset.filter(scheduled_in_stores(stores))
+    return queryset
+
+
+def summarize_tasks(
+    date_from: dt.date,
+    date_to: dt.date | None = None,
+    stores=None,
+    assignee: str | None = None,
+    breakdown_stores=None,
+) -> TaskSummary:
+    """Status totals, step completion and per-store breakdown in one query."""
+    date_to = date_to or date_from
+    breakdown_stores = list(breakdown_stores or [])
+    aggregates = _count_aggregates("")
+    for store in breakdown_stores:
+        aggregates.update(
+            _count_aggregates(f"store_{store.id}_", Q(scheduled_in_stores([store])))
+        )
+    row = summary_tasks(date_from, date_to, stores=stores, assignee=assignee).aggregate(
+        **aggregates
+    )
+    return TaskSummary(
+        date_from=date_from,
+        date_to=date_to,
+        counts=_counts_from(row, ""),
+        by_store=[
+            (store, _counts_from(row, f"store_{store.id}_")) for store in breakdown_stores
+        ],
+    )
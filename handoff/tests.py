@@ -1,23 +1,72 @@
-from django.test import SimpleTestCase, TestCase
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.db import connection
+from django import test
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
 from django.utils import timezone
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
+import contextlib
+import datetime
 import io
+import tempfile
 import zipfile
 
+from .calendar_cache import calendar_versions
+from .context_processors import _match_active_sop, bump_sop_version, handoff_context
+from .design_workflow import ensure_emergency_design, pick_recycle_candidate
+from .drive import _md5_bytes, _upsert_named_file, get_file_checksums
+from .drive_cache import cached_folder_images, refresh_folder_images
+from .intake import INTAKE_CLAIM_TIMEOUT, IntakeSummary, run_intake, start_intake_job
 from .etsy import normalize_tags_csv, suggest_title_from_filename, validate_tags
+from .mockup_service import run_mockup_generation
+from .prerender import in_hour_window, prerender_upcoming
+from .rollover import ROLLOVER_CLAIM_TIMEOUT, RolloverSummary, ensure_daily_rollover, run_daily_rollover
+from .runway import forecast_runway, rebuild_coverage
+from .synthetic import LocalDriveService, clear_synthetic, seed_synthetic
+from .schedule_ops import MAX_SHIFT_DAYS, apply_schedule_operations
+from .schedule_sync import ScheduledDesignLookup, get_scheduled_design_for_task
+from .task_summary import summarize_tasks
+from .views import CALENDAR_API_MAX_DAYS
 from .models import (
+    Attachment,
+    DailyRollover,
+    DesignCoverage,
+    DesignFile,
+    DesignHistory,
+    IntakeRun,
     MockupSlot,
+    MockupTemplate,
+    RecurringTask,
     ScheduledDesign,
+    SOPGuide,
     Store,
     StoreMembership,
     Task,
     TaskPublication,
+    TaskStep,
     TaskTemplate,
     TemplateAttachment,
 )
 
 
+# The configured cache is shared with running servers (a file cache or
+# Redis); tests always get a fresh in-process one, whatever runner starts them.
+TEST_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SimpleTestCase(test.SimpleTestCase):
+    pass
+
+
+@override_settings(CACHES=TEST_CACHES)
+class TestCase(test.TestCase):
+    pass
+
+
 class EtsyTagValidationTests(SimpleTestCase):
     def test_validate_ok(self):
         tags = [f"Tag {i}" for i in range(1, 14)]
@@ -77,6 +126,136 @@ class ManualDoneTests(TestCase):
         self.assertEqual(task.status, Task.STATUS_DONE)
 
 
+class TaskChangeTrackingTests(TestCase):
+    def test_save_uses_loaded_snapshot_for_done_transition(self):
+        task = Task.objects.create(title="Test", due_date=timezone.localdate())
+        task = Task.objects.get(pk=task.pk)
+        with self.assertNumQueries(1):
+            task.notes = "hi"
+            task.save(update_fields=["notes", "updated_at"])
+
+        with patch.object(Task, "record_design_posted") as posted:
+            task.status = Task.STATUS_DONE
+            task.save(update_fields=["status", "updated_at"])
+            task.save(update_fields=["status", "updated_at"])
+        posted.assert_called_once()
+        self.assertEqual(task.previous_value("status"), Task.STATUS_DONE)
+
+        deferred = Task.objects.only("id", "title").get(pk=task.pk)
+        self.assertEqual(deferred.previous_value("status"), Task.STATUS_DONE)
+
+
+class TaskProgressTests(TestCase):
+    def test_with_progress_annotates_counts_without_extra_queries(self):
+        task = Task.objects.create(title="Test", due_date=timezone.localdate())
+        TaskStep.objects.create(task=task, order=1, text="One", done=True)
+        TaskStep.objects.create(task=task, order=2, text="Two")
+        TaskStep.objects.create(task=task, order=3, text="Three")
+
+        annotated = Task.objects.with_progress().get(pk=task.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(annotated.progress_text, "1/3 steps done")
+            self.assertFalse(annotated.all_steps_done)
+
+        task.steps.update(done=True)
+        annotated.refresh_status()
+        self.assertEqual(annotated.status, Task.STATUS_DONE)
+        self.assertEqual(annotated.progress_text, "3/3 steps done")
+
+    def test_bulk_deleting_steps_in_the_admin_refreshes_the_task(self):
+        task = Task.objects.create(title="Test", due_date=timezone.localdate())
+        TaskStep.objects.create(task=task, order=1, text="One", done=True)
+        pending = [
+            TaskStep.objects.create(task=task, order=order, text=str(order)) for order in (2, 3)
+        ]
+        task.refresh_status()
+        self.assertEqual(task.status, Task.STATUS_IN_PROGRESS)
+
+        admin_user = get_user_model().objects.create_superuser(
+            username="admin", password="pass12345", email="admin@example.com"
+        )
+        self.client.force_login(admin_user)
+        self.client.post(
+            "/admin/handoff/taskstep/",
+            {"action": "delete_selected", "_selected_action": [step.pk for step in pending], "post": "yes"},
+        )
+        self.assertEqual(task.steps.count(), 1)
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.STATUS_DONE)
+
+
+class FolderImagesCacheTests(SimpleTestCase):
+    def test_serves_cached_listing_and_refreshes_in_background(self):
+        with patch("handoff.drive_cache._refresh_in_background") as refresh:
+            listing = cached_folder_images("folder-cache-test")
+        self.assertTrue(listing.pending)
+        refresh.assert_called_once_with("folder-cache-test")
+
+        images = [{"id": "img-1", "name": "1.png"}]
+        with patch("handoff.drive_cache.list_folder_images", return_value=images):
+            refresh_folder_images("folder-cache-test")
+        with patch("handoff.drive_cache.list_folder_images") as drive, patch(
+            "handoff.drive_cache._refresh_in_background"
+        ) as refresh:
+            listing = cached_folder_images("folder-cache-test")
+        drive.assert_not_called()
+        refresh.assert_not_called()
+        self.assertEqual(listing.images, images)
+        self.assertFalse(listing.pending)
+
+
+class TaskDetailReadOnlyTests(TestCase):
+    def test_viewing_a_task_does_not_write(self):
+        task = Task.objects.create(title="Test", due_date=timezone.localdate())
+        TaskStep.objects.create(task=task, order=1, text="One", done=True)
+        task.refresh_status()
+        ScheduledDesign.objects.create(due_date=task.due_date, drive_design_file_id="design-1")
+        user = get_user_model().objects.create_user(
+            username="admin", password="pass12345", is_staff=True
+        )
+        self.client.force_login(user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f"/task/{task.id}/")
+
+        self.assertContains(response, "design-1")
+        writes = [
+            q["sql"] for q in ctx.captured_queries
+            if q["sql"].lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE"))
+            and "django_session" not in q["sql"]
+        ]
+        self.assertEqual(writes, [])
+        self.assertFalse(MockupSlot.objects.filter(task=task).exists())
+        self.assertEqual(Task.objects.get(pk=task.pk).drive_design_file_id, "")
+
+    def test_uploading_to_a_placeholder_creates_the_slot(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        task = Task.objects.create(title="Test", due_date=timezone.localdate())
+        user = get_user_model().objects.create_user(username="admin", password="pass12345", is_staff=True)
+        self.client.force_login(user)
+        with patch("handoff.views.upload_mockup_file", return_value="uploaded-1"):
+            response = self.client.post(
+                f"/task/{task.id}/mockup/3/upload/",
+                {"mockup_file": SimpleUploadedFile("m.png", b"png")},
+            )
+        slot = MockupSlot.objects.get(task=task)
+        self.assertEqual((slot.order, slot.drive_file_id), (3, "uploaded-1"))
+        self.assertContains(response, f'data-slot-id="{slot.id}"')
+
+    def test_manual_upload_clears_the_render_fingerprint(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        task = Task.objects.create(title="Test", due_date=timezone.localdate())
+        slot = MockupSlot.objects.create(task=task, order=1, drive_file_id="rendered", render_fingerprint="abc")
+        user = get_user_model().objects.create_user(username="admin", password="pass12345", is_staff=True)
+        self.client.force_login(user)
+        with patch("handoff.views.upload_mockup_file", return_value="manual-1"):
+            self.client.post(f"/mockup/{slot.id}/upload/", {"mockup_file": SimpleUploadedFile("m.png", b"png")})
+        slot.refresh_from_db()
+        self.assertEqual((slot.drive_file_id, slot.render_fingerprint), ("manual-1", ""))
+
+
 class TodayStoreAccessTests(TestCase):
     def test_today_requires_login(self):
         response = self.client.get("/today/")
@@ -142,7 +321,1185 @@ class MockupDownloadZipTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response["Content-Type"], "application/zip")
 
-        with zipfile.ZipFile(io.BytesIO(response.content), "r") as zf:
+        archive = b"".join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(archive), "r") as zf:
             names = zf.namelist()
             self.assertIn("1.png", names)
             self.assertIn("care-card.png", names)
+            self.assertEqual(zf.read("1.png"), b"mockup-bytes")
+            self.assertEqual(zf.getinfo("1.png").compress_type, zipfile.ZIP_STORED)
+
+
+class MockupGenerationResumeTests(TestCase):
+    def setUp(self):
+        template = TaskTemplate.objects.create(name="Template A")
+        for order in (1, 2, 3):
+            MockupTemplate.objects.create(
+                template=template,
+                order=order,
+                label=f"Slide {order}",
+                background_drive_file_id=f"bg-{order}",
+            )
+        self.task = Task.objects.create(
+            title="Task A",
+            due_date=timezone.localdate(),
+            template=template,
+            drive_design_file_id="design-id",
+        )
+
+    def _run(self, fail_orders=()):
+        def fake_render(tmpl, *design):
+            if tmpl.order in fail_orders:
+                raise RuntimeError("background download failed")
+            return b"png", f"{tmpl.label}.png"
+
+        with patch("handoff.mockup_service.get_file_checksums", return_value={}), patch(
+            "handoff.mockup_service.download_design_bytes",
+            return_value=("design.png", "image/png", b"design"),
+        ), patch(
+            "handoff.mockup_service.generate_mockup_bytes_for_template",
+            side_effect=fake_render,
+        ) as render, patch(
+            "handoff.mockup_service.upload_mockup_bytes",
+            side_effect=lambda data, filename, due_date=None, file_id="": file_id or f"file-{filename}",
+        ) as upload:
+            self.upload = upload
+            result = run_mockup_generation(self.task)
+        return result, render.call_count
+
+    def test_failed_slot_does_not_abort_remaining_templates(self):
+        result, calls = self._run(fail_orders={2})
+        self.assertEqual(calls, 3)
+        self.assertEqual(result.generated, 2)
+        self.assertEqual(set(result.errors), {2})
+        slot = MockupSlot.objects.get(task=self.task, order=2)
+        self.assertIn("background download failed", slot.render_error)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.mockups_generated_design_id, "")
+
+    def test_tasks_sharing_a_date_get_their_own_drive_files(self):
+        self._run()
+        other = Task.objects.create(
+            title="Task B",
+            due_date=self.task.due_date,
+            template=self.task.template,
+            drive_design_file_id="design-b",
+        )
+        self.task, first_task = other, self.task
+        self._run()
+        file_ids = {
+            task.title: set(
+                task.mockup_slots.exclude(drive_file_id="").values_list("drive_file_id", flat=True)
+            )
+            for task in (first_task, other)
+        }
+        self.assertEqual(len(file_ids["Task A"]), 3)
+        self.assertFalse(file_ids["Task A"] & file_ids["Task B"])
+        self.assertEqual(self.upload.call_args.args[1], f"task-{other.id}-3-Slide 3.png")
+
+    def test_rerun_updates_the_slots_own_file(self):
+        self._run()
+        MockupTemplate.objects.filter(template=self.task.template, order=1).update(design_x=50)
+        self._run()
+        slot = MockupSlot.objects.get(task=self.task, order=1)
+        self.assertEqual(self.upload.call_args.kwargs["file_id"], slot.drive_file_id)
+
+    def test_rerun_only_renders_stale_or_failed_slots(self):
+        self._run(fail_orders={2})
+        result, calls = self._run()
+        self.assertEqual(calls, 1)
+        self.assertEqual(result.generated, 1)
+        self.assertEqual(result.skipped, 2)
+
+        MockupTemplate.objects.filter(template=self.task.template, order=3).update(design_x=50)
+        result, calls = self._run()
+        self.assertEqual(calls, 1)
+        self.assertEqual(result.skipped, 2)
+
+
+class PrerenderUpcomingTests(TestCase):
+    def test_creates_tasks_and_applies_designs_ahead_of_time(self):
+        start = timezone.localdate()
+        store = Store.objects.create(name="Store A", order=1, active=True)
+        RecurringTask.objects.create(title="Daily shirt", start_date=start, default_steps=["Post"])
+        for offset in (1, 3):
+            ScheduledDesign.objects.create(
+                due_date=start + datetime.timedelta(days=offset),
+                store=store,
+                drive_design_file_id=f"design-{offset}",
+            )
+
+        summary = prerender_upcoming(days=7, start_date=start, with_mockups=False, with_tags=False)
+
+        self.assertEqual(summary.dates, 2)
+        self.assertEqual(summary.tasks_created, 2)
+        self.assertEqual(summary.designs_applied, 2)
+        task = Task.objects.get(due_date=start + datetime.timedelta(days=3))
+        self.assertEqual(task.drive_design_file_id, "design-3")
+        self.assertEqual(task.steps.count(), 1)
+
+    def test_hour_window_wraps_midnight(self):
+        self.assertTrue(in_hour_window((22, 5), datetime.datetime(2026, 1, 1, 23)))
+        self.assertTrue(in_hour_window((22, 5), datetime.datetime(2026, 1, 1, 2)))
+        self.assertFalse(in_hour_window((22, 5), datetime.datetime(2026, 1, 1, 12)))
+
+
+class ScheduledDesignLookupTests(TestCase):
+    def test_matches_per_task_lookup_in_one_query(self):
+        today = timezone.localdate()
+        store_a = Store.objects.create(name="Store A", order=1, active=True)
+        store_b = Store.objects.create(name="Store B", order=2, active=True)
+        recurring = RecurringTask.objects.create(title="Daily shirt", start_date=today)
+        recurring_task = Task.objects.create(title="Daily", due_date=today, recurring_task=recurring)
+        plain_task = Task.objects.create(title="Plain", due_date=today)
+        ScheduledDesign.objects.create(due_date=today, store=store_a, drive_design_file_id="a-any")
+        ScheduledDesign.objects.create(
+            due_date=today, store=store_a, recurring_task=recurring, drive_design_file_id="a-rec"
+        )
+        ScheduledDesign.objects.create(due_date=today, store=None, drive_design_file_id="none-any")
+
+        with self.assertNumQueries(1):
+            lookup = ScheduledDesignLookup.load([today], [store_a, store_b])
+        for task in (recurring_task, plain_task):
+            for store in (None, store_a, store_b):
+                self.assertEqual(
+                    lookup.get(task, today, store=store),
+                    get_scheduled_design_for_task(task, today, store=store),
+                )
+        self.assertEqual(lookup.get(recurring_task, today, store_a).drive_design_file_id, "a-rec")
+
+    def test_resolve_prefers_the_storeless_design_then_store_order(self):
+        today = timezone.localdate()
+        store_a = Store.objects.create(name="Store A", order=1, active=True)
+        store_b = Store.objects.create(name="Store B", order=2, active=True)
+        task = Task.objects.create(title="Plain", due_date=today)
+        ScheduledDesign.objects.create(due_date=today, store=store_b, drive_design_file_id="b")
+        ScheduledDesign.objects.create(due_date=today, store=store_a, drive_design_file_id="a")
+        stores = [store_a, store_b]
+
+        lookup = ScheduledDesignLookup.load([today], stores)
+        self.assertEqual(lookup.resolve(task, today, stores).drive_design_file_id, "a")
+
+        ScheduledDesign.objects.create(due_date=today, store=None, drive_design_file_id="shared")
+        lookup = ScheduledDesignLookup.load([today], stores)
+        self.assertEqual(lookup.resolve(task, today, stores).drive_design_file_id, "shared")
+
+
+class RunwayForecastTests(TestCase):
+    def test_coverage_follows_saves_and_forecast_stops_at_first_gap(self):
+        today = timezone.localdate()
+        day = lambda offset: today + datetime.timedelta(days=offset)
+        store_a = Store.objects.create(name="Store A", order=1, active=True)
+        store_b = Store.objects.create(name="Store B", order=2, active=True)
+        for offset in (0, 1, 3):
+            DesignFile.objects.create(
+                filename=f"{offset}.png",
+                date_assigned=day(offset),
+                status=DesignFile.STATUS_SCHEDULED,
+                store=store_a,
+            )
+        ScheduledDesign.objects.create(due_date=day(0), store=store_b, drive_design_file_id="b0")
+
+        with self.assertNumQueries(1):
+            forecasts = forecast_runway(stores=[store_a, store_b], today=today)
+        self.assertEqual(forecasts[store_a.id].days_remaining, 2)
+        self.assertEqual(forecasts[store_a.id].first_gap_date, day(2))
+        self.assertEqual(forecasts[store_a.id].exhaustion_date, day(3))
+        self.assertEqual(forecasts[store_a.id].scheduled_days, 3)
+        self.assertEqual(forecasts[store_b.id].days_remaining, 1)
+        self.assertEqual(forecasts[None].days_remaining, 2)
+
+        # Filling the gap extends the runway; posting a design shrinks it.
+        DesignFile.objects.create(
+            filename="2.png", date_assigned=day(2), status=DesignFile.STATUS_ACTIVE, store=store_a
+        )
+        first = DesignFile.objects.get(store=store_a, date_assigned=day(0))
+        first.status = DesignFile.STATUS_POSTED
+        first.save()
+        forecast = forecast_runway(stores=[store_a], today=today)[store_a.id]
+        self.assertEqual((forecast.days_remaining, forecast.first_gap_date), (0, today))
+        first.status = DesignFile.STATUS_SCHEDULED
+        first.save()
+        self.assertEqual(forecast_runway(stores=[store_a], today=today)[store_a.id].days_remaining, 4)
+
+        # Moving a schedule to another store clears the old key.
+        scheduled = ScheduledDesign.objects.get(store=store_b)
+        scheduled.store = store_a
+        scheduled.save()
+        self.assertFalse(DesignCoverage.objects.filter(store=store_b).exists())
+
+        maintained = set(DesignCoverage.objects.values_list("store_id", "date"))
+        DesignCoverage.objects.all().delete()
+        rebuild_coverage()
+        self.assertEqual(set(DesignCoverage.objects.values_list("store_id", "date")), maintained)
+
+
+class ScheduleSyncTests(TestCase):
+    def test_design_saves_maintain_generic_schedule_rows(self):
+        today = timezone.localdate()
+        tomorrow = today + datetime.timedelta(days=1)
+        store = Store.objects.create(name="Store A", order=1, active=True)
+        generic = ScheduledDesign.objects.filter(recurring_task__isnull=True)
+
+        design = DesignFile.objects.create(
+            filename="a.png", status=DesignFile.STATUS_SCHEDULED, drive_file_id="file-a", store=store
+        )
+        self.assertFalse(generic.exists())
+        design.date_assigned = today
+        design.save()
+        self.assertEqual(
+            list(generic.values_list("due_date", "store_id", "drive_design_file_id")),
+            [(today, store.id, "file-a")],
+        )
+
+        with self.assertNumQueries(1):
+            design.size_mb = 2
+            design.save()
+
+        design.date_assigned = tomorrow
+        design.save()
+        self.assertEqual(list(generic.values_list("due_date", flat=True)), [tomorrow])
+
+        # Posting keeps the row; rows pointing at other files are left alone.
+        ScheduledDesign.objects.create(due_date=today, store=store, drive_design_file_id="manual")
+        design.status = DesignFile.STATUS_POSTED
+        design.save()
+        self.assertEqual(generic.count(), 2)
+
+
+class AdminScheduleMonthTests(TestCase):
+    def test_month_json_only_reads_the_visible_window(self):
+        admin_user = get_user_model().objects.create_superuser(
+            username="admin", password="pass12345", email="admin@example.com"
+        )
+        self.client.force_login(admin_user)
+        store = Store.objects.create(name="Store A", order=1, active=True)
+        ScheduledDesign.objects.create(
+            due_date=datetime.date(2024, 3, 10), store=store, drive_design_file_id="in-month"
+        )
+        ScheduledDesign.objects.create(
+            due_date=datetime.date(2024, 4, 5), store=store, drive_design_file_id="after-grid"
+        )
+        ScheduledDesign.objects.create(
+            due_date=datetime.date(2023, 3, 10), store=store, drive_design_file_id="old"
+        )
+
+        response = self.client.get("/admin/handoff/schedule/month/", {"month": "2024-03"})
+
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual((payload["prev_month"], payload["next_month"]), ("2024-02", "2024-04"))
+        days = {day["date"]: day["scheduled_items"] for week in payload["weeks"] for day in week}
+        self.assertEqual(days["2024-03-10"][0]["design_id"], "in-month")
+        self.assertEqual(
+            sorted(item["design_id"] for items in days.values() for item in items), ["in-month"]
+        )
+
+
+class StoreCalendarsCacheTests(TestCase):
+    def test_month_grids_are_cached_and_revalidated_by_etag(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(
+            username="admin", password="pass12345", is_staff=True
+        )
+        self.client.force_login(user)
+        store_a = Store.objects.create(name="Store A", order=1, active=True)
+        store_b = Store.objects.create(name="Store B", order=2, active=True)
+        ScheduledDesign.objects.create(
+            due_date=datetime.date(2024, 3, 10), store=store_a, drive_design_file_id="march-a"
+        )
+        url = "/stores/?month=2024-03"
+
+        self.assertContains(self.client.get(url), "march-a")
+        # The first response set the CSRF cookie, which is part of the ETag.
+        with CaptureQueriesContext(connection) as ctx:
+            etag = self.client.get(url).headers["ETag"]
+        self.assertFalse(any("handoff_scheduleddesign" in q["sql"] for q in ctx.captured_queries))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # A queued message is shown rather than lost behind a 304.
+        self.client.post("/idea-dump/", {"title": "Cat shirt"})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Idea saved")
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Only the months (and store) whose grid shows the row are invalidated.
+        before_b = calendar_versions([store_b.id], "2024-03")
+        before_june = calendar_versions([store_a.id], "2024-06")
+        ScheduledDesign.objects.create(
+            due_date=datetime.date(2024, 2, 26), store=store_a, drive_design_file_id="spill-a"
+        )
+        self.assertEqual(calendar_versions([store_b.id], "2024-03"), before_b)
+        self.assertEqual(calendar_versions([store_a.id], "2024-06"), before_june)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "spill-a")
+
+    def test_a_write_on_another_worker_invalidates_this_workers_grid(self):
+        user = get_user_model().objects.create_user(username="admin", password="pass12345", is_staff=True)
+        self.client.force_login(user)
+        store = Store.objects.create(name="Store A", order=1, active=True)
+        url = "/stores/?month=2024-03"
+
+        def worker(backend):
+            """Run as a server process whose cache client is ``backend``."""
+            stack = contextlib.ExitStack()
+            for module in ("handoff.calendar_cache", "handoff.context_processors"):
+                stack.enter_context(patch(f"{module}.cache", backend))
+            return stack
+
+        with tempfile.TemporaryDirectory() as location:
+            this_worker, other_worker = (FileBasedCache(location, {}) for _ in range(2))
+            with worker(this_worker):
+                self.client.get(url)
+                etag = self.client.get(url).headers["ETag"]
+            with worker(other_worker):
+                ScheduledDesign.objects.create(
+                    due_date=datetime.date(2024, 3, 12), store=store, drive_design_file_id="from-b"
+                )
+            with worker(this_worker):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "from-b")
+
+
+class CalendarItemsApiTests(TestCase):
+    def test_range_store_filter_and_since_delta(self):
+        user = get_user_model().objects.create_user(username="member", password="pass12345")
+        self.client.force_login(user)
+        mine = Store.objects.create(name="Mine", order=1, active=True)
+        other = Store.objects.create(name="Other", order=2, active=True)
+        StoreMembership.objects.create(user=user, store=mine)
+        recurring = RecurringTask.objects.create(title="Daily shirt", start_date=datetime.date(2024, 3, 1))
+        kept = ScheduledDesign.objects.create(
+            due_date=datetime.date(2024, 3, 10), store=mine, recurring_task=recurring, drive_design_file_id="a"
+        )
+        dropped = ScheduledDesign.objects.create(
+            due_date=datetime.date(2024, 3, 11), store=mine, drive_design_file_id="b"
+        )
+        ScheduledDesign.objects.create(due_date=datetime.date(2024, 3, 10), store=other, drive_design_file_id="x")
+        ScheduledDesign.objects.create(due_date=datetime.date(2024, 3, 10), drive_design_file_id="none")
+        url = "/calendar/items/"
+        params = {"start": "2024-02-26", "end": "2024-03-31"}
+
+        payload = self.client.get(url, {**params, "stores": f"{mine.id},{other.id},0"}).json()
+        self.assertEqual([item["f"] for item in payload["i"]], ["a", "b"])
+        self.assertEqual(payload["i"][0], {"i": kept.id, "d": "2024-03-10", "s": mine.id, "r": recurring.id, "f": "a"})
+        self.assertEqual(payload["r"], {str(recurring.id): "Daily shirt"})
+
+        dropped.delete()
+        ScheduledDesign.objects.filter(pk=kept.pk).update(updated_at=timezone.now() - datetime.timedelta(days=1))
+        added = ScheduledDesign.objects.create(due_date=datetime.date(2024, 3, 12), store=mine, drive_design_file_id="c")
+        delta = self.client.get(url, {**params, "since": payload["t"] - 3600}).json()
+        self.assertEqual([item["f"] for item in delta["i"]], ["c"])
+        self.assertEqual(delta["a"], [kept.id, added.id])
+
+        self.assertEqual(self.client.get(url, {"start": "2024-01-01", "end": "2024-12-31"}).status_code, 400)
+
+
+class ScheduleBatchTests(TestCase):
+    def test_shift_swap_and_conflicts_keep_design_files_in_step(self):
+        store = Store.objects.create(name="Store A", order=1, active=True)
+        day = lambda n: datetime.date(2024, 3, n)
+        for n in (1, 2, 3):
+            DesignFile.objects.create(
+                filename=f"{n}.png",
+                date_assigned=day(n),
+                status=DesignFile.STATUS_SCHEDULED,
+                drive_file_id=f"file-{n}",
+                store=store,
+            )
+        schedule = lambda: dict(
+            ScheduledDesign.objects.filter(store=store).values_list("due_date", "drive_design_file_id")
+        )
+        assigned = lambda: dict(
+            DesignFile.objects.filter(store=store).values_list("drive_file_id", "date_assigned")
+        )
+        self.assertEqual(schedule(), {day(1): "file-1", day(2): "file-2", day(3): "file-3"})
+
+        result = apply_schedule_operations(
+            [
+                {"op": "shift", "start": "2024-03-02", "end": "2024-03-03", "days": 10},
+                {"op": "swap", "a": "2024-03-01", "b": "2024-03-12"},
+                {"op": "assign", "date": "2024-03-20", "store": store.id, "design": "file-new"},
+            ]
+        )
+        self.assertEqual(
+            schedule(),
+            {day(12): "file-1", day(1): "file-2", day(13): "file-3", day(20): "file-new"},
+        )
+        self.assertEqual(assigned(), {"file-1": day(12), "file-2": day(1), "file-3": day(13)})
+        self.assertEqual(result.changed_dates, [day(1), day(2), day(3), day(12), day(13), day(20)])
+        self.assertTrue(DesignCoverage.objects.filter(store=store, date=day(13)).exists())
+        self.assertFalse(DesignCoverage.objects.filter(store=store, date=day(3)).exists())
+
+        # A shift onto an occupied date fails as a whole.
+        with self.assertRaises(ValueError):
+            apply_schedule_operations(
+                [
+                    {"op": "remove", "date": "2024-03-20", "store": store.id},
+                    {"op": "shift", "start": "2024-03-12", "end": "2024-03-12", "days": 1},
+                ]
+            )
+        self.assertIn(day(20), schedule())
+
+        apply_schedule_operations([{"op": "remove", "date": "2024-03-13", "store": store.id}])
+        self.assertIsNone(assigned()["file-3"])
+
+    def test_endpoint_returns_changed_cells(self):
+        admin_user = get_user_model().objects.create_superuser(
+            username="admin", password="pass12345", email="admin@example.com"
+        )
+        self.client.force_login(admin_user)
+        response = self.client.post(
+            "/admin/handoff/schedule/batch/",
+            data={"operations": [{"op": "assign", "date": "2024-03-05", "design": "abc"}]},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["cells"]["2024-03-05"][0]["design_id"], "abc")
+        bad = self.client.post(
+            "/admin/handoff/schedule/batch/",
+            data={"operations": [{"op": "teleport"}]},
+            content_type="application/json",
+        )
+        self.assertEqual(bad.status_code, 400)
+        for days in (5000000, MAX_SHIFT_DAYS + 1):
+            with self.subTest(days=days):
+                far = self.client.post(
+                    "/admin/handoff/schedule/batch/",
+                    data={"operations": [{"op": "shift", "start": "2024-03-05", "end": "2024-03-06", "days": days}]},
+                    content_type="application/json",
+                )
+                self.assertEqual(far.status_code, 400)
+                self.assertIn("shift days", far.json()["error"])
+        edge = self.client.post(
+            "/admin/handoff/schedule/batch/",
+            data={"operations": [{"op": "shift", "start": "9999-12-30", "end": "9999-12-31", "days": 2}]},
+            content_type="application/json",
+        )
+        self.assertEqual(edge.status_code, 400)
+
+
+class TaskSummaryTests(TestCase):
+    def test_range_summary_with_store_breakdown_in_one_query(self):
+        start = timezone.localdate()
+        store_a = Store.objects.create(name="Store A", order=1, active=True)
+        store_b = Store.objects.create(name="Store B", order=2, active=True)
+        for offset in range(3):
+            day = start + datetime.timedelta(days=offset)
+            task = Task.objects.create(
+                title=f"Task {offset}",
+                due_date=day,
+                status=Task.STATUS_DONE if offset == 0 else Task.STATUS_NEW,
+            )
+            TaskStep.objects.create(task=task, order=1, text="One", done=offset == 0)
+            TaskStep.objects.create(task=task, order=2, text="Two", done=offset == 0)
+            ScheduledDesign.objects.create(
+                due_date=day, store=store_a if offset < 2 else store_b, drive_design_file_id=f"d{offset}"
+            )
+
+        with self.assertNumQueries(1):
+            result = summarize_tasks(
+                start, start + datetime.timedelta(days=2), breakdown_stores=[store_a, store_b]
+            )
+        self.assertEqual((result.counts.total, result.counts.done, result.counts.new), (3, 1, 2))
+        self.assertEqual(result.counts.steps_percent, 33)
+        by_store = {store.name: counts for store, counts in result.by_store}
+        self.assertEqual(by_store["Store A"].total, 2)
+        self.assertEqual(by_store["Store A"].steps_done, 2)
+        self.assertEqual(by_store["Store B"].total, 1)
+
+        only_b = summarize_tasks(start, start + datetime.timedelta(days=2), stores=[store_b])
+        self.assertEqual(only_b.counts.total, 1)
+
+        user = get_user_model().objects.create_user(
+            username="admin", password="pass12345", is_staff=True
+        )
+        self.client.force_login(user)
+        end = start + datetime.timedelta(days=2)
+        response = self.client.get(f"/summary/?assignee=Dad&start={start}&end={end}")
+        self.assertContains(response, "By Store")
+        self.assertContains(response, "Task 2")
+
+        response = self.client.get("/summary/?start=2000-01-01&end=2100-01-01")
+        self.assertEqual(response.context["date_from"], datetime.date(2000, 1, 1))
+        self.assertEqual(
+            response.context["date_to"],
+            datetime.date(2000, 1, 1) + datetime.timedelta(days=CALENDAR_API_MAX_DAYS),
+        )
+
+
+class HotQueryIndexTests(TestCase):
+    def _hot_queries(self):
+        today = timezone.localdate()
+        store = Store.objects.create(name="Store A", order=1, active=True)
+        task = Task.objects.create(title="Test", due_date=today)
+        return [
+            (
+                "handoff_scheduleddesign",
+                ScheduledDesign.objects.filter(due_date=today, recurring_task__isnull=True, store=store),
+            ),
+            (
+                "handoff_scheduleddesign",
+                ScheduledDesign.objects.filter(store=store, due_date__gte=today),
+            ),
+            (
+                "handoff_designfile",
+                DesignFile.objects.filter(status=DesignFile.STATUS_SCHEDULED, date_assigned__gte=today),
+            ),
+            ("handoff_designfile", DesignFile.objects.filter(drive_file_id="abc")),
+            ("handoff_task", Task.objects.filter(due_date=today, assigned_to="Dad")),
+            (
+                "handoff_attachment",
+                Attachment.objects.filter(task=task, kind=Attachment.KIND_DESIGN).order_by("-created_at"),
+            ),
+            (
+                "handoff_designhistory",
+                DesignHistory.objects.filter(posted_date=today, original_drive_file_id="abc"),
+            ),
+            ("handoff_mockupslot", MockupSlot.objects.filter(task=task, order=1)),
+        ]
+
+    def test_hot_queries_use_an_index(self):
+        vendor = connection.vendor
+        if vendor not in {"sqlite", "postgresql"}:
+            self.skipTest(f"No plan check for {vendor}")
+        if vendor == "postgresql":
+            # Tiny test tables would otherwise always be seq-scanned.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        for table, queryset in self._hot_queries():
+            plan = queryset.explain()
+            with self.subTest(query=str(queryset.query)):
+                if vendor == "sqlite":
+                    self.assertNotRegex(plan, rf"SCAN {table}\b")
+                else:
+                    self.assertNotIn(f"Seq Scan on {table}", plan)
+
+
+# Maximum (queries, Drive client builds) per view for the seeded dataset in
+# QueryBudgetTests. Lower these when a view gets cheaper; raising one should
+# be a deliberate, reviewed change.
+VIEW_BUDGETS = {
+    "today": (10, 0),
+    "today_member": (12, 0),
+    "summary": (12, 0),
+    "store_calendars": (8, 0),
+    "task_detail": (26, 0),
+    "etsy_listing_preview": (22, 0),
+    "task_steps": (8, 0),
+    "task_mockups": (11, 0),
+    "admin_schedule": (7, 0),
+}
+
+
+class HandoffContextTests(TestCase):
+    def test_context_is_lazy_and_cached_across_requests(self):
+        Store.objects.create(name="Store A", order=1, active=True)
+        user = get_user_model().objects.create_user(
+            username="admin", password="pass12345", is_staff=True
+        )
+        request = RequestFactory().get("/today/")
+        request.user = user
+        cache.clear()
+
+        with self.assertNumQueries(0):
+            context = handoff_context(request)
+        with self.assertNumQueries(2):
+            self.assertEqual(len(context["store_options"]), 1)
+            self.assertEqual(context["runway"]["days_remaining"], 0)
+        with self.assertNumQueries(0):
+            # Same request: memoized.
+            self.assertEqual(handoff_context(request)["runway"]["days_remaining"], 0)
+        other = RequestFactory().get("/summary/")
+        other.user = user
+        with self.assertNumQueries(0):
+            # New request, same user and store: served from the cache.
+            self.assertEqual(len(handoff_context(other)["store_options"]), 1)
+            self.assertEqual(handoff_context(other)["runway"]["days_remaining"], 0)
+
+        Store.objects.create(name="Store B", order=2, active=True)
+        changed = RequestFactory().get("/today/")
+        changed.user = user
+        self.assertEqual(len(handoff_context(changed)["store_options"]), 2)
+
+        SOPGuide.objects.create(name="Today help", scribe_id_or_url="abc", context_route="/today/")
+        self.assertEqual(handoff_context(request)["active_sop"].name, "Today help")
+
+        htmx = RequestFactory().get("/task/1/steps/", HTTP_HX_REQUEST="true")
+        htmx.user = user
+        self.assertEqual(handoff_context(htmx), {})
+
+
+class SOPMatcherTests(TestCase):
+    def test_matches_like_a_linear_scan_without_queries(self):
+        cache.clear()
+        guides = [
+            SOPGuide.objects.create(name="A etsy", scribe_id_or_url="a", context_route="etsy"),
+            SOPGuide.objects.create(name="B task", scribe_id_or_url="b", context_route="/task/"),
+            SOPGuide.objects.create(name="C today", scribe_id_or_url="c", context_route="/Today/"),
+            SOPGuide.objects.create(name="D off", scribe_id_or_url="d", context_route="/x/", active=False),
+        ]
+
+        def linear(path):
+            for sop in guides:
+                route = sop.context_route.lower()
+                if sop.active and route and route in path.lower():
+                    return sop
+            return None
+
+        _match_active_sop("/warmup/")
+        with self.assertNumQueries(0):
+            for path in ["/today/", "/task/3/etsy/", "/task/3/", "/x/", "/admin/handoff/task/", "/"]:
+                self.assertEqual(_match_active_sop(path), linear(path), path)
+
+        guides[0].context_route = "/nothing/"
+        guides[0].save()
+        self.assertEqual(_match_active_sop("/task/3/etsy/").name, "B task")
+
+    def test_an_edit_on_another_worker_rebuilds_this_workers_matcher(self):
+        SOPGuide.objects.create(name="A", scribe_id_or_url="a", context_route="/today/")
+        with tempfile.TemporaryDirectory() as location:
+            this_worker, other_worker = (FileBasedCache(location, {}) for _ in range(2))
+            with patch("handoff.context_processors.cache", this_worker):
+                self.assertEqual(_match_active_sop("/today/").name, "A")
+            SOPGuide.objects.update(context_route="/elsewhere/")
+            with patch("handoff.context_processors.cache", other_worker):
+                bump_sop_version()
+            with patch("handoff.context_processors.cache", this_worker):
+                self.assertIsNone(_match_active_sop("/today/"))
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.localdate()
+        cls.stores = [
+            Store.objects.create(name=f"Store {idx}", order=idx, active=True) for idx in range(1, 4)
+        ]
+        template = TaskTemplate.objects.create(name="Shirt", default_steps=["Design", "Mockups", "Post"])
+        for order in range(1, 7):
+            MockupTemplate.objects.create(
+                template=template, order=order, background_drive_file_id=f"bg-{order}"
+            )
+        for idx in range(20):
+            RecurringTask.objects.create(
+                title=f"Recurring {idx}",
+                start_date=today,
+                template=template,
+                default_steps=["Design", "Mockups", "Post"],
+            )
+        ScheduledDesign.objects.bulk_create(
+            ScheduledDesign(
+                due_date=today + datetime.timedelta(days=offset),
+                store=store,
+                drive_design_file_id=f"design-{store.id}-{offset}",
+            )
+            for store in cls.stores
+            for offset in range(90)
+        )
+        run_daily_rollover(today)
+        cls.task = Task.objects.filter(due_date=today).order_by("id").first()
+        Task.objects.filter(pk=cls.task.pk).update(drive_mockup_folder_id="mockup-folder")
+        cls.admin = get_user_model().objects.create_superuser(
+            username="boss", password="pass12345", email="boss@example.com"
+        )
+        cls.member = get_user_model().objects.create_user(username="dad", password="pass12345")
+        for store in cls.stores[:2]:
+            StoreMembership.objects.create(user=cls.member, store=store, active=True)
+
+    def _measure(self, user, url):
+        # Budgets are for a cold cross-request cache.
+        cache.clear()
+        self.client.force_login(user)
+        drive = MagicMock()
+        with patch("handoff.drive.get_drive_service", return_value=drive) as drive_service, patch(
+            "handoff.design_workflow.get_drive_service", new=drive_service
+        ), patch("handoff.drive_cache._refresh_in_background"):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(ctx.captured_queries), drive_service.call_count
+
+    def test_views_stay_within_budget(self):
+        task_id = self.task.id
+        cases = {
+            "today": (self.admin, "/today/"),
+            "today_member": (self.member, "/today/"),
+            "summary": (self.admin, "/summary/"),
+            "store_calendars": (self.admin, "/stores/"),
+            "task_detail": (self.admin, f"/task/{task_id}/"),
+            "etsy_listing_preview": (self.admin, f"/task/{task_id}/etsy/"),
+            "task_steps": (self.admin, f"/task/{task_id}/steps/"),
+            "task_mockups": (self.admin, f"/task/{task_id}/mockups/"),
+            "admin_schedule": (self.admin, "/admin/handoff/schedule/"),
+        }
+        self.assertEqual(set(cases), set(VIEW_BUDGETS))
+        for name, (user, url) in cases.items():
+            max_queries, max_drive = VIEW_BUDGETS[name]
+            with self.subTest(view=name):
+                queries, drive_calls = self._measure(user, url)
+                self.assertLessEqual(queries, max_queries, f"{name}: {queries} queries")
+                self.assertLessEqual(drive_calls, max_drive, f"{name}: {drive_calls} Drive calls")
+
+
+class SyntheticSeedTests(TestCase):
+    def test_seed_and_clear(self):
+        summary = seed_synthetic(stores=2, days=3, ahead=2, assignees=2, tasks_per_day=2)
+
+        self.assertEqual(summary.tasks, 10)
+        self.assertEqual(summary.scheduled, 10)
+        self.assertEqual(summary.history, 4)
+        past = Task.objects.filter(due_date__lt=timezone.localdate())
+        self.assertFalse(past.filter(status=Task.STATUS_NEW).exists())
+        clear_synthetic()
+        self.assertFalse(Task.objects.exists())
+        self.assertFalse(Store.objects.exists())
+
+    def test_seeding_invalidates_calendars_and_local_drive_batches(self):
+        store = Store.objects.create(name="Synthetic Store 1", order=1)
+        month = timezone.localdate().strftime("%Y-%m")
+        before = calendar_versions([store.id], month)
+        seed_synthetic(stores=1, days=2, ahead=1, assignees=1, tasks_per_day=1)
+        self.assertNotEqual(calendar_versions([store.id], month), before)
+
+        checksums = get_file_checksums(["a", "b"], service=LocalDriveService())
+        self.assertEqual(set(checksums), {"a", "b"})
+
+    def test_clearing_takes_the_same_queries_for_any_seed_size(self):
+        store_month = timezone.localdate().strftime("%Y-%m")
+        counts = []
+        for days in (2, 8):
+            seed_synthetic(stores=2, days=days, ahead=1, assignees=1, tasks_per_day=1)
+            store_ids = list(Store.objects.values_list("id", flat=True))
+            before = calendar_versions(store_ids, store_month)
+            with CaptureQueriesContext(connection) as ctx:
+                clear_synthetic()
+            counts.append(len(ctx.captured_queries))
+            self.assertNotEqual(calendar_versions(store_ids, store_month), before)
+            self.assertFalse(ScheduledDesign.objects.exists() or DesignFile.objects.exists())
+            self.assertFalse(DesignCoverage.objects.exists())
+        self.assertEqual(counts[0], counts[1])
+
+
+class RecurringHorizonTests(TestCase):
+    def test_horizon_generation_uses_constant_queries(self):
+        start = datetime.date(2024, 3, 1)
+        template = TaskTemplate.objects.create(name="Shirt", default_steps=["Check", "List"])
+        Store.objects.create(name="Store A", order=1, active=True)
+        Store.objects.create(name="Store B", order=2, active=True)
+        RecurringTask.objects.create(title="Daily", start_date=start, default_steps=["One", "Two", "Three"])
+        RecurringTask.objects.create(title="Templated", start_date=start, template=template)
+        late = RecurringTask.objects.create(title="Late", start_date=start + datetime.timedelta(days=20))
+        RecurringTask.objects.create(title="Off", start_date=start, active=False)
+        RecurringTask.objects.get(title="Daily").create_task_for_date(start)
+
+        with CaptureQueriesContext(connection) as ctx:
+            created = RecurringTask.generate_for_horizon(start, 30)
+        self.assertLessEqual(len(ctx.captured_queries), 8)
+        self.assertEqual(created, 29 + 30 + 10)
+        self.assertEqual(Task.objects.filter(recurring_task=late).count(), 10)
+        task = Task.objects.get(title="Templated", due_date=start + datetime.timedelta(days=3))
+        self.assertEqual(list(task.steps.values_list("text", flat=True)), ["Check", "List"])
+        self.assertEqual(task.publications.count(), 2)
+        self.assertEqual(TaskStep.objects.count(), 30 * 3 + 30 * 2)
+        self.assertEqual(RecurringTask.generate_for_horizon(start, 30), 0)
+
+    def test_overlapping_runs_do_not_duplicate_steps(self):
+        start = datetime.date(2024, 3, 1)
+        RecurringTask.objects.create(title="Daily", start_date=start, default_steps=["One", "Two"])
+        dates = [start, start + datetime.timedelta(days=1)]
+        RecurringTask.generate_for_dates(dates)
+
+        # A second run that started before the first one's inserts landed:
+        # its existence check saw nothing, so it tries to create every task.
+        from django.db.models.query import QuerySet
+
+        real_values_list = QuerySet.values_list
+        calls = []
+
+        def stale_existence(queryset, *fields, **kwargs):
+            calls.append(fields)
+            if len(calls) == 1:
+                return []
+            return real_values_list(queryset, *fields, **kwargs)
+
+        with patch.object(QuerySet, "values_list", stale_existence):
+            RecurringTask.generate_for_dates(dates)
+        self.assertEqual(Task.objects.count(), 2)
+        self.assertEqual(TaskStep.objects.count(), 4)
+
+
+class RecycleCandidateTests(TestCase):
+    def setUp(self):
+        self.store = Store.objects.create(name="Shop")
+        self.today = datetime.date(2024, 5, 10)
+
+    def _posted(self, drive_id, store=None):
+        return DesignFile.objects.create(
+            filename=f"{drive_id}.png",
+            status=DesignFile.STATUS_POSTED,
+            drive_file_id=drive_id,
+            store=store or self.store,
+        )
+
+    def test_skips_designs_scheduled_on_other_days(self):
+        self._posted("busy")
+        free = self._posted("free")
+        self._posted("elsewhere", store=Store.objects.create(name="Other"))
+        ScheduledDesign.objects.create(
+            due_date=self.today + datetime.timedelta(days=3), store=self.store, drive_design_file_id="busy"
+        )
+        for _ in range(5):
+            self.assertEqual(pick_recycle_candidate(self.today, store=self.store), free)
+
+    def test_recently_posted_designs_are_a_last_resort(self):
+        recent = self._posted("recent")
+        older = self._posted("older")
+        DesignHistory.objects.create(
+            design_file=recent, posted_date=self.today - datetime.timedelta(days=2),
+            original_drive_file_id="recent",
+        )
+        DesignHistory.objects.create(
+            design_file=older, posted_date=self.today - datetime.timedelta(days=9),
+            original_drive_file_id="older",
+        )
+        with self.settings(DESIGN_RECYCLE_COOLDOWN_DAYS=7):
+            self.assertEqual(pick_recycle_candidate(self.today, store=self.store), older)
+        with self.settings(DESIGN_RECYCLE_COOLDOWN_DAYS=30):
+            self.assertEqual(pick_recycle_candidate(self.today, store=self.store), older)
+        self.assertIsNone(pick_recycle_candidate(self.today, store=Store.objects.create(name="Empty")))
+
+    def test_probes_find_the_one_eligible_design_among_many(self):
+        posted = [self._posted(f"d{index}") for index in range(60)]
+        ScheduledDesign.objects.bulk_create(
+            ScheduledDesign(
+                due_date=self.today + datetime.timedelta(days=1 + index),
+                store=self.store,
+                drive_design_file_id=design.drive_file_id,
+            )
+            for index, design in enumerate(posted)
+            if index != 37
+        )
+        for _ in range(5):
+            self.assertEqual(pick_recycle_candidate(self.today, store=self.store), posted[37])
+
+    def test_history_is_logged_when_the_recycled_copy_is_posted(self):
+        source = self._posted("source")
+        other = self._posted("other")
+        with self.settings(GOOGLE_DRIVE_ROOT_FOLDER_ID="root"), patch(
+            "handoff.design_workflow.get_drive_service"
+        ), patch("handoff.design_workflow.ensure_bucket", return_value="scheduled"), patch(
+            "handoff.design_workflow.get_file_metadata", return_value={"name": "source.png"}
+        ), patch(
+            "handoff.design_workflow.copy_file_to_folder", return_value={"id": "copy-1"}
+        ), patch("handoff.design_workflow.pick_recycle_candidate", return_value=source):
+            recycled = ensure_emergency_design(self.today, store=self.store)
+        self.assertEqual(recycled["design"].recycled_from, source)
+        self.assertFalse(DesignHistory.objects.exists())
+
+        with patch("handoff.drive.archive_design_file", return_value={}):
+            Task.objects.create(
+                title="Post", due_date=self.today, drive_design_file_id="copy-1", status=Task.STATUS_DONE
+            )
+        history = DesignHistory.objects.get()
+        self.assertEqual((history.original_drive_file_id, history.design_file), ("source", source))
+        # The original is now in its cooldown and the posted copy is never a source.
+        next_day = self.today + datetime.timedelta(days=1)
+        for _ in range(5):
+            self.assertEqual(pick_recycle_candidate(next_day, store=self.store), other)
+
+
+class _FakeBatch:
+    """Drive batch stand-in: ``failing`` ids get an error callback; a batch
+    holding a ``dropped`` id raises from execute() without reporting."""
+
+    def __init__(self, callback, failing, dropped, executed):
+        self.callback, self.failing, self.dropped, self.executed = callback, failing, dropped, executed
+        self.ids = []
+
+    def add(self, request, request_id):
+        self.ids.append(request_id)
+
+    def execute(self):
+        self.executed.append(list(self.ids))
+        if self.dropped.intersection(self.ids):
+            raise ConnectionError("batch dropped")
+        for file_id in self.ids:
+            self.callback(file_id, None, RuntimeError("denied") if file_id in self.failing else None)
+
+
+class IntakeEngineTests(TestCase):
+    def setUp(self):
+        self.a = Store.objects.create(name="A", order=1)
+        self.b = Store.objects.create(name="B", order=2)
+        self.executed = []
+        self.dropped = set()
+        service = MagicMock()
+        service.new_batch_http_request.side_effect = lambda callback: _FakeBatch(
+            callback, {"b-bad"}, self.dropped, self.executed
+        )
+        listings = {
+            "Scheduled:A": [{"id": "old", "name": "2024-05-03.png"}],
+            "Dump_Zone:A": [
+                {"id": "a1", "name": "one.png", "mimeType": "image/png", "size": "1000"},
+                {"id": "a2", "name": "two.jpg", "mimeType": "image/jpeg", "size": "1000"},
+                {"id": "a-txt", "name": "notes.txt", "mimeType": "text/plain", "size": "10"},
+            ],
+            "Dump_Zone:B": [
+                {"id": "b1", "name": "b.png", "mimeType": "image/png", "size": "1000"},
+                {"id": "b-bad", "name": "bad.png", "mimeType": "image/png", "size": "1000"},
+            ],
+        }
+        patches = [
+            patch("handoff.intake.get_root_id", return_value="root"),
+            patch("handoff.intake.get_drive_service", return_value=service),
+            patch("handoff.intake.ensure_folder", return_value="folder"),
+            patch(
+                "handoff.intake.ensure_bucket",
+                side_effect=lambda service, root, bucket, store=None: f"{bucket}:{store.name}",
+            ),
+            patch(
+                "handoff.intake._list_files",
+                side_effect=lambda service, folder_id, order_by=None: listings.get(folder_id, []),
+            ),
+        ]
+        for item in patches:
+            item.start()
+            self.addCleanup(item.stop)
+
+    def test_stores_are_moved_in_batches_and_saved_in_bulk(self):
+        DesignFile.objects.create(filename="one.png", status=DesignFile.STATUS_DUMPED, drive_file_id="a1", store=self.a)
+        summary = run_intake([self.a, self.b])
+
+        self.assertEqual([result.label for result in summary.stores], ["A", "B"])
+        self.assertEqual((summary.scheduled, summary.rejected), (3, 1))
+        self.assertEqual(summary.errors, ["B: Move failed for bad.png: denied"])
+        self.assertEqual(sorted(map(sorted, self.executed)), [["a-txt", "a1", "a2"], ["b-bad", "b1"]])
+
+        a1 = DesignFile.objects.get(drive_file_id="a1")
+        self.assertEqual((a1.status, a1.date_assigned, a1.filename), ("SCHEDULED", datetime.date(2024, 5, 4), "2024-05-04.png"))
+        self.assertEqual(DesignFile.objects.get(drive_file_id="a-txt").status, DesignFile.STATUS_ERROR)
+        self.assertFalse(DesignFile.objects.filter(drive_file_id="b-bad").exists())
+        self.assertEqual(
+            set(ScheduledDesign.objects.values_list("store__name", "due_date", "drive_design_file_id")),
+            {
+                ("A", datetime.date(2024, 5, 4), "a1"),
+                ("A", datetime.date(2024, 5, 5), "a2"),
+                ("B", timezone.localdate(), "b1"),
+            },
+        )
+        self.assertTrue(DesignCoverage.objects.filter(store=self.a, date=datetime.date(2024, 5, 5)).exists())
+
+    def test_moves_from_batches_that_went_through_are_saved(self):
+        self.dropped.add("a2")
+        with patch("handoff.intake.DRIVE_BATCH_SIZE", 1):
+            summary = run_intake([self.a])
+        self.assertEqual(len(self.executed), 3)
+        self.assertEqual(summary.errors, ["A: Move failed for two.jpg: batch dropped"])
+        self.assertEqual(
+            set(DesignFile.objects.values_list("drive_file_id", flat=True)), {"a1", "a-txt"}
+        )
+
+    def test_dry_run_writes_nothing(self):
+        summary = run_intake([self.a], dry_run=True)
+        self.assertEqual(summary.scheduled, 2)
+        self.assertEqual(self.executed, [])
+        self.assertFalse(DesignFile.objects.exists())
+
+    def test_admin_starts_a_background_job_and_reports_progress(self):
+        admin_user = get_user_model().objects.create_superuser(
+            username="admin", password="pass12345", email="admin@example.com"
+        )
+        self.client.force_login(admin_user)
+
+        def fake_intake(stores, progress_cb=None):
+            progress_cb(1, 1, 3)
+            return IntakeSummary()
+
+        # Run the worker inline: the test transaction isn't visible to other threads.
+        with patch("handoff.intake.run_intake", side_effect=fake_intake) as run, patch(
+            "handoff.intake.Thread",
+            side_effect=lambda target, daemon: MagicMock(start=target),
+        ), patch("handoff.intake.close_old_connections"):
+            response = self.client.post(
+                "/admin/handoff/intake/", {"store_id": self.b.id}, HTTP_X_REQUESTED_WITH="XMLHttpRequest"
+            )
+        job_id = response.json()["job_id"]
+        status = self.client.get("/admin/handoff/intake/status/", {"job": job_id}).json()
+        self.assertEqual(status["status"], "done")
+        self.assertEqual((status["stores_done"], status["files_done"]), (1, 3))
+        self.assertEqual(status["summary"]["scheduled"], 0)
+        self.assertEqual(run.call_args.args[0], [self.b])
+        self.assertIsNone(IntakeRun.objects.get(job_id=job_id).active)
+
+    def test_a_second_intake_while_one_runs_is_refused(self):
+        admin_user = get_user_model().objects.create_superuser(
+            username="admin", password="pass12345", email="admin@example.com"
+        )
+        self.client.force_login(admin_user)
+        # Claimed by another server process: only the DB row is shared.
+        other = IntakeRun.objects.create(job_id="other-worker", store_labels=["A"], stores_total=1)
+
+        with patch("handoff.intake.run_intake") as run:
+            second = self.client.post(
+                "/admin/handoff/intake/", {"store_id": self.b.id}, HTTP_X_REQUESTED_WITH="XMLHttpRequest"
+            )
+        self.assertEqual(second.status_code, 409)
+        self.assertEqual(second.json()["job_id"], "other-worker")
+        self.assertIn("already running for A", second.json()["error"])
+        run.assert_not_called()
+        status = self.client.get("/admin/handoff/intake/status/", {"job": "other-worker"}).json()
+        self.assertEqual(status["status"], "running")
+        with self.assertRaisesMessage(CommandError, "already running"):
+            call_command("intake_designs", "--all")
+
+        IntakeRun.objects.filter(pk=other.pk).update(
+            updated_at=timezone.now() - datetime.timedelta(seconds=INTAKE_CLAIM_TIMEOUT + 1)
+        )
+        with patch("handoff.intake.Thread"):
+            job_id = start_intake_job([self.b.id])
+        self.assertNotEqual(job_id, "other-worker")
+        other.refresh_from_db()
+        self.assertEqual((other.active, other.status), (None, IntakeRun.STATUS_ERROR))
+
+
+class DailyRolloverTests(TestCase):
+    def test_rollover_runs_once_and_today_is_read_only(self):
+        today = timezone.localdate()
+        store = Store.objects.create(name="Store A", order=1, active=True)
+        RecurringTask.objects.create(title="Daily shirt", start_date=today, default_steps=["Post"])
+        ScheduledDesign.objects.create(due_date=today, store=store, drive_design_file_id="design-1")
+        user = get_user_model().objects.create_user(
+            username="admin", password="pass12345", is_staff=True
+        )
+        self.client.force_login(user)
+
+        def writes(ctx):
+            return [
+                q["sql"] for q in ctx.captured_queries
+                if q["sql"].lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE"))
+                and "django_session" not in q["sql"]
+            ]
+
+        # Before the scheduler has run, the pages still don't do its work.
+        for url in ("/today/", "/summary/"):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(writes(ctx), [], url)
+        self.assertFalse(Task.objects.exists())
+
+        summary = run_daily_rollover(today)
+
+        self.assertEqual(summary.tasks_created, 1)
+        self.assertEqual(summary.designs_applied, 1)
+        self.assertEqual(Task.objects.get(due_date=today).drive_design_file_id, "design-1")
+        self.assertIsNone(run_daily_rollover(today))
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/today/")
+        self.assertContains(response, "Daily shirt")
+        self.assertEqual(writes(ctx), [])
+
+    def test_the_wsgi_entrypoint_starts_the_scheduler(self):
+        import importlib
+        import sys
+
+        sys.modules.pop("dad.wsgi", None)
+        with patch("handoff.rollover.start_rollover_scheduler") as start:
+            importlib.import_module("dad.wsgi")
+        start.assert_called_once_with()
+
+
+    def test_changes_after_the_rollover_reach_today(self):
+        today = timezone.localdate()
+        run_daily_rollover(today)
+
+        recurring = RecurringTask.objects.create(title="Added later", start_date=today, default_steps=["Post"])
+        task = Task.objects.get(recurring_task=recurring, due_date=today)
+        self.assertEqual(task.steps.count(), 1)
+
+        ScheduledDesign.objects.create(due_date=today, drive_design_file_id="late-design")
+        task.refresh_from_db()
+        self.assertEqual(task.drive_design_file_id, "late-design")
+
+        with self.assertNumQueries(1):
+            RecurringTask.objects.create(title="Off", active=False)
+
+    def test_in_progress_claim_blocks_a_second_run(self):
+        today = timezone.localdate()
+        DailyRollover.objects.create(date=today)
+        with patch("handoff.rollover._run_rollover") as run:
+            self.assertIsNone(ensure_daily_rollover(today))
+            self.assertIsNone(run_daily_rollover(today, force=True))
+            run.assert_not_called()
+
+            stale = timezone.now() - datetime.timedelta(seconds=ROLLOVER_CLAIM_TIMEOUT + 1)
+            DailyRollover.objects.filter(date=today).update(started_at=stale)
+            run.return_value = RolloverSummary(date=today.isoformat())
+            self.assertIsNotNone(ensure_daily_rollover(today))
+            self.assertEqual(run.call_count, 1)
+        self.assertIsNotNone(DailyRollover.objects.get(date=today).completed_at)
+
+
+class DriveUpsertTests(SimpleTestCase):
+    def _service(self, existing):
+        service = MagicMock()
+        service.files.return_value.list.return_value.execute.return_value = {"files": existing}
+        service.files.return_value.create.return_value.execute.return_value = {"id": "new-id"}
+        return service
+
+    def test_identical_bytes_are_not_uploaded(self):
+        data = b"png-bytes"
+        service = self._service([{"id": "file-1", "md5Checksum": _md5_bytes(data)}])
+        media = MagicMock()
+        file_id = _upsert_named_file(service, "folder", "1.png", _md5_bytes(data), media)
+        self.assertEqual(file_id, "file-1")
+        media.assert_not_called()
+        service.files.return_value.update.assert_not_called()
+        service.files.return_value.delete.assert_not_called()
+
+    def test_changed_bytes_update_existing_file_in_place(self):
+        service = self._service([{"id": "file-1", "md5Checksum": "old"}])
+        file_id = _upsert_named_file(service, "folder", "1.png", _md5_bytes(b"new"), MagicMock())
+        self.assertEqual(file_id, "file-1")
+        self.assertEqual(
+            service.files.return_value.update.call_args.kwargs["fileId"], "file-1"
+        )
+        service.files.return_value.create.assert_not_called()
+
+    def test_the_callers_file_is_updated_by_id(self):
+        service = self._service([{"id": "other-task", "md5Checksum": "old"}])
+        service.files.return_value.get.return_value.execute.return_value = {
+            "id": "file-1",
+            "name": "1.png",
+            "parents": ["folder"],
+            "md5Checksum": "old",
+        }
+        file_id = _upsert_named_file(
+            service, "folder", "1.png", _md5_bytes(b"new"), MagicMock(), file_id="file-1"
+        )
+        self.assertEqual(file_id, "file-1")
+        self.assertEqual(service.files.return_value.update.call_args.kwargs["fileId"], "file-1")
+        service.files.return_value.list.assert_not_called()
+
+    def test_an_id_that_no_longer_matches_falls_back_to_the_name(self):
+        service = self._service([{"id": "file-2", "md5Checksum": "old"}])
+        service.files.return_value.get.return_value.execute.return_value = {
+            "id": "shared",
+            "name": "other.png",
+            "parents": ["folder"],
+        }
+        file_id = _upsert_named_file(
+            service, "folder", "1.png", _md5_bytes(b"new"), MagicMock(), file_id="shared"
+        )
+        self.assertEqual(file_id, "file-2")
+        self.assertEqual(service.files.return_value.update.call_args.kwargs["fileId"], "file-2")
+
+    def test_missing_file_is_created(self):
+        service = self._service([])
+        file_id = _upsert_named_file(service, "folder", "1.png", _md5_bytes(b"new"), MagicMock())
+        self.assertEqual(file_id, "new-id")
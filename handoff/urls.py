@@ -9,6 +9,7 @@ urlpatterns = [
     path("today/", views.today, name="today"),
     path("summary/", views.summary, name="summary"),
     path("stores/", views.store_calendars, name="store_calendars"),
+    path("calendar/items/", views.calendar_items, name="calendar_items"),
     path(
         "scheduled-design/<int:design_id>/preview/",
         views.scheduled_design_preview,
@@ -38,4 +39,5 @@ urlpatterns = [
     path("mockup-template/<int:template_id>/asset/<str:kind>/", views.mockup_template_asset, name="mockup_template_asset"),
     path("step/<int:step_id>/toggle/", views.toggle_step, name="toggle_step"),
     path("mockup/<int:slot_id>/upload/", views.upload_mockup, name="upload_mockup"),
+    path("task/<int:task_id>/mockup/<int:order>/upload/", views.upload_task_mockup, name="upload_task_mockup"),
 ]
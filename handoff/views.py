@@ -1,22 +1,23 @@
-import calendar
 import datetime
+import hashlib
 import os
 import tempfile
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.db.models import Q
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from django.views.decorators.http import require_POST
 
-import io
 import json
-import zipfile
 import mimetypes
 import re
 from urllib.parse import quote
 
-from django.http import HttpResponse, HttpResponseForbidden
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, StreamingHttpResponse
 from django.http import JsonResponse
 from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
@@ -24,15 +25,17 @@ from django.contrib.admin.views.decorators import staff_member_required
 
 from .drive import (
     download_file_bytes,
-    get_mockups_folder_id,
-    list_folder_images,
     upload_design_file,
+    mockup_drive_name,
     upload_mockup_file,
 )
+from .calendar_cache import calendar_versions, has_scheduled_items, month_value, store_calendar_weeks
+from .drive_cache import cached_folder_images
 from .context_processors import (
     _build_sop_embed_url,
     _compute_runway_status,
-    _match_active_sop,
+    _generation as _context_generation,
+    get_sop_matcher,
 )
 from .forms import TaskCreateForm, IdeaDumpForm
 from .mockup_generator import convert_svg_bytes, preview_mockup_for_template
@@ -42,7 +45,14 @@ from .mockup_service import (
     run_mockup_generation,
     start_mockup_generation_job,
 )
-from .schedule_sync import backfill_scheduled_designs
+from .schedule_sync import (
+    ScheduledDesignLookup,
+    apply_scheduled_design,
+    get_scheduled_design_for_task,
+)
+from .rollover import completed_rollover
+from .task_summary import summarize_tasks, summary_tasks
+from .zip_stream import prefetch_in_order, stream_zip
 from .etsy import format_tags_csv, normalize_tags_csv, suggest_title_from_filename, validate_tags
 from .ai import generate_etsy_tags
 from .models import (
@@ -57,7 +67,9 @@ from .models import (
     TaskStep,
     IdeaDump,
 )
-from .design_workflow import ensure_emergency_design
+
+
+ZIP_PREFETCH_WORKERS = 4
 
 
 def home(request):
@@ -139,55 +151,41 @@ def today(request):
     store = _get_store_from_request(request)
     if user_stores and not store and len(user_stores) == 1:
         store = user_stores[0]
-    sync_horizon = today_date + datetime.timedelta(days=30)
-    if store:
-        backfill_scheduled_designs(store=store, date_from=today_date, date_to=sync_horizon)
-    elif request.user.is_staff or request.user.is_superuser:
-        backfill_scheduled_designs(date_from=today_date, date_to=sync_horizon)
-    else:
-        for user_store in user_stores:
-            backfill_scheduled_designs(store=user_store, date_from=today_date, date_to=sync_horizon)
-
-    if request.user.is_staff or request.user.is_superuser:
-        RecurringTask.generate_for_date(today_date, assignee=assignee)
-    else:
-        RecurringTask.generate_for_date(today_date, assignee=None)
-    recycled = None
-    try:
-        recycled = ensure_emergency_design(today_date, store=store)
-        if recycled:
+    # Syncing, task generation and emergency recycling live in the daily
+    # rollover, run by the scheduler (dad/wsgi.py) or cron; this page only
+    # reads its marker. Later RecurringTask/ScheduledDesign saves reach
+    # today's tasks through the rollover module's signal handlers.
+    rollover = completed_rollover(today_date)
+    if rollover is None:
+        messages.info(request, "Today's rollover hasn't finished yet; tasks may still be missing.")
+    elif rollover.summary:
+        if rollover.summary.get("recycled"):
             messages.warning(
                 request,
                 "Emergency: no new designs found. Recycling an old design for today.",
             )
-    except Exception as exc:
-        messages.error(request, f"Emergency recycle failed: {exc}")
+        for error in rollover.summary.get("errors", []):
+            messages.error(request, error)
     if request.user.is_staff or request.user.is_superuser:
         tasks = (
             Task.objects.filter(due_date=today_date, assigned_to=assignee)
             .order_by("status", "title")
-            .prefetch_related("steps")
+            .with_progress()
         )
     else:
         tasks = (
             Task.objects.filter(due_date=today_date)
             .order_by("status", "title")
-            .prefetch_related("steps")
+            .with_progress()
         )
     scheduled_by_task = {}
-    if store:
-        filtered = []
-        for task in tasks:
-            scheduled = _get_scheduled_design_for_task(task, today_date, store=store)
-            if scheduled:
-                filtered.append(task)
-                scheduled_by_task[task.id] = scheduled
-        tasks = filtered
-    elif not (request.user.is_staff or request.user.is_superuser):
+    if store or not (request.user.is_staff or request.user.is_superuser):
+        lookup_stores = [store] if store else user_stores
+        lookup = ScheduledDesignLookup.load([today_date], lookup_stores)
         filtered = []
         for task in tasks:
-            for user_store in user_stores:
-                scheduled = _get_scheduled_design_for_task(task, today_date, store=user_store)
+            for lookup_store in lookup_stores:
+                scheduled = lookup.get(task, today_date, store=lookup_store)
                 if scheduled:
                     filtered.append(task)
                     scheduled_by_task[task.id] = scheduled
@@ -195,23 +193,10 @@ def today(request):
         tasks = filtered
 
     for task in tasks:
-        scheduled = scheduled_by_task.get(task.id) if store else _get_scheduled_design_for_task(task, today_date, store=store)
-        if scheduled and task.drive_design_file_id != scheduled.drive_design_file_id:
+        scheduled = scheduled_by_task.get(task.id)
+        if scheduled:
+            # Display only; the rollover persists the canonical design.
             task.drive_design_file_id = scheduled.drive_design_file_id
-            task.save(update_fields=["drive_design_file_id", "updated_at"])
-            latest = (
-                task.attachments.filter(kind=Attachment.KIND_DESIGN)
-                .order_by("-created_at")
-                .first()
-            )
-            if not latest or latest.drive_file_id != scheduled.drive_design_file_id:
-                Attachment.objects.create(
-                    task=task,
-                    kind=Attachment.KIND_DESIGN,
-                    drive_file_id=scheduled.drive_design_file_id,
-                    filename="Scheduled design",
-                )
-            # Skip auto-generation here to avoid blocking page loads.
         if store:
             task.display_store_name = store.name
         elif scheduled_by_task.get(task.id) and scheduled_by_task[task.id].store:
@@ -238,54 +223,58 @@ def summary(request):
     store = _get_store_from_request(request)
     if user_stores and not store and len(user_stores) == 1:
         store = user_stores[0]
+    is_staff = request.user.is_staff or request.user.is_superuser
+    try:
+        date_from = datetime.date.fromisoformat(request.GET.get("start") or today_date.isoformat())
+        date_to = datetime.date.fromisoformat(request.GET.get("end") or date_from.isoformat())
+    except ValueError:
+        date_from = date_to = today_date
+    if date_to < date_from:
+        date_from, date_to = date_to, date_from
+    if (date_to - date_from).days > CALENDAR_API_MAX_DAYS:
+        date_to = date_from + datetime.timedelta(days=CALENDAR_API_MAX_DAYS)
+        messages.info(request, f"Summaries cover at most {CALENDAR_API_MAX_DAYS} days; showing up to {date_to}.")
 
-    if request.user.is_staff or request.user.is_superuser:
-        RecurringTask.generate_for_date(today_date, assignee=assignee)
-        tasks_qs = (
-            Task.objects.filter(due_date=today_date, assigned_to=assignee)
-            .order_by("status", "title")
-            .prefetch_related("steps")
-        )
-    else:
-        RecurringTask.generate_for_date(today_date, assignee=None)
-        tasks_qs = (
-            Task.objects.filter(due_date=today_date)
-            .order_by("status", "title")
-            .prefetch_related("steps")
-        )
-    tasks = list(tasks_qs)
     if store:
-        filtered = []
-        for task in tasks:
-            scheduled = _get_scheduled_design_for_task(task, today_date, store=store)
-            if scheduled:
-                filtered.append(task)
-        tasks = filtered
-    elif not (request.user.is_staff or request.user.is_superuser):
-        filtered = []
-        for task in tasks:
-            for user_store in user_stores:
-                scheduled = _get_scheduled_design_for_task(task, today_date, store=user_store)
-                if scheduled:
-                    filtered.append(task)
-                    break
-        tasks = filtered
-
-    total = len(tasks)
-    done = len([t for t in tasks if t.status == Task.STATUS_DONE])
-    in_progress = len([t for t in tasks if t.status == Task.STATUS_IN_PROGRESS])
-    new = len([t for t in tasks if t.status == Task.STATUS_NEW])
+        summary_stores = [store]
+    elif not is_staff:
+        summary_stores = user_stores
+    else:
+        summary_stores = None
+    filters = {
+        "stores": summary_stores,
+        "assignee": assignee if is_staff else None,
+    }
+    breakdown_stores = (
+        summary_stores
+        if summary_stores is not None
+        else list(Store.objects.filter(active=True).order_by("order", "name"))
+    )
+    task_summary = summarize_tasks(
+        date_from,
+        date_to,
+        breakdown_stores=breakdown_stores if len(breakdown_stores) > 1 else None,
+        **filters,
+    )
+    tasks = (
+        summary_tasks(date_from, date_to, **filters)
+        .order_by("due_date", "status", "title")
+        .with_progress()
+    )
     return render(
         request,
         "handoff/summary.html",
         {
             "tasks": tasks,
-            "assignee": assignee if (request.user.is_staff or request.user.is_superuser) else request.user.get_username(),
+            "assignee": assignee if is_staff else request.user.get_username(),
             "today_date": today_date,
-            "total": total,
-            "done": done,
-            "in_progress": in_progress,
-            "new": new,
+            "date_from": date_from,
+            "date_to": date_to,
+            "summary": task_summary,
+            "total": task_summary.counts.total,
+            "done": task_summary.counts.done,
+            "in_progress": task_summary.counts.in_progress,
+            "new": task_summary.counts.new,
             "store": store,
         },
     )
@@ -306,88 +295,74 @@ def store_calendars(request):
         current = datetime.date(today.year, today.month, 1)
 
     next_month = (current.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
-    month_after_next = (next_month.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
-    sync_from = current - datetime.timedelta(days=7)
-    sync_to = month_after_next + datetime.timedelta(days=7)
-
-    if request.user.is_staff or request.user.is_superuser:
-        backfill_scheduled_designs(date_from=sync_from, date_to=sync_to)
-    else:
-        for store in stores:
-            backfill_scheduled_designs(store=store, date_from=sync_from, date_to=sync_to)
-
-    scheduled_qs = ScheduledDesign.objects.filter(
-        due_date__gte=sync_from, due_date__lte=sync_to
-    ).select_related("recurring_task", "store").order_by("due_date")
-    if request.user.is_staff or request.user.is_superuser:
-        pass
-    elif stores:
-        scheduled_qs = scheduled_qs.filter(store__in=stores)
-    else:
-        scheduled_qs = scheduled_qs.none()
+    prev_month = (current.replace(day=1) - datetime.timedelta(days=1)).replace(day=1)
 
-    scheduled_by_store: dict[int | None, dict[datetime.date, list[dict]]] = {}
-    for sd in scheduled_qs:
-        store_id = sd.store_id
-        day_map = scheduled_by_store.setdefault(store_id, {})
-        day_map.setdefault(sd.due_date, []).append(
+    # Staff also see schedules that aren't tied to a store.
+    is_staff = request.user.is_staff or request.user.is_superuser
+    store_ids = ([None] if is_staff else []) + [store.id for store in stores]
+    versions = calendar_versions(store_ids, month_value(current))
+    etag = _store_calendars_etag(request, stores, versions)
+    # Last-Modified only tracks schedule writes; clients that send
+    # If-None-Match are judged by the ETag alone.
+    last_modified = int(max((float(version) for version in versions.values()), default=0)) or None
+    # A 304 renders nothing, so queued messages would never be shown;
+    # counting them doesn't mark them read.
+    if not len(messages.get_messages(request)):
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+    weeks_by_store = store_calendar_weeks(store_ids, current, versions)
+    previews = []
+    if is_staff:
+        # Rendered even when empty so the client-side calendar can reveal it.
+        previews.append(
             {
-                "id": sd.id,
-                "design_id": sd.drive_design_file_id,
-                "label": sd.recurring_task.title if sd.recurring_task else "Design",
-                "thumb": f"https://drive.google.com/thumbnail?id={sd.drive_design_file_id}&sz=w120",
-                "preview_url": reverse("handoff:scheduled_design_preview", args=[sd.id]),
+                "store": None,
+                "title": "All stores",
+                "weeks": weeks_by_store[None],
+                "hidden": not has_scheduled_items(weeks_by_store[None]),
             }
         )
-
-    cal = calendar.Calendar(firstweekday=0)
-    previews = []
-
-    if scheduled_by_store.get(None):
-        weeks = []
-        day_map = scheduled_by_store.get(None, {})
-        for week in cal.monthdatescalendar(current.year, current.month):
-            week_cells = []
-            for day in week:
-                week_cells.append(
-                    {
-                        "date": day,
-                        "in_month": day.month == current.month,
-                        "scheduled_items": day_map.get(day, []),
-                    }
-                )
-            weeks.append(week_cells)
-        previews.append({"store": None, "title": "All stores", "weeks": weeks})
-
     for store in stores:
-        weeks = []
-        day_map = scheduled_by_store.get(store.id, {})
-        for week in cal.monthdatescalendar(current.year, current.month):
-            week_cells = []
-            for day in week:
-                week_cells.append(
-                    {
-                        "date": day,
-                        "in_month": day.month == current.month,
-                        "scheduled_items": day_map.get(day, []),
-                    }
-                )
-            weeks.append(week_cells)
-        previews.append({"store": store, "title": store.name, "weeks": weeks})
+        previews.append({"store": store, "title": store.name, "weeks": weeks_by_store[store.id]})
 
-    prev_month = (current.replace(day=1) - datetime.timedelta(days=1)).replace(day=1)
-
-    return render(
+    response = render(
         request,
         "handoff/store_calendars.html",
         {
             "previews": previews,
             "month_label": current.strftime("%B %Y"),
-            "month_value": f"{current.year}-{current.month:02d}",
-            "prev_month": f"{prev_month.year}-{prev_month.month:02d}",
-            "next_month": f"{next_month.year}-{next_month.month:02d}",
+            "month_value": month_value(current),
+            "prev_month": month_value(prev_month),
+            "next_month": month_value(next_month),
+            "store_ids": ",".join(str(store_id or 0) for store_id in store_ids),
         },
     )
+    response.headers["ETag"] = etag
+    if last_modified:
+        response.headers["Last-Modified"] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _store_calendars_etag(request, stores, versions: dict) -> str:
+    """Fingerprint of everything the page shows.
+
+    Besides the per-store calendar versions this covers the nav/runway
+    context (its cache generation), the viewer and the CSRF cookie baked
+    into forms, so a 304 never serves another user's or a stale banner.
+    """
+    parts = [
+        str(request.user.pk),
+        request.get_full_path(),
+        timezone.localdate().isoformat(),
+        str(_context_generation()),
+        request.META.get("CSRF_COOKIE", ""),
+        *[f"{store.id}:{store.name}" for store in stores],
+        *[f"{store_id}:{version}" for store_id, version in sorted(versions.items(), key=str)],
+    ]
+    return quote_etag(hashlib.md5("|".join(parts).encode()).hexdigest())
 
 
 @login_required
@@ -407,6 +382,74 @@ def scheduled_design_preview(request, design_id: int):
     return response
 
 
+# Longest range one calendar_items call may cover (a six-week grid is 42 days).
+CALENDAR_API_MAX_DAYS = 100
+
+
+@login_required
+def calendar_items(request):
+    """Compact ScheduledDesign feed for client-side calendars.
+
+    ``?start=&end=`` (YYYY-MM-DD, inclusive) and optional ``stores=1,2``
+    (``0`` = rows without a store, staff only). Items use short keys:
+    ``i`` id, ``d`` date, ``s`` store id, ``r`` recurring task id, ``f`` Drive
+    file id; ``r`` at the top level maps task ids to titles. With
+    ``since=<t from an earlier response>`` only rows changed after it are
+    sent, plus ``a``: every id still in range, so the client can drop deletes.
+    """
+    try:
+        start = datetime.date.fromisoformat(request.GET.get("start", ""))
+        end = datetime.date.fromisoformat(request.GET.get("end", ""))
+        since = float(request.GET["since"]) if request.GET.get("since") else None
+    except ValueError:
+        return JsonResponse({"error": "Use start/end as YYYY-MM-DD and since as a number."}, status=400)
+    if end < start or (end - start).days > CALENDAR_API_MAX_DAYS:
+        return JsonResponse({"error": f"Range must be 0-{CALENDAR_API_MAX_DAYS} days."}, status=400)
+
+    allowed = {store.id for store in _get_user_stores(request)}
+    if request.user.is_staff or request.user.is_superuser:
+        allowed.add(0)
+    requested = request.GET.get("stores")
+    if requested:
+        try:
+            store_ids = {int(value) for value in requested.split(",") if value} & allowed
+        except ValueError:
+            return JsonResponse({"error": "stores must be comma-separated ids."}, status=400)
+    else:
+        store_ids = allowed
+
+    store_filter = Q(store_id__in=store_ids - {0})
+    if 0 in store_ids:
+        store_filter |= Q(store__isnull=True)
+    queryset = ScheduledDesign.objects.filter(store_filter, due_date__gte=start, due_date__lte=end)
+
+    # Taken before reading so a write racing this request shows up next time.
+    now = timezone.now()
+    payload = {"t": now.timestamp()}
+    changed = queryset
+    if since is not None:
+        payload["a"] = list(queryset.order_by("id").values_list("id", flat=True))
+        changed = queryset.filter(
+            updated_at__gt=datetime.datetime.fromtimestamp(since, tz=datetime.timezone.utc)
+        )
+    rows = list(
+        changed.order_by("due_date", "id").values_list(
+            "id", "due_date", "store_id", "recurring_task_id", "drive_design_file_id"
+        )
+    )
+    payload["i"] = [
+        {"i": pk, "d": due_date.isoformat(), "s": store_id, "r": task_id, "f": file_id}
+        for pk, due_date, store_id, task_id, file_id in rows
+    ]
+    task_ids = {row[3] for row in rows if row[3]}
+    payload["r"] = (
+        {str(pk): title for pk, title in RecurringTask.objects.filter(pk__in=task_ids).values_list("id", "title")}
+        if task_ids
+        else {}
+    )
+    return JsonResponse(payload)
+
+
 @login_required
 def runway_status(request):
     store = _get_store_from_request(request)
@@ -416,6 +459,8 @@ def runway_status(request):
         "exhaustion_date": status["exhaustion_date"].isoformat()
         if status["exhaustion_date"]
         else None,
+        "first_gap_date": status["first_gap_date"].isoformat(),
+        "scheduled_days": status["scheduled_days"],
         "threshold": status["threshold"],
         "below_threshold": status["below_threshold"],
         "store": store.name if store else None,
@@ -443,30 +488,45 @@ def sop_library(request):
     )
 
 
+# Upper bound on slot numbers created through uploads.
+MAX_MOCKUP_SLOTS = 50
+
+
+def _mockup_slots(task: Task, count: int) -> list[MockupSlot]:
+    """Saved slots plus unsaved placeholders up to ``count``.
+
+    Placeholders keep the detail page read-only; uploading to one creates it.
+    """
+    slots = {}
+    for slot in task.mockup_slots.all():
+        slots.setdefault(slot.order, slot)
+    for order in range(1, count + 1):
+        slots.setdefault(order, MockupSlot(task=task, order=order))
+    return [slots[order] for order in sorted(slots)]
+
+
 def _build_mockup_context(task: Task) -> dict:
     folder_images = []
     folder_error = ""
+    folder_pending = False
     if task.drive_mockup_folder_id:
-        try:
-            folder_images = list_folder_images(task.drive_mockup_folder_id)
-        except Exception as exc:
-            folder_error = f"Folder load failed: {exc}"
+        # Never block the page on Drive; a stale or missing listing is
+        # refreshed in the background and the panel polls for it.
+        listing = cached_folder_images(task.drive_mockup_folder_id)
+        folder_images = listing.images
+        folder_error = listing.error
+        folder_pending = listing.pending
     template_count = 0
     if task.template_id:
         template_count = task.template.mockup_templates.count()
     slot_count = max(6, len(folder_images), template_count) if folder_images else max(6, template_count)
-    task.ensure_mockup_slots(slot_count)
+    slots = _mockup_slots(task, slot_count)
     slot_images = {
         idx + 1: image["id"] for idx, image in enumerate(folder_images)
     }
     has_mockup_templates = False
     if task.template_id:
         has_mockup_templates = task.template.mockup_templates.exists()
-    mockups_folder_id = ""
-    try:
-        mockups_folder_id = get_mockups_folder_id(task.due_date)
-    except Exception:
-        mockups_folder_id = ""
     zip_extras = []
     if task.template_id:
         for attachment in task.template.attachments.exclude(drive_file_id=""):
@@ -501,7 +561,7 @@ def _build_mockup_context(task: Task) -> dict:
 
     required_orders = set(task.required_mockup_orders())
     mockup_cards = []
-    for slot in task.mockup_slots.all():
+    for slot in slots:
         fallback_image_id = slot_images.get(slot.order)
         is_required = slot.order in required_orders
         if slot.drive_file_id or fallback_image_id or is_required:
@@ -538,9 +598,9 @@ def _build_mockup_context(task: Task) -> dict:
     return {
         "slot_images": slot_images,
         "folder_error": folder_error,
+        "folder_pending": folder_pending,
         "required_orders": {order: True for order in required_orders},
         "has_mockup_templates": has_mockup_templates,
-        "mockups_folder_id": mockups_folder_id,
         "zip_extras": zip_extras,
         "mockup_cards": mockup_cards,
     }
@@ -554,42 +614,15 @@ def _maybe_autogenerate_mockups(request, task: Task) -> None:
         messages.success(request, "Mockups auto-generated from design.")
 
 
-def _get_scheduled_design_for_task(task: Task, date, store: Store | None = None) -> ScheduledDesign | None:
-    scheduled = None
-    store_filter = {"store": store} if store else {"store__isnull": True}
-    if task.recurring_task_id:
-        scheduled = ScheduledDesign.objects.filter(
-            due_date=date, recurring_task=task.recurring_task, **store_filter
-        ).first()
-    if not scheduled:
-        scheduled = ScheduledDesign.objects.filter(
-            due_date=date, recurring_task__isnull=True, **store_filter
-        ).first()
-    return scheduled
-
-
 @login_required
 def task_detail(request, task_id: int):
     task = get_object_or_404(Task, pk=task_id)
     store = _get_store_from_request(request)
-    scheduled = _get_scheduled_design_for_task(task, task.due_date, store=store)
-    if scheduled and task.drive_design_file_id != scheduled.drive_design_file_id:
+    # Read-only: status is kept current by the views that change its inputs,
+    # and the daily rollover persists scheduled designs.
+    scheduled = get_scheduled_design_for_task(task, task.due_date, store=store)
+    if scheduled:
         task.drive_design_file_id = scheduled.drive_design_file_id
-        task.save(update_fields=["drive_design_file_id", "updated_at"])
-        latest = (
-            task.attachments.filter(kind=Attachment.KIND_DESIGN)
-            .order_by("-created_at")
-            .first()
-        )
-        if not latest or latest.drive_file_id != scheduled.drive_design_file_id:
-            Attachment.objects.create(
-                task=task,
-                kind=Attachment.KIND_DESIGN,
-                drive_file_id=scheduled.drive_design_file_id,
-                filename="Scheduled design",
-            )
-    # Skip auto-generation here to avoid blocking page loads.
-    task.refresh_status()
     context = _build_mockup_context(task)
     context["task"] = task
     context["store"] = store
@@ -692,10 +725,10 @@ def etsy_listing_preview(request, task_id: int):
     context["store"] = store
     context["description_by_store"] = description_by_store
     context["selected_store_id"] = selected_store_id
-    sops = list(SOPGuide.objects.filter(active=True).order_by("name", "id"))
+    matcher = get_sop_matcher()
+    sops = matcher.sops
     if sops:
-        active_sop = _match_active_sop(request.path)
-        selected_sop = active_sop if active_sop in sops else None
+        selected_sop = matcher.match(request.path)
         if not selected_sop:
             for sop in sops:
                 if "etsy" in (sop.context_route or "").lower():
@@ -960,9 +993,14 @@ def download_mockups(request, task_id: int):
     if not slots and not template_assets:
         return redirect("handoff:task_detail", task_id=task.id)
 
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+    sources = [("slot", slot) for slot in slots]
+    sources.extend(
+        ("asset", asset) for asset in template_assets if asset.include_in_mockup_zip
+    )
+
+    def entries():
         seen_names = set()
+
         def unique_name(name: str) -> str:
             base = name
             idx = 2
@@ -976,23 +1014,24 @@ def download_mockups(request, task_id: int):
             seen_names.add(name)
             return name
 
-        for slot in slots:
-            name, _, data = download_file_bytes(slot.drive_file_id)
-            _, ext = os.path.splitext(name or "")
-            ext = ext or ".png"
-            safe_name = unique_name(f"{slot.order}{ext}")
-            zip_file.writestr(safe_name, data)
-        for idx, asset in enumerate(template_assets, start=1):
-            if not asset.include_in_mockup_zip:
-                continue
-            name, _, data = download_file_bytes(asset.drive_file_id)
-            asset_name = asset.filename or name or f"template-extra-{idx}.png"
-            safe_name = unique_name(asset_name)
-            zip_file.writestr(safe_name, data)
-    zip_buffer.seek(0)
+        fetched = prefetch_in_order(
+            lambda source: download_file_bytes(source[1].drive_file_id),
+            sources,
+            workers=ZIP_PREFETCH_WORKERS,
+        )
+        asset_idx = 0
+        for (kind, obj), (name, _, data) in fetched:
+            if kind == "slot":
+                _, ext = os.path.splitext(name or "")
+                ext = ext or ".png"
+                yield unique_name(f"{obj.order}{ext}"), data
+            else:
+                asset_idx += 1
+                asset_name = obj.filename or name or f"template-extra-{asset_idx}.png"
+                yield unique_name(asset_name), data
 
     filename = f"mockups-{task.due_date.isoformat()}-task-{task.id}.zip"
-    response = HttpResponse(zip_buffer.getvalue(), content_type="application/zip")
+    response = StreamingHttpResponse(stream_zip(entries()), content_type="application/zip")
     response["Content-Disposition"] = f'attachment; filename="{filename}"'
     return response
 
@@ -1030,6 +1069,9 @@ def mockup_file_download(request, file_id: str):
 def generate_mockups(request, task_id: int):
     task = get_object_or_404(Task, pk=task_id)
     store = _get_store_from_request(request)
+    # task_detail only displays the store's scheduled design; persist it
+    # before rendering so mockups match what was shown.
+    apply_scheduled_design(task, get_scheduled_design_for_task(task, task.due_date, store=store))
     if not task.template or not task.template.mockup_templates.exists():
         if request.headers.get("X-Requested-With") == "XMLHttpRequest":
             return JsonResponse(
@@ -1049,9 +1091,13 @@ def generate_mockups(request, task_id: int):
         return JsonResponse({"job_id": job_id, "total": total})
 
     try:
-        generated = run_mockup_generation(task)
-        if generated:
+        result = run_mockup_generation(task)
+        if result.errors:
+            messages.error(request, f"Mockup generation incomplete: {result.error_summary()}")
+        if result.generated:
             messages.success(request, "Mockups generated.")
+        elif result.ok and result.skipped:
+            messages.info(request, "Mockups are already up to date.")
     except Exception as exc:
         messages.error(request, f"Mockup generation failed: {exc}")
 
@@ -1074,6 +1120,7 @@ def mockup_generation_status(request, task_id: int):
             "done": job.done,
             "status": job.status,
             "error": job.error,
+            "slot_errors": {str(order): message for order, message in job.slot_errors.items()},
         }
     )
 
@@ -1310,7 +1357,21 @@ def toggle_step(request, step_id: int):
 @login_required
 @require_POST
 def upload_mockup(request, slot_id: int):
-    slot = get_object_or_404(MockupSlot, pk=slot_id)
+    return _upload_mockup(request, get_object_or_404(MockupSlot, pk=slot_id))
+
+
+@login_required
+@require_POST
+def upload_task_mockup(request, task_id: int, order: int):
+    """Upload into slot ``order`` of a task, creating the slot on first use."""
+    task = get_object_or_404(Task, pk=task_id)
+    if not 1 <= order <= MAX_MOCKUP_SLOTS:
+        return HttpResponseBadRequest("Invalid mockup slot.")
+    slot = task.mockup_slots.filter(order=order).first() or MockupSlot.objects.create(task=task, order=order)
+    return _upload_mockup(request, slot)
+
+
+def _upload_mockup(request, slot: MockupSlot):
     task = slot.task
     uploaded = request.FILES.get("mockup_file")
     if not uploaded:
@@ -1326,10 +1387,17 @@ def upload_mockup(request, slot_id: int):
             for chunk in uploaded.chunks():
                 temp.write(chunk)
             temp_path = temp.name
-        file_id = upload_mockup_file(temp_path, uploaded.name, task.due_date)
+        file_id = upload_mockup_file(
+            temp_path,
+            mockup_drive_name(task.id, slot.order, uploaded.name),
+            task.due_date,
+            file_id=slot.drive_file_id,
+        )
         slot.drive_file_id = file_id
         slot.filename = uploaded.name
-        slot.save(update_fields=["drive_file_id", "filename", "updated_at"])
+        # A manual image isn't a render; the next Generate must redo the slot.
+        slot.render_fingerprint = ""
+        slot.save(update_fields=["drive_file_id", "filename", "render_fingerprint", "updated_at"])
         from .models import Attachment
 
         Attachment.objects.create(
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, TypeVar
+
+from django.db import connection
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_DONE = object()
+
+# Already-compressed formats gain nothing from DEFLATE; store them as-is.
+STORED_EXTENSIONS = {
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".webp",
+    ".mp4",
+    ".mov",
+    ".webm",
+    ".zip",
+}
+
+
+class _ChunkBuffer:
+    """Write-only sink that hands written bytes back to the response iterator."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def compression_for(name: str) -> int:
+    ext = os.path.splitext(name or "")[1].lower()
+    return zipfile.ZIP_STORED if ext in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+
+def stream_zip(entries: Iterable[tuple[str, bytes]], chunk_size: int = 256 * 1024) -> Iterator[bytes]:
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, "w") as zip_file:
+        for name, data in entries:
+            info = zipfile.ZipInfo(name)
+            info.compress_type = compression_for(name)
+            with zip_file.open(info, "w") as handle:
+                view = memoryview(data)
+                for start in range(0, len(view), chunk_size):
+                    handle.write(view[start:start + chunk_size])
+                    chunk = buffer.drain()
+                    if chunk:
+                        yield chunk
+            chunk = buffer.drain()
+            if chunk:
+                yield chunk
+    chunk = buffer.drain()
+    if chunk:
+        yield chunk
+
+
+def prefetch_in_order(
+    fetch: Callable[[T], R], items: Iterable[T], workers: int = 4
+) -> Iterator[tuple[T, R]]:
+    """Run ``fetch`` concurrently but yield results in input order.
+
+    At most ``workers`` results are in flight or buffered at once.
+    """
+
+    def _run(item):
+        try:
+            return fetch(item)
+        finally:
+            # Worker threads get their own DB connection; don't leak it.
+            connection.close()
+
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    pending = deque()
+    iterator = iter(items)
+    try:
+        for item in iterator:
+            pending.append((item, executor.submit(_run, item)))
+            if len(pending) >= workers:
+                break
+        while pending:
+            item, future = pending.popleft()
+            result = future.result()
+            next_item = next(iterator, _DONE)
+            if next_item is not _DONE:
+                pending.append((next_item, executor.submit(_run, next_item)))
+            yield item, result
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -25,6 +25,7 @@ def main() -> None:
     os.environ.setdefault("DJANGO_SETTINGS_MODULE", "dad.settings")
     serve = _get_waitress_serve()
 
+    # Importing the WSGI app also starts the daily rollover scheduler.
     from dad.wsgi import application
 
     host = os.environ.get("PROD_HOST", "127.0.0.1")